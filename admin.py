@@ -5,13 +5,17 @@ import time
 import os
 import hashlib
 import uuid
-import io
 from datetime import datetime
 
 from bank_config import (
     load_bank_formats, save_bank_formats, add_bank_format,
-    update_bank_format, delete_bank_format, get_bank_format
+    update_bank_format, delete_bank_format, get_bank_format,
+    get_detection_cache_stats, clear_detection_cache
 )
+from utils import get_normalization_cache_stats, clear_normalization_caches, format_amount_columns
+from export_writer import requested_exports, get_export_cache_stats, clear_export_cache, EXCEL_MIME, CSV_MIME
+from result_cache import get_result_cache_stats, clear_result_cache
+from logging_config import set_session_debug, DEFAULT_LOG_LEVEL
 from database import clean_old_statements, get_statement_stats, purge_database, get_recent_bank_statements, get_bank_statement
 
 # Şifre güvenliği için sabit bir salt değeri oluştur
@@ -159,6 +163,10 @@ def bank_format_management():
                     header_input = st.text_input("Başlık Tanımlayıcıları (virgülle ayırın)", value=header_str)
                     
                     date_col = st.text_input("Tarih Sütunu", value=selected_format.get("date_col", ""))
+                    date_format = st.text_input(
+                        "Tarih Formatı (opsiyonel, örn. %d.%m.%Y)",
+                        value=selected_format.get("date_format", "")
+                    )
                     desc_col = st.text_input("Açıklama Sütunu", value=selected_format.get("description_col", ""))
                     
                     # Borç/Alacak veya Tutar modeli seçimi
@@ -243,6 +251,9 @@ def bank_format_management():
                         if doc_no_col:
                             updated_format["document_no_col"] = doc_no_col
                         
+                        if date_format:
+                            updated_format["date_format"] = date_format
+                        
                         success, message = update_bank_format(format_id, updated_format)
                         
                         if success:
@@ -275,6 +286,7 @@ def bank_format_management():
         header_input = st.text_input("Başlık Tanımlayıcıları (virgülle ayırın)")
         
         date_col = st.text_input("Tarih Sütunu")
+        date_format = st.text_input("Tarih Formatı (opsiyonel, örn. %d.%m.%Y)")
         desc_col = st.text_input("Açıklama Sütunu")
         
         model_selection = st.radio(
@@ -332,6 +344,9 @@ def bank_format_management():
                 if doc_no_col:
                     new_format["document_no_col"] = doc_no_col
                 
+                if date_format:
+                    new_format["date_format"] = date_format
+                
                 success, message = add_bank_format(new_format)
                 
                 if success:
@@ -425,41 +440,38 @@ def past_transactions():
                                 styles = ['color: red' if (c == 'Borç' and x != '') else '' for c, x in zip(s.index, s.values)]
                                 return styles
                             
+                            # Sayısal Borç/Alacak sütunları gösterim ve indirme için Türk Lirası formatına çevrilir
+                            processed_df = format_amount_columns(statement_data['processed_df'])
+                            
                             # Stil uygulayarak dataframe'i göster
-                            styled_df = statement_data['processed_df'].style.apply(highlight_negative, axis=1)
+                            styled_df = processed_df.style.apply(highlight_negative, axis=1)
                             st.dataframe(styled_df, use_container_width=True, height=400)
                             
-                            # İndirme seçenekleri
-                            col1, col2 = st.columns(2)
+                            # İndirme seçenekleri: dosyalar kayıt kimliği ve tarihiyle önbelleğe alınır (Geçmiş Dönüştürmeler ile ortak)
+                            exports = requested_exports(statement_data['processed_df'], "archive_admin", result_key=f"statement:{selected_id}:{statement_data['upload_date']}")
                             
-                            # Create download buttons for different formats
-                            excel_buffer = io.BytesIO()
-                            statement_data['processed_df'].to_excel(excel_buffer, index=False, engine='openpyxl')
-                            excel_buffer.seek(0)
-                            
-                            csv_buffer = io.BytesIO()
-                            statement_data['processed_df'].to_csv(csv_buffer, index=False, encoding='utf-8-sig', sep=';')
-                            csv_buffer.seek(0)
-                            
-                            with col1:
-                                st.download_button(
-                                    label="Excel Olarak İndir",
-                                    data=excel_buffer,
-                                    file_name=f"islenmis_banka_ekstresi_{selected_id}.xlsx",
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                    key="excel_archive_admin",
-                                    use_container_width=True
-                                )
+                            if exports:
+                                col1, col2 = st.columns(2)
+                                
+                                with col1:
+                                    st.download_button(
+                                        label="Excel Olarak İndir",
+                                        data=exports['excel'],
+                                        file_name=f"islenmis_banka_ekstresi_{selected_id}.xlsx",
+                                        mime=EXCEL_MIME,
+                                        key="excel_archive_admin",
+                                        use_container_width=True
+                                    )
                             
-                            with col2:
-                                st.download_button(
-                                    label="CSV Olarak İndir",
-                                    data=csv_buffer,
-                                    file_name=f"islenmis_banka_ekstresi_{selected_id}.csv",
-                                    mime="text/csv",
-                                    key="csv_archive_admin",
-                                    use_container_width=True
-                                )
+                                with col2:
+                                    st.download_button(
+                                        label="CSV Olarak İndir",
+                                        data=exports['csv'],
+                                        file_name=f"islenmis_banka_ekstresi_{selected_id}.csv",
+                                        mime=CSV_MIME,
+                                        key="csv_archive_admin",
+                                        use_container_width=True
+                                    )
                                 
                         with tab2:
                             # Ham veriyi göster
@@ -619,6 +631,69 @@ def system_settings():
                 else:
                     st.error("Şifre değiştirilirken bir hata oluştu.")
     
+    # Tarih ve açıklama önbellek istatistikleri
+    st.subheader("Önbellek İstatistikleri")
+    
+    cache_stats = get_normalization_cache_stats()
+    cache_labels = {"format_date": "Tarih Önbelleği", "clean_description": "Açıklama Önbelleği"}
+    
+    cache_cols = st.columns(len(cache_stats))
+    for cache_col, (cache_name, stats) in zip(cache_cols, cache_stats.items()):
+        with cache_col:
+            st.markdown(f"**{cache_labels.get(cache_name, cache_name)}**")
+            st.metric("İsabet Oranı", f"%{stats['hit_ratio'] * 100:.1f}")
+            st.text(f"İsabet: {stats['hits']:,} | Iskalama: {stats['misses']:,}")
+            st.text(f"Doluluk: {stats['size']:,} / {stats['max_size']:,}")
+    
+    # Banka tespit önbelleği (diskte; banka formatları değişince kendiliğinden boşalır)
+    detection_stats = get_detection_cache_stats()
+    st.markdown("**Banka Tespit Önbelleği**")
+    st.text(f"İsabet: {detection_stats['hits']:,} | Iskalama: {detection_stats['misses']:,} | "
+            f"İsabet Oranı: %{detection_stats['hit_ratio'] * 100:.1f}")
+    st.text(f"Dosya kayıtları: {detection_stats['content_entries']:,} / {detection_stats['max_entries']:,} | "
+            f"Şema kayıtları: {detection_stats['schema_entries']:,} / {detection_stats['max_entries']:,}")
+    
+    # İşlenmiş ekstre sonuçları (bellekte ve diskte; banka formatları değişince anahtarlar da değişir)
+    result_stats = get_result_cache_stats()
+    st.markdown("**İşlenmiş Sonuç Önbelleği**")
+    st.text(f"İsabet: {result_stats['hits']:,} (diskten: {result_stats['disk_hits']:,}) | Iskalama: {result_stats['misses']:,} | "
+            f"İsabet Oranı: %{result_stats['hit_ratio'] * 100:.1f}")
+    st.text(f"Bellek: {result_stats['entries']:,} sonuç, "
+            f"{result_stats['bytes'] / 1e6:.1f} MB / {result_stats['max_bytes'] / 1e6:.1f} MB")
+    st.text(f"Disk: {result_stats['disk_entries']:,} sonuç, "
+            f"{result_stats['disk_bytes'] / 1e6:.1f} MB / {result_stats['disk_max_bytes'] / 1e6:.1f} MB")
+    st.text(f"Akış modu çıktıları: {result_stats['stream_entries']:,} dosya, "
+            f"{result_stats['stream_bytes'] / 1e6:.1f} MB / {result_stats['stream_max_bytes'] / 1e6:.1f} MB")
+    
+    # Hazırlanan indirme dosyaları (bellekte; sınır aşılınca en uzun süredir kullanılmayanlar atılır)
+    export_stats = get_export_cache_stats()
+    st.markdown("**İndirme Dosyası Önbelleği**")
+    st.text(f"İsabet: {export_stats['hits']:,} | Iskalama: {export_stats['misses']:,} | "
+            f"İsabet Oranı: %{export_stats['hit_ratio'] * 100:.1f}")
+    st.text(f"Dosyalar: {export_stats['entries']:,} | "
+            f"Boyut: {export_stats['bytes'] / 1e6:.1f} MB / {export_stats['max_bytes'] / 1e6:.1f} MB")
+    st.text(f"Sınırdan büyük son dosyalar: {export_stats['large_entries']:,} | "
+            f"Boyut: {export_stats['large_bytes'] / 1e6:.1f} MB")
+    
+    if st.button("Önbellekleri Temizle", use_container_width=True):
+        clear_normalization_caches()
+        clear_detection_cache()
+        clear_export_cache()
+        clear_result_cache()
+        st.success("Önbellekler ve sayaçlar sıfırlandı.")
+        st.rerun()
+    
+    # Oturum bazında hata ayıklama günlüğü
+    st.subheader("Hata Ayıklama")
+    
+    st.caption(f"Varsayılan günlük seviyesi: {DEFAULT_LOG_LEVEL} (BANKA_LOG_LEVEL ortam değişkeni ile değiştirilebilir)")
+    debug_mode = st.toggle(
+        "Hata ayıklama modu (sadece bu oturum)",
+        key="debug_mode",
+        help="Açıkken banka tespiti, standardizasyon ve ayrıştırma adımlarının ayrıntılı günlükleri yazılır. Diğer kullanıcıları etkilemez."
+    )
+    set_session_debug(debug_mode)
+    
     # Sistem durumu
     st.subheader("Sistem Durumu")
     
@@ -1,18 +1,23 @@
 import streamlit as st
 import pandas as pd
-import io
-import os
 import traceback
-from bank_config import identify_bank_format, standardize_dataframe, parse_bank_statement, identify_bank_from_filename
+from bank_config import parse_bank_statement, content_hash
 from data_processor import process_data
-from utils import clean_description, format_date, convert_to_target_format
+from utils import convert_to_target_format, format_amount_columns
 from admin import admin_panel, is_admin, get_admin_config, verify_password
+from logging_config import get_logger, set_session_debug
+from file_reader import read_statement
+from stream_processor import stream_convert_csv, STREAMING_THRESHOLD_BYTES, STREAM_PREVIEW_ROWS, OUTPUT_ENCODING
+from result_cache import result_key, get_cached_result, store_result, get_cached_stream_result, store_stream_result
+from export_writer import requested_exports, requested_stream_exports, EXCEL_MIME, CSV_MIME
+
+logger = get_logger("app")
 
 # Veritabanı bağlantısı varsa import et, yoksa alternatif kullan
 try:
     from database import save_bank_statement, save_conversion, get_recent_bank_statements, get_bank_statement, db_available
 except Exception as e:
-    print(f"Veritabanı hatası: {str(e)}")
+    logger.error("Veritabanı hatası: %s", e)
     traceback.print_exc()
     db_available = False
     
@@ -46,6 +51,9 @@ st.set_page_config(
     }
 )
 
+# Admin panelinden açılan hata ayıklama modu sadece bu oturumun günlüklerini etkiler
+set_session_debug(st.session_state.get("debug_mode", False))
+
 # Set up title and description
 st.title("Banka Ekstresi Dönüştürücü")
 st.write("Bu uygulama banka ekstrelerini standart muhasebe formatına dönüştürür.")
@@ -55,90 +63,182 @@ st.header("Banka Ekstresi Yükle")
 uploaded_file = st.file_uploader("Lütfen bir banka ekstresi seçin (CSV veya Excel formatı)", 
                                 type=["csv", "xlsx", "xls"])
 
+def show_messages(messages):
+    """
+    İşleme sırasında biriken (seviye, mesaj) bildirimlerini göster
+    """
+    for level, message in messages:
+        getattr(st, level)(message)
+
 # Main processing function
+def run_processing_pipeline(file, file_name, content_key):
+    """
+    Dosyayı oku, banka formatını tespit et, ayrıştır ve hedef formata dönüştür.
+    Hatalar doğrudan gösterilir; başarılı sonuçta kullanıcı bildirimleri sonuçla birlikte döner
+    (önbellekten gelen sonuçta da aynı bildirimler gösterilebilsin diye).
+    Returns: {"result_df", "original_df", "bank_type", "messages"} veya hata durumunda None
+    """
+    messages = []
+    
+    # Okuyucu uzantıya değil dosyanın ilk baytlarına göre seçilir (xls uzantılı HTML/CSV dahil).
+    # CSV'nin kodlaması ve ayırıcısı dosya başından tahmin edilir; Excel iki aşamada okunur:
+    # format ve başlık satırı ilk satırlardan belirlenir, dosya sadece gereken sütunlarla okunur
+    try:
+        df, bank_format = read_statement(file, file_name=file_name, content_key=content_key)
+    except Exception as read_error:
+        st.error(f"Dosya açılamadı: {str(read_error)}")
+        return None
+    
+    if bank_format:
+        # Başlık satırı bulunduysa bilgi ver
+        if "header_row" in bank_format:
+            messages.append(("info", f"Başlık satırı dosyanın {bank_format['header_row']+1}. satırında bulundu ve veriler buna göre düzenlendi."))
+        
+        # Banka formatını kullanarak standart formata dönüştür
+        processed_df, bank_type = parse_bank_statement(df, file_name=file_name, bank_format=bank_format)
+        messages.append(("success", f"{bank_format['name']} ekstresi başarıyla tanımlandı ve işlendi."))
+    else:
+        # Format tanımlanamadı, genel bir işleme dene
+        messages.append(("warning", "Tanımlanamayan banka ekstresi formatı. Genel işleme uygulanıyor."))
+        processed_df = process_data(df)
+        bank_type = "unknown"
+    
+    # Convert to target format
+    result_df = convert_to_target_format(processed_df)
+    
+    # Önemli sütunları kontrol et
+    if 'Fiş Tarihi' not in result_df.columns or 'Detay Açıklama' not in result_df.columns or 'Borç' not in result_df.columns or 'Alacak' not in result_df.columns:
+        show_messages(messages)
+        st.error("Hedef format oluşturulurken bir hata oluştu. Gereken tüm sütunlar bulunamadı.")
+        return None
+    
+    # İşlem başarılı mesajı
+    messages.append(("success", f"Toplam {len(result_df)} işlem başarıyla işlendi."))
+    
+    return {"result_df": result_df, "original_df": df, "bank_type": bank_type, "messages": messages}
+
 def process_bank_statement(file):
+    """
+    Yüklenen ekstreyi işle. Streamlit her etkileşimde betiği yeniden çalıştırdığından sonuç,
+    dosya içeriği + dosya adı + banka formatları sürümü anahtarıyla önbelleğe alınır; aynı dosya
+    için sonraki çalıştırmalarda okuma, tespit ve dönüştürme yapılmaz.
+    Returns: (result_df, original_df, bank_type, sonuç anahtarı) veya hata durumunda dört None
+    """
     try:
         # Read the file based on its extension
         file_extension = file.name.split('.')[-1].lower()
         file_name = file.name  # Dosya adını al - banka tipini tespit için kullanacağız
         
-        if file_extension == 'csv':
-            # Try different encodings
-            try:
-                df = pd.read_csv(file)
-            except UnicodeDecodeError:
-                df = pd.read_csv(file, encoding='latin1')
-        elif file_extension in ['xlsx', 'xls']:
-            try:
-                # Önce openpyxl ile deneyelim
-                df = pd.read_excel(file, engine='openpyxl')
-            except Exception as excel_error:
-                try:
-                    # Eğer openpyxl başarısız olursa, xlrd ile deneyelim (eski xls dosyaları için)
-                    if file_extension == 'xls':
-                        df = pd.read_excel(file, engine='xlrd')
-                    else:
-                        # Başka bir yöntem deneyelim - dosyayı bir kez daha okumak
-                        file.seek(0)  # Dosya işaretçisini başa al
-                        df = pd.read_excel(file)
-                except Exception as second_error:
-                    # Hala başarısız olursa, daha detaylı bir hata mesajı göster
-                    st.error(f"Excel dosyası açılamadı: {str(excel_error)}. Alternatif yöntemlerle de denendi: {str(second_error)}")
-                    return None, None, None
-        else:
+        if file_extension not in ['csv', 'xlsx', 'xls']:
             st.error("Desteklenmeyen dosya formatı. Lütfen CSV veya Excel dosyası yükleyin.")
-            return None, None, None
-        
-        # Önce dosya adını kullanarak banka tipini tespit etmeye çalış
-        # Eğer bulunamazsa içerik analizine geç
-        bank_format = None
-        
-        # Dosya adından banka formatını tanımlamaya çalış (yeni eklediğimiz fonksiyon)
-        bank_format = identify_bank_from_filename(file_name)
+            return None, None, None, None
         
-        # Eğer dosya adından tanımlayamazsak, içerik analizine geç
-        if bank_format is None:
-            bank_format = identify_bank_format(df)
+        content = file.getvalue()
+        key = result_key(content, file_name)
+        result = get_cached_result(key)
+        if result is None:
+            # Banka tipi aynı dosya (içerik özeti) veya aynı şema daha önce tanındıysa tespit
+            # önbelleğinden, değilse önce dosya adından, bulunamazsa içerik analiziyle belirlenir
+            result = run_processing_pipeline(file, file_name, content_hash(content))
+            if result is None:
+                return None, None, None, None
+            store_result(key, result)
         
-        if bank_format:
-            # Başlık satırı bulunduysa bilgi ver
-            if "header_row" in bank_format:
-                st.info(f"Başlık satırı dosyanın {bank_format['header_row']+1}. satırında bulundu ve veriler buna göre düzenlendi.")
-            
-            # Banka formatını kullanarak standart formata dönüştür
-            processed_df, bank_type = parse_bank_statement(df, file_name=file_name, bank_format=bank_format)
-            st.success(f"{bank_format['name']} ekstresi başarıyla tanımlandı ve işlendi.")
-        else:
-            # Format tanımlanamadı, genel bir işleme dene
-            st.warning("Tanımlanamayan banka ekstresi formatı. Genel işleme uygulanıyor.")
-            processed_df = process_data(df)
-            bank_type = "unknown"
-        
-        # Convert to target format
-        result_df = convert_to_target_format(processed_df)
-        
-        # Önemli sütunları kontrol et
-        if 'Fiş Tarihi' not in result_df.columns or 'Detay Açıklama' not in result_df.columns or 'Borç' not in result_df.columns or 'Alacak' not in result_df.columns:
-            st.error("Hedef format oluşturulurken bir hata oluştu. Gereken tüm sütunlar bulunamadı.")
-            return None, None, None
-        
-        # İşlem başarılı mesajı
-        st.success(f"Toplam {len(result_df)} işlem başarıyla işlendi.")
-        
-        return result_df, df, bank_type
+        show_messages(result["messages"])
+        return result["result_df"], result["original_df"], result["bank_type"], key
+    
+    except Exception as e:
+        st.error(f"Dosya işlenirken bir hata oluştu: {str(e)}")
+        return None, None, None, None
+
+def is_large_csv(file):
+    """
+    Dosya akış modunda (parça parça) işlenecek kadar büyük bir CSV mi?
+    """
+    return file.name.lower().endswith('.csv') and file.size > STREAMING_THRESHOLD_BYTES
+
+def process_large_csv(file):
+    """
+    Büyük CSV ekstresini parça parça işle; hedef format akış modu önbelleğindeki (STREAM_CACHE_DIR)
+    bir CSV dosyasına yazılır (Excel dosyası sadece istenince oluşturulur, requested_stream_exports).
+    Kayıt sonuç anahtarıyla (result_key) adlandırılır; aynı dosya için sonraki çalıştırmalarda dosya
+    tekrar işlenmez. Önbelleğin boyutu sınırlıdır, eski çıktılar oturumlar kapansa da silinir.
+    Returns: (özet, sonuç anahtarı) veya hata durumunda (None, None)
+    """
+    def convert(output_path):
+        with open(output_path, 'w', encoding=OUTPUT_ENCODING, newline='') as output_file:
+            return stream_convert_csv(file, output_file, file_name=file.name, content_key=content_key)
     
+    try:
+        # Önbellek anahtarları yüklenen baytların kopyası alınmadan hesaplanır
+        with file.getbuffer() as content:
+            content_key = content_hash(content)
+            key = result_key(content, file.name)
+        # Aynı dosya (içerik + ad + banka formatları sürümü) daha önce işlendiyse çıktılar tekrar kullanılır
+        summary = get_cached_stream_result(key)
+        if summary is None:
+            summary = store_stream_result(key, convert)
     except Exception as e:
         st.error(f"Dosya işlenirken bir hata oluştu: {str(e)}")
-        return None, None, None
+        return None, None
+    
+    if summary is None:
+        st.error("Dosyada işlenecek veri bulunamadı.")
+        return None, None
+    
+    if summary["bank_format"]:
+        st.success(f"{summary['bank_format']['name']} ekstresi başarıyla tanımlandı ve işlendi.")
+    else:
+        st.warning("Tanımlanamayan banka ekstresi formatı. Genel işleme uygulanıyor.")
+    st.success(f"Toplam {summary['rows']} işlem {summary['chunks']} parça halinde başarıyla işlendi.")
+    return summary, key
 
 # Ana menü sekmeleri
 tab1, tab2, tab3 = st.tabs(["Yeni Dönüştürme", "Geçmiş Dönüştürmeler", "Admin Paneli"])
 
 with tab1:
+    # Çok büyük CSV dosyaları bellekte tutulmadan parça parça işlenir
+    stream_mode = uploaded_file is not None and is_large_csv(uploaded_file)
+    
+    if stream_mode:
+        with st.spinner('Büyük dosya parça parça işleniyor...'):
+            stream_summary, stream_key = process_large_csv(uploaded_file)
+        
+        if stream_summary is not None:
+            st.header("İşlenmiş Veri Önizleme")
+            st.info(f"Dosya büyük olduğu için akış modunda işlendi. Üst bölümün ilk {STREAM_PREVIEW_ROWS} satırı gösteriliyor.")
+            if stream_summary["preview"] is not None:
+                st.dataframe(format_amount_columns(stream_summary["preview"].drop(columns=['is_separator'])),
+                             use_container_width=True, height=600)
+            st.info("Akış modunda işlenen dosyalar veritabanına kaydedilmez.")
+            
+            st.header("İşlenmiş Veriyi İndir")
+            # Excel dosyası sadece istenince, CSV çıktısından satır satır yazılır
+            stream_exports = requested_stream_exports(stream_summary, "stream", stream_key)
+            
+            if stream_exports:
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.download_button(
+                        label="Excel Olarak İndir",
+                        data=stream_exports['excel'],
+                        file_name="islenmis_banka_ekstresi.xlsx",
+                        mime=EXCEL_MIME
+                    )
+                
+                with col2:
+                    st.download_button(
+                        label="CSV Olarak İndir",
+                        data=stream_exports['csv'],
+                        file_name="islenmis_banka_ekstresi.csv",
+                        mime=CSV_MIME
+                    )
+    
     # Process file when uploaded
-    if uploaded_file is not None:
+    if uploaded_file is not None and not stream_mode:
         with st.spinner('Dosya işleniyor...'):
-            processed_data, original_df, bank_type = process_bank_statement(uploaded_file)
+            processed_data, original_df, bank_type, processed_key = process_bank_statement(uploaded_file)
         
         if processed_data is not None:
             # Display preview of the processed data
@@ -168,24 +268,33 @@ with tab1:
                 
                 return styles
             
+            # Sayısal Borç/Alacak sütunları sadece gösterim için Türk Lirası formatına çevrilir
+            preview_df = format_amount_columns(processed_data)
+            
             # Stil uygulayarak dataframe'i göster
-            styled_df = processed_data.style.apply(highlight_rows, axis=None)
+            styled_df = preview_df.style.apply(highlight_rows, axis=None)
             
             # is_separator sütununu gizlemek yerine işlemeden önce silelim
-            if 'is_separator' in processed_data.columns:
+            if 'is_separator' in preview_df.columns:
                 # Gösterilen veri setinden is_separator sütununu kaldır
-                display_df = processed_data.drop(columns=['is_separator'])
+                display_df = preview_df.drop(columns=['is_separator'])
                 styled_df = display_df.style.apply(highlight_rows, axis=None)
                 
             st.dataframe(styled_df, use_container_width=True, height=600)
             
-            # Veritabanına kaydet (veritabanı varsa)
-            if db_available:
+            # Veritabanına kaydet (veritabanı varsa). Aynı sonuç bu oturumda zaten kaydedildiyse
+            # yeniden çalıştırmalarda tekrar kayıt oluşturulmaz
+            saved_statements = st.session_state.setdefault("saved_statements", {})
+            if db_available and processed_key in saved_statements:
+                statement_id = saved_statements[processed_key]
+            elif db_available:
                 try:
                     statement_id = save_bank_statement(uploaded_file.name, bank_type, original_df, processed_data)
+                    if statement_id is not None:
+                        saved_statements[processed_key] = statement_id
                 except Exception as e:
                     # Hata mesajını logla ama kullanıcıya daha kullanıcı dostu bir mesaj göster
-                    print(f"Veritabanı hatası: {str(e)}")
+                    logger.error("Veritabanı hatası: %s", e)
                     st.warning("Veriler geçici olarak kaydedilemedi, ancak dönüştürme başarıyla tamamlandı.")
                     # Veritabanı olmayabilir, bu durumda hatalara sessizce devam edelim
                     db_available = False  # Daha sonraki işlemleri atla
@@ -197,48 +306,41 @@ with tab1:
             # Download section
             st.header("İşlenmiş Veriyi İndir")
             
-            # Create download buttons for different formats
-            excel_buffer = io.BytesIO()
-            # Excel indirirken sadece is_separator sütununu kaldır
-            download_df = processed_data.drop(columns=['is_separator']) if 'is_separator' in processed_data.columns else processed_data
-            download_df.to_excel(excel_buffer, index=False, engine='openpyxl')
-            excel_buffer.seek(0)
-            
-            csv_buffer = io.BytesIO()
-            # CSV'de sütunların düzgün ayrılması için sep parametresini belirtiyoruz
-            # Sadece is_separator sütununu kaldır
-            download_df.to_csv(csv_buffer, index=False, encoding='utf-8-sig', sep=';')
-            csv_buffer.seek(0)
+            # İndirme dosyaları parça parça yazılır: is_separator sütunu çıkarılır, Borç/Alacak
+            # Türk Lirası formatındadır, Excel'de ayırıcı satır sarı dolguludur. Dosyalar sadece
+            # istendiğinde oluşturulur, aynı sonuç için önbellekten verilir
+            exports = requested_exports(processed_data, "new", result_key=processed_key)
             
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                dl_clicked = st.download_button(
-                    label="Excel Olarak İndir",
-                    data=excel_buffer,
-                    file_name="islenmis_banka_ekstresi.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+            if exports:
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    dl_clicked = st.download_button(
+                        label="Excel Olarak İndir",
+                        data=exports['excel'],
+                        file_name="islenmis_banka_ekstresi.xlsx",
+                        mime=EXCEL_MIME
+                    )
                 
-                if dl_clicked and statement_id:
-                    try:
-                        save_conversion(statement_id, 'excel', {'format': 'xlsx'})
-                    except Exception as e:
-                        st.error(f"Dönüşüm kaydedilirken hata oluştu: {str(e)}")
+                    if dl_clicked and statement_id:
+                        try:
+                            save_conversion(statement_id, 'excel', {'format': 'xlsx'})
+                        except Exception as e:
+                            st.error(f"Dönüşüm kaydedilirken hata oluştu: {str(e)}")
             
-            with col2:
-                dl_clicked = st.download_button(
-                    label="CSV Olarak İndir",
-                    data=csv_buffer,
-                    file_name="islenmis_banka_ekstresi.csv",
-                    mime="text/csv"
-                )
+                with col2:
+                    dl_clicked = st.download_button(
+                        label="CSV Olarak İndir",
+                        data=exports['csv'],
+                        file_name="islenmis_banka_ekstresi.csv",
+                        mime=CSV_MIME
+                    )
                 
-                if dl_clicked and statement_id:
-                    try:
-                        save_conversion(statement_id, 'csv', {'format': 'csv', 'encoding': 'utf-8-sig'})
-                    except Exception as e:
-                        st.error(f"Dönüşüm kaydedilirken hata oluştu: {str(e)}")
+                    if dl_clicked and statement_id:
+                        try:
+                            save_conversion(statement_id, 'csv', {'format': 'csv', 'encoding': 'utf-8-sig'})
+                        except Exception as e:
+                            st.error(f"Dönüşüm kaydedilirken hata oluştu: {str(e)}")
 
 with tab2:
     st.header("Geçmiş İşlemler")
@@ -298,62 +400,57 @@ with tab2:
                                 
                                 return styles
                             
+                            # Sayısal Borç/Alacak sütunları sadece gösterim için Türk Lirası formatına çevrilir
+                            # (eski kayıtlarda bu sütunlar zaten metindir)
+                            preview_df = format_amount_columns(statement_data['processed_df'])
+                            
                             # Stil uygulayarak dataframe'i göster
-                            styled_df = statement_data['processed_df'].style.apply(highlight_rows, axis=None)
+                            styled_df = preview_df.style.apply(highlight_rows, axis=None)
                             
                             # is_separator sütununu gizlemek yerine işlemeden önce silelim
-                            if 'is_separator' in statement_data['processed_df'].columns:
+                            if 'is_separator' in preview_df.columns:
                                 # Gösterilen veri setinden is_separator sütununu kaldır
-                                display_df = statement_data['processed_df'].drop(columns=['is_separator'])
+                                display_df = preview_df.drop(columns=['is_separator'])
                                 styled_df = display_df.style.apply(highlight_rows, axis=None)
                                 
                             st.dataframe(styled_df, use_container_width=True, height=600)
                             
-                            # İndirme seçenekleri
-                            col1, col2 = st.columns(2)
+                            # İndirme seçenekleri: kayıtlar değişmediği için dosyalar kayıt kimliği ve tarihiyle önbelleğe
+                            # alınır, aynı kaydın sonraki indirmelerinde (admin panelindekiler dahil) tekrar yazılmaz
+                            exports = requested_exports(statement_data['processed_df'], "archive", result_key=f"statement:{selected_id}:{statement_data['upload_date']}")
                             
-                            # Create download buttons for different formats
-                            excel_buffer = io.BytesIO()
-                            # Excel indirirken sadece is_separator sütununu kaldır
-                            archive_download_df = statement_data['processed_df'].drop(columns=['is_separator']) if 'is_separator' in statement_data['processed_df'].columns else statement_data['processed_df']
-                            archive_download_df.to_excel(excel_buffer, index=False, engine='openpyxl')
-                            excel_buffer.seek(0)
-                            
-                            csv_buffer = io.BytesIO()
-                            # CSV'de sütunların düzgün ayrılması için sep parametresini belirtiyoruz
-                            # Sadece is_separator sütununu kaldır
-                            archive_download_df.to_csv(csv_buffer, index=False, encoding='utf-8-sig', sep=';')
-                            csv_buffer.seek(0)
-                            
-                            with col1:
-                                dl_clicked = st.download_button(
-                                    label="Excel Olarak İndir",
-                                    data=excel_buffer,
-                                    file_name=f"islenmis_banka_ekstresi_{selected_id}.xlsx",
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                    key="excel_archive"
-                                )
+                            if exports:
+                                col1, col2 = st.columns(2)
+                                
+                                with col1:
+                                    dl_clicked = st.download_button(
+                                        label="Excel Olarak İndir",
+                                        data=exports['excel'],
+                                        file_name=f"islenmis_banka_ekstresi_{selected_id}.xlsx",
+                                        mime=EXCEL_MIME,
+                                        key="excel_archive"
+                                    )
                                 
-                                if dl_clicked:
-                                    try:
-                                        save_conversion(selected_id, 'excel', {'format': 'xlsx', 'archive': True})
-                                    except Exception as e:
-                                        st.error(f"Dönüşüm kaydedilirken hata oluştu: {str(e)}")
+                                    if dl_clicked:
+                                        try:
+                                            save_conversion(selected_id, 'excel', {'format': 'xlsx', 'archive': True})
+                                        except Exception as e:
+                                            st.error(f"Dönüşüm kaydedilirken hata oluştu: {str(e)}")
                             
-                            with col2:
-                                dl_clicked = st.download_button(
-                                    label="CSV Olarak İndir",
-                                    data=csv_buffer,
-                                    file_name=f"islenmis_banka_ekstresi_{selected_id}.csv",
-                                    mime="text/csv",
-                                    key="csv_archive"
-                                )
+                                with col2:
+                                    dl_clicked = st.download_button(
+                                        label="CSV Olarak İndir",
+                                        data=exports['csv'],
+                                        file_name=f"islenmis_banka_ekstresi_{selected_id}.csv",
+                                        mime=CSV_MIME,
+                                        key="csv_archive"
+                                    )
                                 
-                                if dl_clicked:
-                                    try:
-                                        save_conversion(selected_id, 'csv', {'format': 'csv', 'encoding': 'utf-8-sig', 'archive': True})
-                                    except Exception as e:
-                                        st.error(f"Dönüşüm kaydedilirken hata oluştu: {str(e)}")
+                                    if dl_clicked:
+                                        try:
+                                            save_conversion(selected_id, 'csv', {'format': 'csv', 'encoding': 'utf-8-sig', 'archive': True})
+                                        except Exception as e:
+                                            st.error(f"Dönüşüm kaydedilirken hata oluştu: {str(e)}")
                         else:
                             st.error("Kayıt bulunamadı.")
                             
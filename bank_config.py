@@ -1,8 +1,20 @@
+import copy
+import hashlib
+import itertools
 import json
 import os
+import re
+import tempfile
+import threading
+import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import datetime
+import logging
+from utils import parse_amount_series, header_view, materialize_header_view
+from logging_config import get_logger
+
+logger = get_logger("bank_config")
 
 # Banka formatları için veritabanı tablosu oluşturmak yerine, önce dosya tabanlı bir çözüm kullanacağız
 # Daha sonra tam veritabanı entegrasyonu eklenebilir
@@ -82,29 +94,349 @@ def init_config():
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
             json.dump(DEFAULT_BANK_FORMATS, f, ensure_ascii=False, indent=4)
 
+# Bankalara özgü işlem açıklaması terimleri (içerik analizinin 4. aşaması)
+# Format tanımında "fingerprints" alanı varsa onun yerine o kullanılır
+BANK_FINGERPRINTS = {
+    "is_bankasi": ["İŞ BANKASI", "İŞCEP", "MXP", "MAXIPARA", "TRX", "SÖZLEŞME", "YATIRIM", "3D", "KART", "KRD", "KMH"],
+    "garanti": ["GARANTİ", "BBVA", "BNK", "BONUS", "PARAMATIK", "BANKAMATIK", "GİB", "PARA ÇIKIŞI", "PARA GİRİŞİ", "G.BANKASI"],
+    "akbank": ["AKBANK", "AXESS", "AKSİGORTA", "AKODE", "KARTTAN", "AK"],
+    "ziraat": ["ZİRAAT", "ZTK", "ZBK", "TC ZİRAAT", "ZİRAATKART", "BANKKART", "ZB"],
+    # Diğer bankalar için parmak izleri
+}
+
+# Yaygın banka adı alternatifleri (kısaltmalar, yaygın yazım hataları, vb.) - dosya adı analizi için
+# Format tanımında "aliases" alanı varsa onun yerine o kullanılır
+BANK_ALIASES = {
+    "is_bankasi": ["iş", "is bank", "isbank", "turkiye is", "türkiye iş", "isbankası", "işbankası"],
+    "garanti": ["garanti", "gbankasi", "gbbankasi", "garantibbva", "gbbva", "gb", "garantibankasi"],
+    "akbank": ["akbank", "akb", "ak bank", "ak_bank", "akbnk"],
+    "ziraat": ["ziraat", "tc ziraat", "tczbankasi", "türkiye cumhuriyeti ziraat", "ziraatbank", "zrt"],
+    "yapi_kredi": ["yapı kredi", "yapi kredi", "ykb", "yapi_kredi", "yapıkredi", "yapikredi"],
+    "vakifbank": ["vakıfbank", "vakifbank", "vkf", "vakif", "vakıf", "tvakifbank", "türkiye vakıflar", "vakıflar"],
+    "halkbank": ["halkbank", "halk bank", "halk bankası", "thb", "türkiye halk"],
+    "teb": ["teb", "türk ekonomi", "turk ekonomi", "turkiye ekonomi", "türkiye ekonomi"],
+    "finans": ["finansbank", "qnb", "qnb finans", "finansb", "finans bankası", "qnbfinans", "qnbf"],
+    "ing": ["ing", "ing bank", "ing bankası", "ing turkey", "ing türkiye"],
+    "hsbc": ["hsbc", "hsbc bank", "hsbc türkiye", "hsbc turkey"],
+    "denizbank": ["denizbank", "deniz", "dnz", "deniz bank", "dnz bank"],
+    "kuveyt_turk": ["kuveyt türk", "kuveyt turk", "kuveytturk", "ktbank", "kt bank", "kuveyt_turk"],
+    "albaraka": ["albaraka", "albaraka türk", "alb", "alb turk", "albaraka bankası"]
+}
+
+# Bellekteki format kaydı: dosya değişmedikçe JSON tekrar okunmaz ve formatlar tekrar derlenmez
+_registry_lock = threading.Lock()
+_registry = {
+    "stat": None,        # (mtime_ns, size) - hızlı değişiklik kontrolü
+    "hash": None,        # Dosya içeriğinin SHA-256 özeti - mtime değişip içerik aynıysa yeniden derleme yapılmaz
+    "formats": None,     # JSON'dan okunan ham format listesi
+    "compiled": None,    # compile_bank_format çıktıları (dosyadaki sırayla)
+    "scanner": None,     # Tüm formatların parmak izlerinden kurulan tek tarayıcı (build_fingerprint_scanner)
+    "token_matrix": None,  # Başlık ve dosya adı terimlerinin terim x format matrisleri (build_token_matrix)
+}
+
+def compile_bank_format(bank_format):
+    """
+    Tespit aşamalarının her yüklemede tekrar türettiği değerleri bir kez hesapla
+    Dönen sözlükteki "format" alanı ham format tanımıdır ve değiştirilmemelidir
+    """
+    bank_id = bank_format["id"]
+    name = bank_format["name"]
+    return {
+        "format": bank_format,
+        "id": bank_id,
+        "id_lower": bank_id.lower(),
+        "active": bank_format.get("active", True),
+        # İçerik analizi (1. aşama) büyük harfle, dosya adı analizi küçük harfle çalışır
+        "name_upper": name.upper(),
+        "name_upper_parts": [part for part in name.upper().split() if len(part) >= 3],
+        "name_lower": name.lower(),
+        "name_lower_parts": [part for part in name.lower().split() if len(part) >= 3],
+        "header_identifiers": list(bank_format.get("header_identifier", [])),
+        "header_identifiers_lower": [identifier.lower() for identifier in bank_format.get("header_identifier", [])],
+        "aliases": [alias.lower() for alias in bank_format.get("aliases", BANK_ALIASES.get(bank_id.lower(), []))],
+        "fingerprints": [fp.upper() for fp in bank_format.get("fingerprints", BANK_FINGERPRINTS.get(bank_id, [])) if fp],
+    }
+
+def _fingerprint_trie_pattern(fingerprints):
+    """
+    Parmak izlerinden ön ek ağacı (trie) biçiminde bir regex üret
+    Düz bir "A|B|C..." alternasyonunda her konumda tüm parmak izleri tek tek denenir; ağaç biçiminde
+    her karakterde sadece o ön eke uyan dallar denenir. Açgözlü "?" sayesinde her konumda
+    oradan başlayan en uzun parmak izi eşleşir.
+    """
+    trie = {}
+    for fp in fingerprints:
+        node = trie
+        for char in fp:
+            node = node.setdefault(char, {})
+        node[""] = None
+    
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Parmak izi burada bitebilir; daha uzun olanlar önce denenir
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+    
+    return build(trie)
+
+def build_fingerprint_scanner(compiled_formats):
+    """
+    Tüm formatların parmak izlerinden tek bir çoklu desen tarayıcısı kur
+    Desen her konumda oradan başlayan en uzun parmak izini bulur (ileriye bakış ile çakışanlar da dahil);
+    bulunan bir parmak izinin içindeki diğer parmak izleri (örn. "AKBANK" içindeki "AK") kapsama
+    tablosundan eklenir. Böylece bir hücre tek geçişte taranır ve içerdiği tüm parmak izleri bulunur.
+    """
+    bank_ids = [entry["id"] for entry in compiled_formats if entry["fingerprints"]]
+    fingerprints = list(dict.fromkeys(fp for entry in compiled_formats for fp in entry["fingerprints"]))
+    fingerprint_ids = {fp: i for i, fp in enumerate(fingerprints)}
+    
+    # weights[parmak izi, banka]: parmak izinin bankanın listesinde kaç kez geçtiği (eski döngü her birini sayardı)
+    # positions[parmak izi, banka]: bankanın listesindeki ilk sırası (eşleşen parmak izlerinin sıralaması için)
+    weights = np.zeros((len(fingerprints), len(bank_ids)), dtype=np.int64)
+    positions = np.zeros((len(fingerprints), len(bank_ids)), dtype=np.int64)
+    for bank_index, entry in enumerate(entry for entry in compiled_formats if entry["fingerprints"]):
+        for index, fp in reversed(list(enumerate(entry["fingerprints"]))):
+            weights[fingerprint_ids[fp], bank_index] += 1
+            positions[fingerprint_ids[fp], bank_index] = index
+    
+    # Kapsama tablosu (CSR biçiminde): bir parmak izi bulunduğunda içindeki tüm parmak izleri de bulunmuştur
+    contained = [[fingerprint_ids[other] for other in fingerprints if other in fp] for fp in fingerprints]
+    contained_counts = np.array([len(ids) for ids in contained], dtype=np.int64)
+    contained_offsets = np.concatenate(([0], np.cumsum(contained_counts)[:-1])).astype(np.int64) if fingerprints else contained_counts
+    contained_ids = np.array([fp_id for ids in contained for fp_id in ids], dtype=np.int64)
+    
+    return {
+        "pattern": re.compile("(?=(" + _fingerprint_trie_pattern(fingerprints) + "))") if fingerprints else None,
+        "fingerprints": fingerprints,
+        "fingerprint_ids": fingerprint_ids,
+        "bank_ids": bank_ids,
+        "weights": weights,
+        "positions": positions,
+        "contained_counts": contained_counts,
+        "contained_offsets": contained_offsets,
+        "contained_ids": contained_ids,
+    }
+
+def scan_fingerprints(scanner, cells):
+    """
+    Hücreleri tarayıcıdan geçir ve banka bazında parmak izi eşleşmelerini döndür
+    cells: taranacak metinler (büyük harfe çevrilmiş), tarama sırasıyla
+    Returns: {banka id: (eşleşme sayısı, ilk bulunma sırasıyla eşleşen parmak izleri)}
+    Sonuç, her banka için her hücrede her parmak izini ayrı ayrı aramakla aynıdır
+    """
+    pattern = scanner["pattern"]
+    if pattern is None or len(cells) == 0:
+        return {}
+    
+    # Her farklı hücre bir kez taranır; factorize ilk görülme sırasını koruduğu için
+    # eşleşen parmak izlerinin sırası da hücre hücre taramadaki gibi kalır
+    codes, uniques = pd.factorize(pd.Series(cells, dtype=object), use_na_sentinel=False)
+    occurrences = np.bincount(codes, minlength=len(uniques))
+    
+    found = [pattern.findall(cell) for cell in uniques.tolist()]
+    found_counts = np.fromiter(map(len, found), dtype=np.int64, count=len(found))
+    if not found_counts.any():
+        return {}
+    fingerprint_ids = scanner["fingerprint_ids"]
+    found_ids = np.fromiter((fingerprint_ids[fp] for fp in itertools.chain.from_iterable(found)), dtype=np.int64)
+    found_cells = np.repeat(np.arange(len(found), dtype=np.int64), found_counts)
+    
+    # Bulunan her parmak izini kapsadığı parmak izlerine genişlet
+    expand_counts = scanner["contained_counts"][found_ids]
+    expanded_cells = np.repeat(found_cells, expand_counts)
+    starts = np.repeat(scanner["contained_offsets"][found_ids] - np.concatenate(([0], np.cumsum(expand_counts)[:-1])), expand_counts)
+    expanded_ids = scanner["contained_ids"][starts + np.arange(len(starts))]
+    
+    # Aynı hücrede aynı parmak izi bir kez sayılır (eski döngüde "fp in hücre" kontrolü gibi)
+    fingerprint_count = len(scanner["fingerprints"])
+    pair_keys = np.unique(expanded_cells * fingerprint_count + expanded_ids)
+    pair_cells = pair_keys // fingerprint_count
+    pair_ids = pair_keys % fingerprint_count
+    
+    # Parmak izi başına toplam eşleşme (hücre tekrarlarıyla) ve ilk bulunduğu hücre
+    fingerprint_totals = np.bincount(pair_ids, weights=occurrences[pair_cells], minlength=fingerprint_count).astype(np.int64)
+    first_seen = np.full(fingerprint_count, len(found), dtype=np.int64)
+    np.minimum.at(first_seen, pair_ids, pair_cells)
+    
+    weights = scanner["weights"]
+    positions = scanner["positions"]
+    bank_totals = fingerprint_totals @ weights
+    results = {}
+    for bank_index, bank_id in enumerate(scanner["bank_ids"]):
+        if bank_totals[bank_index] == 0:
+            continue
+        matched = np.flatnonzero((fingerprint_totals > 0) & (weights[:, bank_index] > 0))
+        # Önce ilk bulunduğu hücre, aynı hücredekiler bankanın listesindeki sıra
+        order = np.lexsort((positions[matched, bank_index], first_seen[matched]))
+        results[bank_id] = (int(bank_totals[bank_index]), [scanner["fingerprints"][i] for i in matched[order]])
+    return results
+
+def _token_vocabulary(token_lists):
+    """
+    Format başına terim listelerinden tekil terim dizisi ve terim x format sayı matrisi oluştur
+    Aynı terim bir formatta birden fazla geçiyorsa o kadar sayılır. Matris float64 tutulur,
+    böylece çarpımlar her yüklemede tür dönüşümü yapmadan BLAS ile çalışır
+    """
+    tokens = list(dict.fromkeys(token for token_list in token_lists for token in token_list))
+    positions = {token: i for i, token in enumerate(tokens)}
+    weights = np.zeros((len(tokens), len(token_lists)), dtype=np.float64)
+    for column, token_list in enumerate(token_lists):
+        for token in token_list:
+            weights[positions[token], column] += 1
+    return np.array(tokens, dtype=str), weights, positions
+
+def build_token_matrix(compiled_formats):
+    """
+    Sütun (2. aşama) ve dosya adı puanlaması için terim x format matrislerini oluştur
+    Her yüklemede terimler metinde bir kez aranır, format puanları matris çarpımıyla bulunur;
+    böylece format sayısı arttıkça Python döngüsü büyümez
+    """
+    header_tokens, header_weights, _ = _token_vocabulary([entry["header_identifiers_lower"] for entry in compiled_formats])
+    alias_tokens, alias_weights, alias_positions = _token_vocabulary([entry["aliases"] for entry in compiled_formats])
+    part_tokens, part_weights, part_positions = _token_vocabulary([entry["name_lower_parts"] for entry in compiled_formats])
+    return {
+        "formats": compiled_formats,
+        # Aynı id birden fazla formatta varsa tespit sözlüğündeki gibi sonuncusu geçerlidir
+        "columns": {entry["id"]: i for i, entry in enumerate(compiled_formats)},
+        "header_tokens": header_tokens,
+        "header_weights": header_weights,
+        "names": np.array([entry["name_lower"] for entry in compiled_formats], dtype=str),
+        "ids": np.array([entry["id_lower"] for entry in compiled_formats], dtype=str),
+        "alias_tokens": alias_tokens,
+        "alias_padded": np.char.add(np.char.add(" ", alias_tokens), " "),
+        "alias_weights": alias_weights,
+        "alias_positions": alias_positions,
+        "part_tokens": part_tokens,
+        "part_padded": np.char.add(np.char.add(" ", part_tokens), " "),
+        "part_weights": part_weights,
+        "part_positions": part_positions,
+        # Kelime tam geçmiyorsa uzunluğuna göre puan (daha uzun kelimeler daha güvenilir)
+        "part_partial_scores": np.minimum(0.4, 0.1 + np.char.str_len(part_tokens) / 20),
+    }
+
+def _contains(text, tokens):
+    """
+    Her terimin metinde geçip geçmediğini tek bir vektörel adımda döndür
+    """
+    return np.char.find(text, tokens) >= 0
+
+def _load_registry():
+    """
+    Kaydı döndür; dosyanın mtime/boyutu veya içerik özeti değiştiyse yeniden yükle
+    Dosya okunamazsa None döner
+    """
+    with _registry_lock:
+        try:
+            try:
+                file_stat = os.stat(CONFIG_FILE)
+            except FileNotFoundError:
+                init_config()
+                file_stat = os.stat(CONFIG_FILE)
+            stat_key = (file_stat.st_mtime_ns, file_stat.st_size)
+            if _registry["formats"] is not None and _registry["stat"] == stat_key:
+                return _registry
+            
+            with open(CONFIG_FILE, 'rb') as f:
+                content = f.read()
+            content_hash = hashlib.sha256(content).hexdigest()
+            
+            # Dosyaya dokunulmuş ama içerik değişmemişse derlenmiş formatlar korunur
+            if _registry["formats"] is None or _registry["hash"] != content_hash:
+                formats = json.loads(content.decode('utf-8'))
+                _registry["formats"] = formats
+                _registry["compiled"] = [compile_bank_format(f) for f in formats]
+                _registry["scanner"] = build_fingerprint_scanner(_registry["compiled"])
+                _registry["token_matrix"] = build_token_matrix(_registry["compiled"])
+                _registry["hash"] = content_hash
+                logger.debug("Banka formatları yüklendi: %s format", len(formats))
+            _registry["stat"] = stat_key
+            return _registry
+        except Exception as e:
+            logger.error("Banka formatları yüklenemedi: %s", e)
+            st.error(f"Banka formatları yüklenirken hata oluştu: {str(e)}")
+            return None
+
+def get_compiled_bank_formats(active_only=True):
+    """
+    Derlenmiş banka formatlarını döndür (tespit fonksiyonları için, salt okunur)
+    """
+    registry = _load_registry()
+    if registry is None:
+        compiled = [compile_bank_format(f) for f in DEFAULT_BANK_FORMATS]
+    else:
+        compiled = registry["compiled"]
+    if active_only:
+        return [entry for entry in compiled if entry["active"]]
+    return list(compiled)
+
+def get_fingerprint_scanner():
+    """
+    Kayıttaki formatlardan kurulmuş parmak izi tarayıcısını döndür
+    """
+    registry = _load_registry()
+    if registry is None:
+        return build_fingerprint_scanner(get_compiled_bank_formats(active_only=False))
+    return registry["scanner"]
+
+def get_token_matrix():
+    """
+    Kayıttaki formatlardan kurulmuş terim x format matrislerini döndür
+    """
+    registry = _load_registry()
+    if registry is None:
+        return build_token_matrix(get_compiled_bank_formats(active_only=False))
+    return registry["token_matrix"]
+
 def load_bank_formats():
     """
     Banka formatlarını yükle
+    Çağıranlar listeyi değiştirebildiği için kaydın bir kopyası döndürülür
     """
-    init_config()
-    try:
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        st.error(f"Banka formatları yüklenirken hata oluştu: {str(e)}")
-        return DEFAULT_BANK_FORMATS
+    registry = _load_registry()
+    if registry is None:
+        return copy.deepcopy(DEFAULT_BANK_FORMATS)
+    return copy.deepcopy(registry["formats"])
 
 def save_bank_formats(formats):
     """
     Banka formatlarını kaydet
+    Önce aynı dizinde geçici dosyaya yazılır, sonra os.replace ile yer değiştirilir;
+    böylece okuyucular hiçbir zaman yarım yazılmış bir dosya görmez
     """
+    temp_path = None
     try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(formats, f, ensure_ascii=False, indent=4)
+        init_config()
+        content = json.dumps(formats, ensure_ascii=False, indent=4).encode('utf-8')
+        with _registry_lock:
+            with tempfile.NamedTemporaryFile('wb', dir=CONFIG_DIR, prefix=".bank_formats.", suffix=".tmp", delete=False) as f:
+                temp_path = f.name
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, CONFIG_FILE)
+            temp_path = None
+            
+            # Yazılan içerik kayda doğrudan alınır, bir sonraki okuma dosyayı tekrar ayrıştırmaz
+            saved_formats = json.loads(content.decode('utf-8'))
+            file_stat = os.stat(CONFIG_FILE)
+            _registry["formats"] = saved_formats
+            _registry["compiled"] = [compile_bank_format(f) for f in saved_formats]
+            _registry["scanner"] = build_fingerprint_scanner(_registry["compiled"])
+            _registry["token_matrix"] = build_token_matrix(_registry["compiled"])
+            _registry["hash"] = hashlib.sha256(content).hexdigest()
+            _registry["stat"] = (file_stat.st_mtime_ns, file_stat.st_size)
         return True
     except Exception as e:
+        logger.error("Banka formatları kaydedilemedi: %s", e)
         st.error(f"Banka formatları kaydedilirken hata oluştu: {str(e)}")
         return False
+    finally:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
 
 def add_bank_format(format_data):
     """
@@ -170,67 +502,73 @@ def get_bank_format(format_id):
     """
     Belirli bir banka formatını getir
     """
-    formats = load_bank_formats()
-    
-    for format in formats:
-        if format["id"] == format_id:
-            return format
+    for entry in get_compiled_bank_formats(active_only=False):
+        if entry["id"] == format_id:
+            return copy.deepcopy(entry["format"])
     
     return None
 
-def find_header_row(df, header_identifiers):
+# Başlık satırının aranacağı ilk satır sayısı
+HEADER_SEARCH_ROWS = 20
+
+# Bir formatın kabul edilmesi için gereken en düşük toplam puan
+MIN_DETECTION_SCORE = 2.0
+
+# Parmak izi taramasında (4. aşama) en fazla bakılacak satır sayısı; büyük dosyalarda
+# satırlar dosya boyunca eşit aralıklarla seçilir
+FINGERPRINT_SAMPLE_ROWS = 1000
+
+# Tarih formatı kontrolünde (5. aşama) bankalar için beklenen ayırıcılar
+DATE_PATTERNS = {
+    "is_bankasi": ["/", "."],  # İş Bankası genelde DD.MM.YYYY kullanır
+    "garanti": ["/", "."],     # Garanti de DD.MM.YYYY kullanır
+    "akbank": ["/", "."],      # Akbank da genelde noktayla ayırır
+    "ziraat": ["/", "."],      # Ziraat de benzer
+    # Diğer bankalar...
+}
+
+# Başlık indeksinde hücreleri ayıran karakter; tanımlayıcıların iki hücreye taşarak eşleşmesini önler
+_HEADER_CELL_SEPARATOR = "\x00"
+
+def build_header_index(df):
+    """
+    İlk HEADER_SEARCH_ROWS satırın küçük harfli metin indeksini oluştur
+    Her satır, hücreleri ayırıcıyla birleştirilmiş tek bir metindir. Bir yüklemede bir kez kurulur ve
+    tüm formatların başlık tanımlayıcıları bu indekse karşı kontrol edilir.
+    """
+    # Sadece bakılacak satırlar string formatına çevrilir (tüm DataFrame değil)
+    str_rows = df.head(HEADER_SEARCH_ROWS).astype(str).values.tolist()
+    return [_HEADER_CELL_SEPARATOR.join(val.lower() for val in row) for row in str_rows]
+
+def find_header_row(df, header_identifiers, header_index=None):
     """
     Banka ekstresindeki başlık satırını bul
     Başlık satırını bulamadıysa -1 döndürür
+    header_index verilirse (build_header_index) DataFrame tekrar metne çevrilmez
     """
-    # DataFrame'i string formatına çevir
-    str_df = df.astype(str)
+    if header_index is None:
+        header_index = build_header_index(df)
+    identifiers = [identifier.lower() for identifier in header_identifiers]
     
-    # Her bir satır için kontrol et
-    for i in range(min(20, len(df))):  # İlk 20 satıra bak (varsa)
-        row_values = [val.lower() for val in str_df.iloc[i].values if not pd.isna(val)]
-        # Tüm tanımlayıcıların satırda olup olmadığını kontrol et
-        if all(any(identifier.lower() in val for val in row_values) for identifier in header_identifiers):
+    # Her bir satır için kontrol et (ilk 20 satır, varsa)
+    for i, row_text in enumerate(header_index):
+        # Tüm tanımlayıcıların satırdaki hücrelerden birinde geçip geçmediğini kontrol et
+        if all(identifier in row_text for identifier in identifiers):
             return i
     
     return -1
 
-def identify_bank_format(df):
+def _score_title_rows(df, bank_scores, context):
     """
-    DataFrame'den banka formatını tanımla ve gerekirse başlık satırını belirle
-    Ultra gelişmiş çok katmanlı analiz sistemi kullanarak banka tipini tanımlar
+    1. AŞAMA: DOSYA İÇERİĞİNDEKİ LOGO METNİNİ / BÜYÜK BAŞLIKLARI ARA
+    Çoğu banka ekstrelerinin üstünde banka adı büyük harflerle yazılıdır
     """
-    formats = load_bank_formats()
-    active_formats = [f for f in formats if f.get("active", True)]
-    
-    # DataFrame'in geçerli olup olmadığını kontrol et
-    if df is None or len(df) == 0 or len(df.columns) == 0:
-        print("HATA: Analiz için geçerli bir DataFrame yok!")
-        return None
-    
-    print(f"Banka formatı analizi başlatıldı. DataFrame boyutu: {df.shape}")
-    print(f"DataFrame sütunları: {df.columns.tolist()}")
-    
-    # Tüm formatlara puan verebilmek için detaylı analiz sistemi
-    bank_scores = {f["id"]: {
-        "format": f,
-        "total_score": 0,
-        "detection_methods": [],
-        "header_row": -1,
-        "processed_df": None
-    } for f in active_formats}
-    
-    # ====================== İÇERİK ANALİZİ BÖLÜMÜ ======================
-    
-    # 1. AŞAMA: DOSYA İÇERİĞİNDEKİ LOGO METNİNİ / BÜYÜK BAŞLIKLARI ARA
-    # Çoğu banka ekstrelerinin üstünde banka adı büyük harflerle yazılıdır
     for i in range(min(10, len(df))):  # İlk 10 satıra bak
         row_content = " ".join([str(val).upper() for val in df.iloc[i].values if not pd.isna(val)])
         
         # Her banka için kontrol et
         for bank_id, bank_data in bank_scores.items():
-            bank_format = bank_data["format"]
-            bank_name = bank_format["name"].upper()
+            bank_name = bank_data["compiled"]["name_upper"]
             
             # Tam banka adı kontrolü
             if bank_name in row_content:
@@ -238,30 +576,37 @@ def identify_bank_format(df):
                 bank_data["total_score"] += 10.0
                 bank_data["detection_methods"].append(f"Dosya içeriğinde tam banka adı '{bank_name}' bulundu (+10.0)")
             
-            # Banka adının parçaları kontrolü
-            bank_name_parts = bank_name.split()
-            for part in bank_name_parts:
-                if len(part) >= 3 and part in row_content:  # Anlamlı kelimeler (3+ harf)
+            # Banka adının parçaları kontrolü (sadece anlamlı kelimeler, 3+ harf)
+            for part in bank_data["compiled"]["name_upper_parts"]:
+                if part in row_content:
                     bank_data["total_score"] += 3.0
                     bank_data["detection_methods"].append(f"Dosya içeriğinde banka adı parçası '{part}' bulundu (+3.0)")
-    
-    # 2. AŞAMA: BAŞLIK SATIRI VE SÜTUN ANALİZİ
-    # Sütun başlıklarını kontrol et - bu önemli bir göstergedir
-    
+
+def _score_columns(df, bank_scores, context):
+    """
+    2. AŞAMA: BAŞLIK SATIRI VE SÜTUN ANALİZİ
+    Sütun başlıklarını kontrol et - bu önemli bir göstergedir
+    """
     # Tüm sütun isimlerini küçük harfe çevir
     df_columns = [str(col).lower() for col in df.columns]
     
+    # Her tekil tanımlayıcı sütunlarda bir kez aranır; format başına sayılar matris çarpımıyla bulunur
+    # Kısmi eşleşme için sütunlar ayırıcıyla birleştirilir, tanımlayıcı iki sütuna taşarak eşleşemez
+    matrix = get_token_matrix()
+    header_tokens = matrix["header_tokens"]
+    exact_counts = np.isin(header_tokens, df_columns).astype(np.float64) @ matrix["header_weights"]
+    partial_counts = _contains(_HEADER_CELL_SEPARATOR.join(df_columns), header_tokens).astype(np.float64) @ matrix["header_weights"]
+    
     for bank_id, bank_data in bank_scores.items():
-        bank_format = bank_data["format"]
-        header_identifiers = bank_format.get("header_identifier", [])
-        
-        if not header_identifiers:
+        if not bank_data["compiled"]["header_identifiers_lower"]:
             continue
         
-        # Sütun başlıkları eşleşme kontrolü
-        exact_matches = sum(1 for identifier in header_identifiers if identifier.lower() in df_columns)
-        partial_matches = sum(1 for identifier in header_identifiers 
-                             if any(identifier.lower() in col for col in df_columns))
+        # Sütun başlıkları eşleşme sayıları
+        column = matrix["columns"].get(bank_id)
+        if column is None:
+            continue
+        exact_matches = int(exact_counts[column])
+        partial_matches = int(partial_counts[column])
         
         # Skor hesapla
         if exact_matches > 0:
@@ -273,94 +618,115 @@ def identify_bank_format(df):
             partial_score = partial_matches * 0.5  # Her kısmi eşleşme 0.5 puan
             bank_data["total_score"] += partial_score
             bank_data["detection_methods"].append(f"{partial_matches} sütun başlığı kısmen eşleşti (+{partial_score:.1f})")
-    
-    # 3. AŞAMA: BAŞLIK SATIRI BULMA VE İŞLEME
-    # Her banka formatı için başlık satırını bulmaya çalış
+
+def _shared_header_view(df, header_row, context):
+    """
+    Başlık satırı görünümünü dosya başına bir kez oluştur ve aşamalar arasında paylaş
+    """
+    views = context["header_views"]
+    if header_row not in views:
+        views[header_row] = header_view(df, header_row)
+    return views[header_row]
+
+def _score_header_rows(df, bank_scores, context):
+    """
+    3. AŞAMA: BAŞLIK SATIRI BULMA VE İŞLEME
+    Her banka formatı için başlık satırını bulmaya çalış
+    """
     for bank_id, bank_data in bank_scores.items():
-        bank_format = bank_data["format"]
-        header_identifiers = bank_format.get("header_identifier", [])
+        header_identifiers = bank_data["compiled"]["header_identifiers_lower"]
         
         if not header_identifiers:
             continue
         
-        # Başlık satırını bul
-        header_row = find_header_row(df, header_identifiers)
+        # Başlık satırını bul (tüm formatlar aynı başlık indeksini kullanır)
+        header_row = find_header_row(df, header_identifiers, context["header_index"])
         
         if header_row >= 0:
             # Başlık satırı bulundu!
             bank_data["header_row"] = header_row
             
-            # İşlenmiş DataFrame'i oluştur
-            new_headers = df.iloc[header_row]
-            new_df = df.iloc[header_row+1:].reset_index(drop=True)
-            new_df.columns = new_headers
-            bank_data["processed_df"] = new_df
+            # Başlık satırına göre görünüm (kopyasız); aynı satırı bulan formatlar aynı görünümü paylaşır
+            bank_data["header_view"] = _shared_header_view(df, header_row, context)
             
             # Başlık satırı tespiti büyük puan kazandırır
             bank_data["total_score"] += 8.0
             bank_data["detection_methods"].append(f"Başlık satırı bulundu (satır: {header_row+1}) (+8.0)")
-    
-    # 4. AŞAMA: BANKA ÖZEL İŞLEMLERİNİ VE SÖZDİZİMİNİ TANI
-    # Her bankanın kendine özel işlem açıklamaları ve kodları vardır
-    
-    # Bankalar için karakteristik terimler ve ifade kalıpları
-    bank_fingerprints = {
-        "is_bankasi": ["İŞ BANKASI", "İŞCEP", "MXP", "MAXIPARA", "TRX", "SÖZLEŞME", "YATIRIM", "3D", "KART", "KRD", "KMH"],
-        "garanti": ["GARANTİ", "BBVA", "BNK", "BONUS", "PARAMATIK", "BANKAMATIK", "GİB", "PARA ÇIKIŞI", "PARA GİRİŞİ", "G.BANKASI"],
-        "akbank": ["AKBANK", "AXESS", "AKSİGORTA", "AKODE", "KARTTAN", "AK"],
-        "ziraat": ["ZİRAAT", "ZTK", "ZBK", "TC ZİRAAT", "ZİRAATKART", "BANKKART", "ZB"],
-        # Diğer bankalar için parmak izleri
-    }
-    
-    # İşlem açıklamalarını kontrol et
+
+def _sample_rows(target_df, sample_rows):
+    """
+    Büyük DataFrame'lerden dosya boyunca eşit aralıklı en fazla sample_rows satır seç
+    """
+    if len(target_df) <= sample_rows:
+        return target_df
+    positions = np.unique(np.linspace(0, len(target_df) - 1, sample_rows).astype(np.int64))
+    return target_df.iloc[positions]
+
+def _score_fingerprints(df, bank_scores, context):
+    """
+    4. AŞAMA: BANKA ÖZEL İŞLEMLERİNİ VE SÖZDİZİMİNİ TANI
+    Her bankanın kendine özel işlem açıklamaları ve kodları vardır.
+    Aynı DataFrame'i (başlık satırı aynı olan bankalar) kullanan bankalar birlikte puanlanır;
+    her açıklama hücresi tüm bankaların parmak izlerini içeren tek bir tarayıcıdan bir kez geçer
+    """
+    scanner = get_fingerprint_scanner()
+    banks_by_target = {}
     for bank_id, bank_data in bank_scores.items():
-        # Bu banka için parmak izi var mı?
-        if bank_id in bank_fingerprints:
-            fingerprints = bank_fingerprints[bank_id]
-            
-            # Eğer işlenmiş DataFrame varsa önce onu kullan
-            target_df = bank_data["processed_df"] if bank_data["processed_df"] is not None else df
-            
-            # Açıklama sütunlarında ara
-            desc_columns = []
-            
-            # Potansiyel açıklama sütunlarını belirle
-            for col in target_df.columns:
-                col_str = str(col).lower()
-                if "açıklama" in col_str or "aciklama" in col_str or "description" in col_str:
-                    desc_columns.append(col)
-            
-            # Eğer açıklama sütunu yoksa, tüm string sütunlarını kontrol et
-            if not desc_columns:
-                desc_columns = target_df.select_dtypes(include=['object']).columns
-            
-            # Her açıklama sütununda parmak izlerini ara
-            fingerprint_matches = 0
-            matched_fp = []
-            
-            for col in desc_columns:
-                for val in target_df[col].astype(str):
-                    val_upper = val.upper()
-                    for fp in fingerprints:
-                        if fp in val_upper:
-                            fingerprint_matches += 1
-                            if fp not in matched_fp:
-                                matched_fp.append(fp)
-            
-            # Skor hesapla - farklı parmak izleri daha önemli
-            if fingerprint_matches > 0:
-                unique_fps = len(matched_fp)
-                fp_score = unique_fps * 2.0 + min(3.0, (fingerprint_matches - unique_fps) * 0.1)
-                bank_data["total_score"] += fp_score
-                bank_data["detection_methods"].append(f"Banka parmak izleri: '{', '.join(matched_fp)}' ({fingerprint_matches} kez) (+{fp_score:.1f})")
-    
-    # 5. AŞAMA: HEM DOSYA İÇERİĞİNİ HEM ÇIKTI BİÇİMİNİ KONTROL ET
-    # Tarihlerin formatı, para birimleri, sayı formatları, vb.
+        # Bu banka için parmak izi var mı? (BANK_FINGERPRINTS veya formatın kendi tanımı)
+        if bank_data["compiled"]["fingerprints"]:
+            banks_by_target.setdefault(bank_data["header_row"], []).append(bank_id)
     
-    # Tarih formatı kontrolü
+    for header_row, bank_ids in banks_by_target.items():
+        # Başlık satırı bulunduysa önce onun görünümünü kullan
+        view = bank_scores[bank_ids[0]]["header_view"]
+        target_df = _sample_rows(view if view is not None else df, context["sample_rows"])
+        detection = context["detection"]
+        detection["sampled_rows"] = max(detection["sampled_rows"], len(target_df))
+        
+        # Açıklama sütunlarında ara
+        desc_columns = []
+        
+        # Potansiyel açıklama sütunlarını belirle
+        for col in target_df.columns:
+            col_str = str(col).lower()
+            if "açıklama" in col_str or "aciklama" in col_str or "description" in col_str:
+                desc_columns.append(col)
+        
+        # Eğer açıklama sütunu yoksa, tüm string sütunlarını kontrol et
+        if not desc_columns:
+            desc_columns = target_df.select_dtypes(include=['object']).columns
+        
+        # Sütunlar sırayla tek bir hücre dizisinde birleştirilir
+        cells = []
+        for col in desc_columns:
+            values = target_df[col]
+            # Aynı isimde birden fazla sütun varsa eski döngü sütun adlarını gezerdi; aynısı korunur
+            if isinstance(values, pd.DataFrame):
+                cells.extend(str(label).upper() for label in values.columns)
+            else:
+                cells.extend(values.astype(str).str.upper().tolist())
+        
+        fingerprint_results = scan_fingerprints(scanner, cells)
+        
+        for bank_id in bank_ids:
+            if bank_id not in fingerprint_results:
+                continue
+            fingerprint_matches, matched_fp = fingerprint_results[bank_id]
+            # Skor hesapla - farklı parmak izleri daha önemli
+            unique_fps = len(matched_fp)
+            fp_score = unique_fps * 2.0 + min(3.0, (fingerprint_matches - unique_fps) * 0.1)
+            bank_data = bank_scores[bank_id]
+            bank_data["total_score"] += fp_score
+            bank_data["detection_methods"].append(f"Banka parmak izleri: '{', '.join(matched_fp)}' ({fingerprint_matches} kez) (+{fp_score:.1f})")
+
+def _score_date_formats(df, bank_scores, context):
+    """
+    5. AŞAMA: HEM DOSYA İÇERİĞİNİ HEM ÇIKTI BİÇİMİNİ KONTROL ET
+    Tarihlerin formatı, para birimleri, sayı formatları, vb.
+    """
     for bank_id, bank_data in bank_scores.items():
-        # İşlenmiş DataFrame varsa kullan
-        target_df = bank_data["processed_df"] if bank_data["processed_df"] is not None else df
+        # Başlık satırı görünümü varsa kullan
+        target_df = bank_data["header_view"] if bank_data["header_view"] is not None else df
         
         # Tarih sütunlarını tanımlamaya çalış
         date_cols = []
@@ -369,220 +735,338 @@ def identify_bank_format(df):
             if "tarih" in col_str or "date" in col_str or "trh" in col_str:
                 date_cols.append(col)
         
-        # Eğer tarih sütunu bulunduysa, formata bak
-        if date_cols:
-            date_patterns = {
-                "is_bankasi": ["/", "."],  # İş Bankası genelde DD.MM.YYYY kullanır
-                "garanti": ["/", "."],     # Garanti de DD.MM.YYYY kullanır
-                "akbank": ["/", "."],      # Akbank da genelde noktayla ayırır
-                "ziraat": ["/", "."],      # Ziraat de benzer
-                # Diğer bankalar...
-            }
+        # Eğer tarih sütunu bulunduysa ve banka için tarih desenleri varsa, formata bak
+        if date_cols and bank_id in DATE_PATTERNS:
+            bank_patterns = DATE_PATTERNS[bank_id]
+            pattern_matches = 0
             
-            # Banka için tarih desenleri varsa
-            if bank_id in date_patterns:
-                bank_patterns = date_patterns[bank_id]
-                pattern_matches = 0
+            # Her tarih sütununda ilk 10 veriyi kontrol et (sadece bu satırlar metne çevrilir)
+            for col in date_cols:
+                sample_size = min(10, len(target_df))
+                samples = target_df[col].head(sample_size).astype(str)
                 
-                # Her tarih sütununda ilk 10 veriyi kontrol et
-                for col in date_cols:
-                    sample_size = min(10, len(target_df))
-                    samples = target_df[col].astype(str).head(sample_size)
-                    
-                    for sample in samples:
-                        for pattern in bank_patterns:
-                            if pattern in sample:
-                                pattern_matches += 1
-                                break
-                
-                # Tarih formatı puanı
-                if pattern_matches > 0:
-                    date_score = min(3.0, pattern_matches * 0.3)
-                    bank_data["total_score"] += date_score
-                    bank_data["detection_methods"].append(f"Tarih formatı kontrolü: {pattern_matches} eşleşme (+{date_score:.1f})")
-    
-    # ================= SONUÇLARI DEĞERLENDİR ===================
-    
-    # Skorları göster (debugging için)
+                for sample in samples:
+                    for pattern in bank_patterns:
+                        if pattern in sample:
+                            pattern_matches += 1
+                            break
+            
+            # Tarih formatı puanı
+            if pattern_matches > 0:
+                date_score = min(3.0, pattern_matches * 0.3)
+                bank_data["total_score"] += date_score
+                bank_data["detection_methods"].append(f"Tarih formatı kontrolü: {pattern_matches} eşleşme (+{date_score:.1f})")
+
+def _max_header_score(bank_id, bank_data):
+    return 8.0 if bank_data["compiled"]["header_identifiers_lower"] else 0.0
+
+def _max_date_score(bank_id, bank_data):
+    return 3.0 if bank_id in DATE_PATTERNS else 0.0
+
+def _max_fingerprint_score(bank_id, bank_data):
+    # Her farklı parmak izi 2 puan, tekrarlar en fazla 3 puan
+    fingerprints = bank_data["compiled"]["fingerprints"]
+    return len(set(fingerprints)) * 2.0 + 3.0 if fingerprints else 0.0
+
+# Aşamalar maliyet sırasıyla çalışır: ilk dördü sadece ilk satırlara ve sütun adlarına bakar,
+# parmak izi taraması (4. aşama) en sona bırakılır.
+# (numara, puanlama, sonrasında erken çıkış mümkün mü, bir bankaya ekleyebileceği en yüksek puan)
+# Başlık satırı (3. aşama) sonuç için gerekli olduğundan erken çıkış ancak ondan sonra mümkündür
+DETECTION_STAGES = [
+    (1, _score_title_rows, False, None),
+    (2, _score_columns, False, None),
+    (3, _score_header_rows, True, _max_header_score),
+    (5, _score_date_formats, True, _max_date_score),
+    (4, _score_fingerprints, False, _max_fingerprint_score),
+]
+
+def _decided_early(bank_scores, best_bank_id, best_score, remaining_stages):
+    """
+    Kalan aşamalar diğer formatlara en yüksek puanlarını verse bile öndeki format geçilemiyor mu?
+    (Eşitlikte sıradaki ilk format kazandığı için kesin üstünlük aranır)
+    """
     for bank_id, bank_data in bank_scores.items():
-        print(f"BANKA SKORU: {bank_data['format']['name']} - Toplam: {bank_data['total_score']:.2f}")
-        for method in bank_data["detection_methods"]:
-            print(f"  - {method}")
-    
-    # En yüksek puanlı bankayı bul
+        if bank_id == best_bank_id:
+            continue
+        reachable = bank_data["total_score"] + sum(max_score(bank_id, bank_data) for _, _, _, max_score in remaining_stages)
+        if reachable >= best_score:
+            return False
+    return True
+
+def _leading_scores(bank_scores):
+    """
+    En yüksek puanlı bankayı, puanını ve ikinci en yüksek puanı döndür
+    Eşitlikte ilk banka önde kabul edilir
+    """
     best_bank_id = None
     best_score = 0
+    runner_up_score = 0
     
     for bank_id, bank_data in bank_scores.items():
         if bank_data["total_score"] > best_score:
+            runner_up_score = best_score
             best_score = bank_data["total_score"]
             best_bank_id = bank_id
+        elif bank_data["total_score"] > runner_up_score:
+            runner_up_score = bank_data["total_score"]
+    
+    return best_bank_id, best_score, runner_up_score
+
+def identify_bank_format(df, early_exit=True, sample_rows=None):
+    """
+    DataFrame'den banka formatını tanımla ve gerekirse başlık satırını belirle
+    Ultra gelişmiş çok katmanlı analiz sistemi kullanarak banka tipini tanımlar
+    
+    Ucuz aşamalar önce çalışır; kalan aşamalar diğer formatlara alabilecekleri en yüksek puanı
+    verse bile öndeki format geçilemiyorsa bu aşamalar atlanır (early_exit=False ile tüm aşamalar
+    çalışır). Parmak izi taraması en fazla sample_rows satıra bakar.
+    Hangi aşamaların çalıştığı sonucun "detection" alanına yazılır.
+    """
+    if sample_rows is None:
+        sample_rows = FINGERPRINT_SAMPLE_ROWS
+    
+    compiled_formats = get_compiled_bank_formats()
+    
+    # DataFrame'in geçerli olup olmadığını kontrol et
+    if df is None or len(df) == 0 or len(df.columns) == 0:
+        logger.warning("Analiz için geçerli bir DataFrame yok!")
+        return None
+    
+    logger.debug("Banka formatı analizi başlatıldı. DataFrame boyutu: %s", df.shape)
+    logger.debug("DataFrame sütunları: %s", df.columns.tolist())
+    
+    # Tüm formatlara puan verebilmek için detaylı analiz sistemi
+    bank_scores = {entry["id"]: {
+        "format": entry["format"],
+        "compiled": entry,
+        "total_score": 0,
+        "detection_methods": [],
+        "header_row": -1,
+        "header_view": None
+    } for entry in compiled_formats}
+    
+    # Karar kaydı: çalışan aşamalar, erken çıkış ve örneklenen satır sayısı
+    detection = {"stages": [], "early_exit": False, "rows": len(df), "sampled_rows": 0}
+    
+    # Aşamaların paylaştığı veriler: ilk satırların başlık indeksi yükleme başına bir kez kurulur
+    # Başlık satırı görünümleri de satır başına bir kez oluşturulur; sadece kazanan format kopyalanır
+    context = {"header_index": build_header_index(df), "header_views": {}, "sample_rows": sample_rows,
+               "detection": detection}
+    
+    # ====================== İÇERİK ANALİZİ BÖLÜMÜ ======================
+    for stage_index, (stage_number, score_stage, can_exit, _) in enumerate(DETECTION_STAGES):
+        score_stage(df, bank_scores, context)
+        detection["stages"].append(stage_number)
+        
+        # Kalan aşamalar sonucu değiştiremiyorsa çalıştırılmaz
+        best_bank_id, best_score, runner_up_score = _leading_scores(bank_scores)
+        if (early_exit and can_exit and best_score >= MIN_DETECTION_SCORE
+                and _decided_early(bank_scores, best_bank_id, best_score, DETECTION_STAGES[stage_index + 1:])):
+            detection["early_exit"] = True
+            break
+    
+    # ================= SONUÇLARI DEĞERLENDİR ===================
+    
+    # Skorları göster (debugging için)
+    if logger.isEnabledFor(logging.DEBUG):
+        for bank_id, bank_data in bank_scores.items():
+            logger.debug("BANKA SKORU: %s - Toplam: %.2f", bank_data['format']['name'], bank_data['total_score'],
+                         extra={"bank_id": bank_id, "score": round(bank_data['total_score'], 2)})
+            for method in bank_data["detection_methods"]:
+                logger.debug("  - %s", method)
+    
+    # En yüksek puanlı bankayı bul
+    best_bank_id, best_score, runner_up_score = _leading_scores(bank_scores)
+    detection["score"] = round(best_score, 2)
+    detection["margin"] = round(best_score - runner_up_score, 2)
     
     # Puanı yeterince yüksek bankanın formatını döndür
-    if best_bank_id and best_score >= 2.0:  # En az 2 puan olmalı
+    if best_bank_id and best_score >= MIN_DETECTION_SCORE:  # En az 2 puan olmalı
         best_bank = bank_scores[best_bank_id]
         result = best_bank["format"].copy()
         
         # Başlık satırı ve işlenmiş DataFrame bilgisini ekle
         if best_bank["header_row"] != -1:
             result["header_row"] = best_bank["header_row"]
-        if best_bank["processed_df"] is not None:
-            result["processed_df"] = best_bank["processed_df"]
+        if best_bank["header_view"] is not None:
+            result["processed_df"] = materialize_header_view(best_bank["header_view"])
+        result["detection"] = detection
         
-        print(f"Ultra Gelişmiş Analiz: Banka formatı tanımlandı: {result['name']} (Skor: {best_score:.2f})")
+        logger.info("Ultra Gelişmiş Analiz: Banka formatı tanımlandı: %s (Skor: %.2f)", result['name'], best_score,
+                    extra={"bank_id": best_bank_id, "stages": detection["stages"], "early_exit": detection["early_exit"],
+                           "margin": detection["margin"], "sampled_rows": detection["sampled_rows"]})
         return result
     
     # Hiçbir format için yeterli skor bulunamadıysa, başlık satırı kontrolünü tekrar yap
     # Her format için başlık satırı kontrolü (son bir şans)
-    for format in active_formats:
-        header_identifiers = format.get("header_identifier", [])
+    for entry in compiled_formats:
+        format = entry["format"]
+        header_identifiers = entry["header_identifiers_lower"]
         if not header_identifiers:
             continue
         
-        header_row = find_header_row(df, header_identifiers)
+        header_row = find_header_row(df, header_identifiers, context["header_index"])
         if header_row >= 0:
             # Başlık satırı bulundu, yeni bir DataFrame oluştur
-            new_headers = df.iloc[header_row]
-            new_df = df.iloc[header_row+1:].reset_index(drop=True)
-            new_df.columns = new_headers
+            new_df = materialize_header_view(_shared_header_view(df, header_row, context))
             
             # Format bilgisiyle birlikte döndür
             format_with_header = format.copy()
             format_with_header["header_row"] = header_row
             format_with_header["processed_df"] = new_df
-            print(f"Son Şans Kontrolü: Banka formatı başlık analizinden sonra tanımlandı: {format['name']}")
+            format_with_header["detection"] = detection
+            logger.info("Son Şans Kontrolü: Banka formatı başlık analizinden sonra tanımlandı: %s", format['name'])
             return format_with_header
     
     # Hiçbir format eşleşmedi
-    print("Ultra Gelişmiş Analiz: Banka formatı tanımlanamadı")
+    logger.info("Ultra Gelişmiş Analiz: Banka formatı tanımlanamadı",
+                extra={"stages": detection["stages"], "sampled_rows": detection["sampled_rows"]})
     return None
 
-def standardize_dataframe(df, bank_format):
+def find_standard_header_row(df):
     """
-    DataFrame'i standart formata dönüştür
+    Standardizasyonun başlık satırı araması: ilk 20 satırda Tarih, Açıklama ve Tutar/Borç/Alacak
+    terimlerini birlikte içeren ilk satır. Bulunamazsa -1 döndürür
     """
-    print(f"Standardizasyon başlıyor. DataFrame boyutu: {df.shape}")
-    print(f"DataFrame sütunları: {list(df.columns)}")
-    print(f"Banka format bilgisi: {bank_format.get('name')}")
-    
-    # Gelen verileri analiz et
-    print("İlk 5 satırın içeriği:")
-    for i in range(min(5, len(df))):
-        row = df.iloc[i]
-        print(f"  Satır {i}: {list(row.values)[:5]}...")  # İlk 5 değeri göster
-    
-    standardized_df = pd.DataFrame()
-    
-    # Başlık satırı var mı diye kontrol et
-    print("Başlık satırı aranıyor...")
-    header_row = -1
-    
-    # Olası başlık satırlarını belirle
     for i in range(min(20, len(df))):
         row_str = ' '.join([str(val).lower() for val in df.iloc[i].values if not pd.isna(val)])
         # Tarih, Açıklama, Tutar gibi başlık terimleri var mı diye kontrol et
         if ('tarih' in row_str and 'açıklama' in row_str and ('tutar' in row_str or 'borç' in row_str or 'alacak' in row_str)):
-            header_row = i
-            print(f"Potansiyel başlık satırı bulundu, satır {i}: {row_str[:100]}...")
-            break
-    
-    # Başlık satırı bulunduysa, veriyi yeniden düzenle
-    if header_row >= 0:
-        print(f"Başlık satırı {header_row} kullanılarak veri yeniden düzenleniyor")
-        headers = df.iloc[header_row]
-        data = df.iloc[header_row+1:].reset_index(drop=True)
-        data.columns = headers
-        df = data
-        print(f"Yeni sütun başlıkları: {list(df.columns)}")
-    
-    # Sütun isimleri analizi ve eşleştirme
-    date_col = None
-    desc_col = None
-    amount_col = None
-    debit_col = None
-    credit_col = None
-    balance_col = None
-    
-    for col in df.columns:
+            logger.debug("Potansiyel başlık satırı bulundu, satır %s: %s...", i, row_str[:100])
+            return i
+    return -1
+
+def match_standard_columns(columns):
+    """
+    Standardizasyonun sütun eşleştirmesi: sütun adlarındaki Tarih, Açıklama, Tutar, Borç, Alacak ve
+    Bakiye terimlerine göre her rol için eşleşen son sütun (eşleşme yoksa None)
+    """
+    matched = dict.fromkeys(["date_col", "description_col", "amount_col", "debit_col", "credit_col", "balance_col"])
+    for col in columns:
         col_lower = str(col).lower()
         # Tarih sütununu bul
         if 'tarih' in col_lower or 'date' in col_lower:
-            date_col = col
-            print(f"Tarih sütunu tespit edildi: {col}")
+            matched["date_col"] = col
+            logger.debug("Tarih sütunu tespit edildi: %s", col)
         # Açıklama sütununu bul
         elif 'açıklama' in col_lower or 'aciklama' in col_lower or 'explain' in col_lower or 'desc' in col_lower:
-            desc_col = col
-            print(f"Açıklama sütunu tespit edildi: {col}")
+            matched["description_col"] = col
+            logger.debug("Açıklama sütunu tespit edildi: %s", col)
         # Tutar sütununu bul
         elif 'tutar' in col_lower or 'amount' in col_lower:
-            amount_col = col
-            print(f"Tutar sütunu tespit edildi: {col}")
+            matched["amount_col"] = col
+            logger.debug("Tutar sütunu tespit edildi: %s", col)
         # Borç sütununu bul
         elif 'borç' in col_lower or 'borc' in col_lower or 'debit' in col_lower:
-            debit_col = col
-            print(f"Borç sütunu tespit edildi: {col}")
+            matched["debit_col"] = col
+            logger.debug("Borç sütunu tespit edildi: %s", col)
         # Alacak sütununu bul
         elif 'alacak' in col_lower or 'credit' in col_lower:
-            credit_col = col
-            print(f"Alacak sütunu tespit edildi: {col}")
+            matched["credit_col"] = col
+            logger.debug("Alacak sütunu tespit edildi: %s", col)
         # Bakiye sütununu bul
         elif 'bakiye' in col_lower or 'balance' in col_lower:
-            balance_col = col
-            print(f"Bakiye sütunu tespit edildi: {col}")
+            matched["balance_col"] = col
+            logger.debug("Bakiye sütunu tespit edildi: %s", col)
+    return matched
+
+def standardize_dataframe(df, bank_format, header_resolved=False):
+    """
+    DataFrame'i standart formata dönüştür
+    header_resolved=True ise df başlık satırına göre zaten düzenlenmiştir (tespit sırasında
+    bulunan başlık) ve başlık satırı tekrar aranmaz
+    """
+    logger.debug("Standardizasyon başlıyor. DataFrame boyutu: %s", df.shape)
+    logger.debug("DataFrame sütunları: %s", list(df.columns))
+    logger.debug("Banka format bilgisi: %s", bank_format.get('name'))
+    
+    # Gelen verileri analiz et
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("İlk 5 satırın içeriği:")
+        for i in range(min(5, len(df))):
+            row = df.iloc[i]
+            logger.debug("  Satır %s: %s...", i, list(row.values)[:5])  # İlk 5 değeri göster
+    
+    standardized_df = pd.DataFrame()
+    
+    # Başlık satırı var mı diye kontrol et (tespit sırasında bulunduysa tekrar aranmaz)
+    header_row = -1
+    if not header_resolved:
+        logger.debug("Başlık satırı aranıyor...")
+        header_row = find_standard_header_row(df)
+    
+    # Başlık satırı bulunduysa, veriyi yeniden düzenle
+    if header_row >= 0:
+        logger.debug("Başlık satırı %s kullanılarak veri yeniden düzenleniyor", header_row)
+        df = materialize_header_view(header_view(df, header_row))
+        logger.debug("Yeni sütun başlıkları: %s", list(df.columns))
+    
+    # Sütun isimleri analizi ve eşleştirme
+    matched = match_standard_columns(df.columns)
+    date_col = matched["date_col"]
+    desc_col = matched["description_col"]
+    amount_col = matched["amount_col"]
+    debit_col = matched["debit_col"]
+    credit_col = matched["credit_col"]
+    balance_col = matched["balance_col"]
     
     # Standardize edilmiş DataFrame'i oluştur
     
     # Tarih sütununu standardize et
     if date_col:
         standardized_df["Tarih"] = df[date_col]
-        print(f"Tarih sütunu kullanılıyor: {date_col}")
+        logger.debug("Tarih sütunu kullanılıyor: %s", date_col)
     elif "date_col" in bank_format and bank_format["date_col"] in df.columns:
         standardized_df["Tarih"] = df[bank_format["date_col"]]
-        print(f"Banka formatından Tarih sütunu kullanılıyor: {bank_format['date_col']}")
+        logger.debug("Banka formatından Tarih sütunu kullanılıyor: %s", bank_format['date_col'])
     else:
         standardized_df["Tarih"] = ""
-        print("Tarih sütunu bulunamadı")
+        logger.debug("Tarih sütunu bulunamadı")
+    
+    # Banka formatı tarih formatını belirtiyorsa dönüşümde format tahmini atlanır
+    if bank_format.get("date_format"):
+        standardized_df.attrs["date_format"] = bank_format["date_format"]
     
     # Açıklama sütununu standardize et
     if desc_col:
         standardized_df["Açıklama"] = df[desc_col]
-        print(f"Açıklama sütunu kullanılıyor: {desc_col}")
+        logger.debug("Açıklama sütunu kullanılıyor: %s", desc_col)
     elif "description_col" in bank_format and bank_format["description_col"] in df.columns:
         standardized_df["Açıklama"] = df[bank_format["description_col"]]
-        print(f"Banka formatından Açıklama sütunu kullanılıyor: {bank_format['description_col']}")
+        logger.debug("Banka formatından Açıklama sütunu kullanılıyor: %s", bank_format['description_col'])
     else:
         standardized_df["Açıklama"] = ""
-        print("Açıklama sütunu bulunamadı")
+        logger.debug("Açıklama sütunu bulunamadı")
     
     # Tutar sütununu standardize et
     if debit_col and credit_col:
-        standardized_df["Tutar"] = df[credit_col].fillna(0).astype(float) - df[debit_col].fillna(0).astype(float)
-        print(f"Borç ve Alacak sütunları birleştiriliyor: {debit_col} ve {credit_col}")
+        standardized_df["Tutar"] = parse_amount_series(df[credit_col]).fillna(0) - parse_amount_series(df[debit_col]).fillna(0)
+        logger.debug("Borç ve Alacak sütunları birleştiriliyor: %s ve %s", debit_col, credit_col)
     elif amount_col:
-        standardized_df["Tutar"] = df[amount_col]
-        print(f"Tutar sütunu kullanılıyor: {amount_col}")
+        standardized_df["Tutar"] = parse_amount_series(df[amount_col])
+        logger.debug("Tutar sütunu kullanılıyor: %s", amount_col)
     elif "amount_col" in bank_format and bank_format["amount_col"] in df.columns:
-        standardized_df["Tutar"] = df[bank_format["amount_col"]]
-        print(f"Banka formatından Tutar sütunu kullanılıyor: {bank_format['amount_col']}")
+        standardized_df["Tutar"] = parse_amount_series(df[bank_format["amount_col"]])
+        logger.debug("Banka formatından Tutar sütunu kullanılıyor: %s", bank_format['amount_col'])
     else:
         standardized_df["Tutar"] = 0
-        print("Tutar sütunu bulunamadı")
+        logger.debug("Tutar sütunu bulunamadı")
     
     # Bakiye sütununu standardize et (opsiyonel)
     if balance_col:
-        standardized_df["Bakiye"] = df[balance_col]
-        print(f"Bakiye sütunu kullanılıyor: {balance_col}")
+        standardized_df["Bakiye"] = parse_amount_series(df[balance_col])
+        logger.debug("Bakiye sütunu kullanılıyor: %s", balance_col)
     elif "balance_col" in bank_format and bank_format["balance_col"] in df.columns:
-        standardized_df["Bakiye"] = df[bank_format["balance_col"]]
-        print(f"Banka formatından Bakiye sütunu kullanılıyor: {bank_format['balance_col']}")
+        standardized_df["Bakiye"] = parse_amount_series(df[bank_format["balance_col"]])
+        logger.debug("Banka formatından Bakiye sütunu kullanılıyor: %s", bank_format['balance_col'])
     
     # Bazı işlemler başarısız olmuş olabilir, boş kayıtları temizle
     if len(standardized_df) > 0:
-        print(f"Standardizasyon tamamlandı. Sonuç DataFrame boyutu: {standardized_df.shape}")
+        logger.debug("Standardizasyon tamamlandı. Sonuç DataFrame boyutu: %s", standardized_df.shape)
         return standardized_df
     
     # Eğer hiçbir sütun eşleşmediyse, basit bir çözüm dene (ilk 4 sütunu al)
-    print("Hiçbir sütun uygun şekilde eşleşmedi, basit bir çözüm deneniyor...")
+    logger.info("Hiçbir sütun uygun şekilde eşleşmedi, basit bir çözüm deneniyor...")
     if len(df.columns) >= 3:
         numeric_cols = df.select_dtypes(include=['number']).columns
         string_cols = df.select_dtypes(include=['object']).columns
@@ -593,54 +1077,49 @@ def standardize_dataframe(df, bank_format):
         
         # Sayısal bir sütun varsa onu tutar olarak kullan
         if len(numeric_cols) > 0:
-            standardized_df["Tutar"] = df[numeric_cols[0]]
+            standardized_df["Tutar"] = parse_amount_series(df[numeric_cols[0]])
         else:
-            standardized_df["Tutar"] = df.iloc[:, 2] if len(df.columns) > 2 else 0
+            standardized_df["Tutar"] = parse_amount_series(df.iloc[:, 2]) if len(df.columns) > 2 else 0
     
-    print(f"Alternatif standardizasyon tamamlandı. Sonuç DataFrame boyutu: {standardized_df.shape}")
+    logger.debug("Alternatif standardizasyon tamamlandı. Sonuç DataFrame boyutu: %s", standardized_df.shape)
     return standardized_df
 
 def parse_bank_statement(df, file_name=None, bank_format=None):
     """
     Banka ekstresini ayrıştır
     """
-    print(f"Banka ekstresi ayrıştırılıyor... Dosya adı: {file_name}")
-    print(f"Gelen DataFrame boyutu: {df.shape}")
+    logger.debug("Banka ekstresi ayrıştırılıyor... Dosya adı: %s", file_name)
+    logger.debug("Gelen DataFrame boyutu: %s", df.shape)
     
-    # Önce dosya adından banka tipini tespit etmeye çalış (yeni eklenen fonksiyon)
-    if bank_format is None and file_name is not None:
-        bank_format = identify_bank_from_filename(file_name)
-        if bank_format:
-            print(f"Dosya adından banka formatı algılandı: {bank_format['name']}")
-    
-    # Eğer dosya adından tespit edilemediyse, içerik analizi yap
+    # Format verilmediyse önbellek, dosya adı ve içerik analizi sırasıyla denenir
     if bank_format is None:
-        print("Dosya adından format algılanamadı, içerik analizine geçiliyor...")
-        bank_format = identify_bank_format(df)
+        bank_format = detect_bank_format(df, file_name=file_name)
     
     if bank_format:
-        print(f"Banka formatı algılandı: {bank_format['name']}")
+        logger.info("Banka formatı algılandı: %s", bank_format['name'], extra={"bank_id": bank_format.get("id"), "rows": len(df)})
         
         # Format bilgilerini yazdır
-        for key, value in bank_format.items():
-            if key not in ["processed_df", "content_indicators"] and value is not None:
-                print(f"   - {key}: {value}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for key, value in bank_format.items():
+                if key not in ["processed_df", "content_indicators"] and value is not None:
+                    logger.debug("   - %s: %s", key, value)
         
         # Eğer başlık satırı bulunup işlenmişse, işlenmiş DataFrame'i kullan
-        if "processed_df" in bank_format and bank_format["processed_df"] is not None:
+        header_resolved = "processed_df" in bank_format and bank_format["processed_df"] is not None
+        if header_resolved:
             df_to_standardize = bank_format["processed_df"]
-            print(f"İşlenmiş DataFrame kullanılıyor. Boyut: {df_to_standardize.shape}")
+            logger.debug("İşlenmiş DataFrame kullanılıyor. Boyut: %s", df_to_standardize.shape)
         else:
             df_to_standardize = df
-            print("Orijinal DataFrame kullanılıyor")
+            logger.debug("Orijinal DataFrame kullanılıyor")
         
         # Sütunları yazdır
-        print(f"Kullanılacak DataFrame sütunları: {list(df_to_standardize.columns)}")
+        logger.debug("Kullanılacak DataFrame sütunları: %s", list(df_to_standardize.columns))
         
         # DataFrame'i standart formata dönüştür
-        return standardize_dataframe(df_to_standardize, bank_format), bank_format["id"]
+        return standardize_dataframe(df_to_standardize, bank_format, header_resolved=header_resolved), bank_format["id"]
     else:
-        print("Hiçbir banka formatı tanımlanamadı! Genel işlem yapılacak.")
+        logger.warning("Hiçbir banka formatı tanımlanamadı! Genel işlem yapılacak.")
         # Hiçbir format eşleşmediyse, genel bir yaklaşım dene
         return None, "unknown"
 
@@ -657,77 +1136,77 @@ def identify_bank_from_filename(file_name):
     if '.' in file_name_without_ext:
         file_name_without_ext = file_name_without_ext.rsplit('.', 1)[0]
     
-    # Aktif banka formatlarını yükle
-    formats = load_bank_formats()
-    active_formats = [f for f in formats if f.get("active", True)]
-    
-    # Yaygın banka adı alternatiflerini tanımla (kısaltmalar, yaygın yazım hataları, vb.)
-    bank_alternatives = {
-        "is_bankasi": ["iş", "is bank", "isbank", "turkiye is", "türkiye iş", "isbankası", "işbankası"],
-        "garanti": ["garanti", "gbankasi", "gbbankasi", "garantibbva", "gbbva", "gb", "garantibankasi"],
-        "akbank": ["akbank", "akb", "ak bank", "ak_bank", "akbnk"],
-        "ziraat": ["ziraat", "tc ziraat", "tczbankasi", "türkiye cumhuriyeti ziraat", "ziraatbank", "zrt"],
-        "yapi_kredi": ["yapı kredi", "yapi kredi", "ykb", "yapi_kredi", "yapıkredi", "yapikredi"],
-        "vakifbank": ["vakıfbank", "vakifbank", "vkf", "vakif", "vakıf", "tvakifbank", "türkiye vakıflar", "vakıflar"],
-        "halkbank": ["halkbank", "halk bank", "halk bankası", "thb", "türkiye halk"],
-        "teb": ["teb", "türk ekonomi", "turk ekonomi", "turkiye ekonomi", "türkiye ekonomi"],
-        "finans": ["finansbank", "qnb", "qnb finans", "finansb", "finans bankası", "qnbfinans", "qnbf"],
-        "ing": ["ing", "ing bank", "ing bankası", "ing turkey", "ing türkiye"],
-        "hsbc": ["hsbc", "hsbc bank", "hsbc türkiye", "hsbc turkey"],
-        "denizbank": ["denizbank", "deniz", "dnz", "deniz bank", "dnz bank"],
-        "kuveyt_turk": ["kuveyt türk", "kuveyt turk", "kuveytturk", "ktbank", "kt bank", "kuveyt_turk"],
-        "albaraka": ["albaraka", "albaraka türk", "alb", "alb turk", "albaraka bankası"]
-    }
+    # Derlenmiş kayıttaki terim matrisleri (adlar, alternatifler ve ad kelimeleri önceden küçük harfe çevrildi)
+    matrix = get_token_matrix()
+    padded_name = f" {file_name_without_ext} "
+    
+    # Her terim dosya adında bir kez aranır (tam kelime ve içinde geçme)
+    name_hits = _contains(file_name_lower, matrix["names"])
+    id_hits = _contains(file_name_lower, matrix["ids"])
+    alias_whole = _contains(padded_name, matrix["alias_padded"])
+    alias_partial = _contains(file_name_without_ext, matrix["alias_tokens"])
+    part_whole = _contains(padded_name, matrix["part_padded"])
+    part_partial = _contains(file_name_without_ext, matrix["part_tokens"])
+    
+    # Bankacılık terimleri hariç format puanları tek matris çarpımıyla; sadece puanı olan formatlar
+    # aşağıda açıklamalarıyla birlikte eski sırayla puanlanır (puanlar ve eşitlik davranışı aynı kalır)
+    alias_scores = np.where(alias_whole, 0.9, np.where(alias_partial, 0.7, 0.0))
+    part_scores = np.where(part_whole, 0.6, np.where(part_partial, matrix["part_partial_scores"], 0.0))
+    candidate_scores = name_hits * 1.0 + id_hits * 0.8 + alias_scores @ matrix["alias_weights"] + part_scores @ matrix["part_weights"]
     
     # Banka adı eşleşmeleri için puanlama yap
     best_match = None
     highest_score = 0
     match_reason = ""
     
-    for bank_format in active_formats:
-        bank_id = bank_format["id"].lower()
-        bank_name = bank_format["name"].lower()
+    for index in np.flatnonzero(candidate_scores > 0):
+        entry = matrix["formats"][index]
+        # Sadece aktif formatlar
+        if not entry["active"]:
+            continue
+        bank_id = entry["id_lower"]
+        bank_name = entry["name_lower"]
         
         # Dosya adında banka adı veya id'si geçiyorsa puan ver
         score = 0
         current_reason = []
         
         # 1. Tam banka adı eşleşmesi
-        if bank_name in file_name_lower:
+        if name_hits[index]:
             score += 1.0
             current_reason.append(f"Tam banka adı '{bank_name}' bulundu")
         
         # 2. Banka ID doğrudan eşleşmesi
-        if bank_id in file_name_lower:
+        if id_hits[index]:
             score += 0.8
             current_reason.append(f"Banka ID '{bank_id}' bulundu")
         
         # 3. Alternatif adlar ve kısaltmalar kontrolü
-        if bank_id in bank_alternatives:
-            for alternative in bank_alternatives[bank_id]:
-                # Tam kelime kontrolü (kelime sınırları ile)
-                if f" {alternative} " in f" {file_name_without_ext} ":
-                    score += 0.9
-                    current_reason.append(f"Tam alternatif isim '{alternative}' bulundu")
-                # Dosya adında geçiyor mu
-                elif alternative in file_name_without_ext:
-                    score += 0.7
-                    current_reason.append(f"Alternatif isim '{alternative}' bulundu")
+        for alternative in entry["aliases"]:
+            position = matrix["alias_positions"][alternative]
+            # Tam kelime kontrolü (kelime sınırları ile)
+            if alias_whole[position]:
+                score += 0.9
+                current_reason.append(f"Tam alternatif isim '{alternative}' bulundu")
+            # Dosya adında geçiyor mu
+            elif alias_partial[position]:
+                score += 0.7
+                current_reason.append(f"Alternatif isim '{alternative}' bulundu")
         
         # 4. Banka adı kelimelerinin ayrı ayrı kontrolü - her bir kelimeyi kontrol et
-        bank_name_parts = bank_name.split()
-        for part in bank_name_parts:
-            if len(part) >= 3:  # En az 3 karakter uzunluğundaki anlamlı kelimeleri kontrol et
-                # Tam kelime kontrolü
-                if f" {part} " in f" {file_name_without_ext} ":
-                    score += 0.6
-                    current_reason.append(f"Tam kelime '{part}' bulundu")
-                # İçinde geçiyor mu
-                elif part in file_name_without_ext:
-                    # Kelime uzunluğuna göre puanı ayarla (daha uzun kelimeler daha güvenilir)
-                    word_score = min(0.4, 0.1 + (len(part) / 20))
-                    score += word_score
-                    current_reason.append(f"Kelime '{part}' bulundu ({word_score:.2f} puan)")
+        # En az 3 karakter uzunluğundaki anlamlı kelimeler derleme sırasında seçildi
+        for part in entry["name_lower_parts"]:
+            position = matrix["part_positions"][part]
+            # Tam kelime kontrolü
+            if part_whole[position]:
+                score += 0.6
+                current_reason.append(f"Tam kelime '{part}' bulundu")
+            # İçinde geçiyor mu
+            elif part_partial[position]:
+                # Kelime uzunluğuna göre puanı ayarla (daha uzun kelimeler daha güvenilir)
+                word_score = min(0.4, 0.1 + (len(part) / 20))
+                score += word_score
+                current_reason.append(f"Kelime '{part}' bulundu ({word_score:.2f} puan)")
         
         # 5. "Bankası", "Bank", "Ekstrem" gibi kelimelerin varlığını kontrol et
         # Bu kelimeler varsa ve önceki puanlar da bir miktar yüksekse, güvenilirliği artır
@@ -741,18 +1220,287 @@ def identify_bank_from_filename(file_name):
         # En yüksek puanlı eşleşmeyi tut
         if score > highest_score:
             highest_score = score
-            best_match = bank_format
+            best_match = entry["format"]
             match_reason = ", ".join(current_reason)
     
     # Puanı düşük olsa bile, gerçekten bir banka ismi içeriyorsa kabul et
     # Eşik değerini düşük tut çünkü kısa banka isimleri (TEB, ING gibi) daha az puan alabilir
     if highest_score >= 0.2 and best_match is not None:
-        print(f"Dosya adından banka formatı tanımlandı: {best_match['name']} (skor: {highest_score:.2f}, neden: {match_reason})")
-        # Kesin olarak banka tipini belirledik, formatı güncelle
+        logger.info("Dosya adından banka formatı tanımlandı: %s (skor: %.2f, neden: %s)", best_match['name'], highest_score, match_reason)
+        # Kesin olarak banka tipini belirledik; kayıttaki format değişmesin diye kopyası döndürülür
+        best_match = dict(best_match)
         if "processed_df" not in best_match:
             best_match["processed_df"] = None
         return best_match
     
     # Yeterince güvenilir bir eşleşme bulunamadı
-    print(f"Dosya adından banka formatı tanımlanamadı: '{file_name}' (en yüksek skor: {highest_score:.2f})")
-    return None
\ No newline at end of file
+    logger.info("Dosya adından banka formatı tanımlanamadı: '%s' (en yüksek skor: %.2f)", file_name, highest_score)
+    return None
+
+# ====================== TESPİT ÖNBELLEĞİ ======================
+# Aynı banka dökümleri her gün tekrar yüklendiği için tespit sonuçları diskte saklanır.
+# Anahtar dosya içeriğinin özetidir; içerik farklıysa başlık satırı ve konumundan oluşan
+# şema imzasına bakılır. bank_formats.json değiştiğinde önbellek kendiliğinden boşaltılır.
+DETECTION_CACHE_FILE = os.path.join(CONFIG_DIR, "detection_cache.json")
+
+# Her tablo (içerik / şema) için en fazla bu kadar kayıt tutulur; en eski kayıt önce silinir
+DETECTION_CACHE_MAX_ENTRIES = 1000
+
+# Şema imzası sadece içerik analizi en az bu farkla karar verdiyse kaydedilir
+SCHEMA_CACHE_MIN_MARGIN = 5.0
+
+_detection_cache_lock = threading.Lock()
+_detection_cache = {
+    "stat": None,        # (mtime_ns, size) - başka bir süreç dosyayı değiştirdiyse tekrar okunur
+    "data": None,        # {"formats_hash": ..., "content": {...}, "schema": {...}}
+    "hits": 0,
+    "misses": 0,
+}
+
+def _empty_detection_cache(formats_hash):
+    return {"formats_hash": formats_hash, "content": {}, "schema": {}}
+
+def _load_detection_cache(formats_hash):
+    """
+    Önbelleği döndür (kilit altında çağrılmalı)
+    Kayıtlar farklı bir bank_formats.json içeriğiyle oluşturulduysa boş önbellek döner
+    """
+    try:
+        file_stat = os.stat(DETECTION_CACHE_FILE)
+        stat_key = (file_stat.st_mtime_ns, file_stat.st_size)
+    except FileNotFoundError:
+        stat_key = None
+    
+    if _detection_cache["data"] is None or _detection_cache["stat"] != stat_key:
+        data = None
+        if stat_key is not None:
+            try:
+                with open(DETECTION_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Tespit önbelleği okunamadı, yeniden oluşturulacak: %s", e)
+        _detection_cache["data"] = data
+        _detection_cache["stat"] = stat_key
+    
+    data = _detection_cache["data"]
+    if not isinstance(data, dict) or data.get("formats_hash") != formats_hash:
+        if data is not None:
+            logger.debug("Banka formatları değişti, tespit önbelleği boşaltıldı")
+        data = _empty_detection_cache(formats_hash)
+        _detection_cache["data"] = data
+    return data
+
+def _save_detection_cache(data):
+    """
+    Önbelleği atomik olarak diske yaz (kilit altında çağrılmalı)
+    """
+    temp_path = None
+    try:
+        init_config()
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=CONFIG_DIR, prefix=".detection_cache.", suffix=".tmp", delete=False) as f:
+            temp_path = f.name
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, DETECTION_CACHE_FILE)
+        temp_path = None
+        file_stat = os.stat(DETECTION_CACHE_FILE)
+        _detection_cache["stat"] = (file_stat.st_mtime_ns, file_stat.st_size)
+    except OSError as e:
+        # Önbellek yazılamazsa tespit yine çalışır, sadece bir sonraki yüklemede tekrarlanır
+        logger.warning("Tespit önbelleği kaydedilemedi: %s", e)
+    finally:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _current_formats_hash():
+    registry = _load_registry()
+    return registry["hash"] if registry is not None else None
+
+def formats_version():
+    """
+    Banka formatları kaydının sürümü (yapılandırma dosyasının içerik özeti); formatlar
+    değiştiğinde bu değere bağlı önbellek anahtarları da değişir
+    """
+    return _current_formats_hash()
+
+def content_hash(data):
+    """
+    Yüklenen dosyanın baytlarından tespit önbelleği anahtarı üret
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def schema_signatures(df, header_index=None):
+    """
+    DataFrame'in olası şema imzalarını (başlık konumu, imza) sırasıyla döndür
+    Konum -1 sütun adlarını, diğerleri ilk HEADER_SEARCH_ROWS satırı temsil eder.
+    Hücreler küçük harfe çevrilip kırpılır, boş hücreler imzaya girmez.
+    """
+    if header_index is None:
+        header_index = build_header_index(df)
+    rows = [_HEADER_CELL_SEPARATOR.join(str(col).lower() for col in df.columns)] + header_index
+    
+    signatures = []
+    for position, row_text in enumerate(rows, start=-1):
+        cells = [cell.strip() for cell in row_text.split(_HEADER_CELL_SEPARATOR)]
+        cells = [cell for cell in cells if cell and cell not in ("nan", "none", "nat")]
+        if not cells:
+            continue
+        normalized = "|".join(cells)
+        signatures.append((position, hashlib.sha1(f"{position}|{normalized}".encode('utf-8')).hexdigest()))
+    return signatures
+
+def _cached_detection_result(df, entry, cache_source):
+    """
+    Önbellek kaydından identify_bank_format çıktısıyla aynı biçimde bir sonuç oluştur
+    Format artık yoksa veya pasifse None döner
+    """
+    compiled = next((c for c in get_compiled_bank_formats() if c["id"] == entry["bank_id"]), None)
+    if compiled is None:
+        return None
+    
+    result = compiled["format"].copy()
+    header_row = entry.get("header_row")
+    if header_row is not None:
+        if header_row >= len(df):
+            return None
+        result["header_row"] = header_row
+        result["processed_df"] = materialize_header_view(header_view(df, header_row))
+    else:
+        result["processed_df"] = None
+    result["detection"] = {"stages": [], "early_exit": False, "rows": len(df), "sampled_rows": 0,
+                           "cache": cache_source, "source": entry.get("source")}
+    return result
+
+def _title_contradicts(df, bank_id):
+    """
+    Şema imzası sadece başlık satırından oluşur; aynı başlığı kullanan bankalar çoğu zaman üstteki
+    banka adı satırlarıyla ayrılır. Ucuz başlık aşaması (_score_title_rows) kayıttaki bankadan
+    başka bir bankaya daha yüksek puan veriyorsa şema kaydı bu dosya için kullanılmaz
+    """
+    bank_scores = {entry["id"]: {"compiled": entry, "total_score": 0, "detection_methods": []}
+                   for entry in get_compiled_bank_formats()}
+    _score_title_rows(df, bank_scores, None)
+    cached_score = bank_scores[bank_id]["total_score"] if bank_id in bank_scores else 0
+    return any(bank_data["total_score"] > cached_score for bank_data in bank_scores.values())
+
+def lookup_detection_cache(df, content_key=None, header_index=None):
+    """
+    Önbellekte bu dosya için kayıtlı tespit sonucunu ara
+    Önce içerik özeti, sonra şema imzası denenir; bulunamazsa None döner. Şema kaydı, dosyanın
+    banka adı satırları başka bir bankayı gösteriyorsa kullanılmaz (_title_contradicts)
+    """
+    formats_hash = _current_formats_hash()
+    with _detection_cache_lock:
+        data = _load_detection_cache(formats_hash)
+        if content_key is not None and content_key in data["content"]:
+            result = _cached_detection_result(df, data["content"][content_key], "content")
+            if result is not None:
+                _detection_cache["hits"] += 1
+                return result
+        
+        if data["schema"]:
+            for position, signature in schema_signatures(df, header_index):
+                entry = data["schema"].get(signature)
+                # İmza başlık konumunu da içerdiği için eşleşen kayıt aynı satırı başlık kabul eder
+                if entry is not None:
+                    if _title_contradicts(df, entry["bank_id"]):
+                        logger.debug("Şema kaydı banka adı satırlarıyla çelişiyor, içerik analizi yapılacak",
+                                     extra={"bank_id": entry["bank_id"]})
+                        continue
+                    result = _cached_detection_result(df, entry, "schema")
+                    if result is not None:
+                        _detection_cache["hits"] += 1
+                        return result
+        
+        _detection_cache["misses"] += 1
+        return None
+
+def store_detection_cache(df, bank_format, source, content_key=None, header_index=None):
+    """
+    Tespit sonucunu önbelleğe yaz
+    İçerik özeti her zaman kaydedilir. Şema imzası sadece içerik analizinin açık farkla
+    (SCHEMA_CACHE_MIN_MARGIN) verdiği kararlar için kaydedilir; aynı başlığı kullanan
+    bankalar arasında belirsiz kalan bir sonuç başka dosyalara taşınmasın.
+    """
+    header_row = bank_format.get("header_row")
+    entry = {"bank_id": bank_format["id"], "header_row": header_row, "source": source}
+    
+    schema_key = None
+    detection = bank_format.get("detection") or {}
+    if source == "content" and detection.get("margin", 0) >= SCHEMA_CACHE_MIN_MARGIN:
+        position = -1 if header_row is None else header_row
+        schema_key = next((signature for sig_position, signature in schema_signatures(df, header_index)
+                           if sig_position == position), None)
+    
+    formats_hash = _current_formats_hash()
+    with _detection_cache_lock:
+        data = _load_detection_cache(formats_hash)
+        tables = [("content", content_key), ("schema", schema_key)]
+        for table_name, key in tables:
+            if key is None:
+                continue
+            table = data[table_name]
+            table.pop(key, None)
+            table[key] = entry
+            while len(table) > DETECTION_CACHE_MAX_ENTRIES:
+                table.pop(next(iter(table)))
+        if content_key is not None or schema_key is not None:
+            _save_detection_cache(data)
+
+def detect_bank_format(df, file_name=None, content_key=None):
+    """
+    Banka formatını önbellek, dosya adı ve içerik analizi sırasıyla belirle
+    Bilinen dosyalar ve şemalar önbellekten döner ve hiçbir puanlama çalışmaz.
+    Sonuç identify_bank_from_filename / identify_bank_format çıktılarıyla aynı biçimdedir.
+    """
+    if df is None or len(df.columns) == 0:
+        return identify_bank_from_filename(file_name) or identify_bank_format(df)
+    
+    header_index = build_header_index(df)
+    cached = lookup_detection_cache(df, content_key, header_index)
+    if cached is not None:
+        logger.info("Banka formatı tespit önbelleğinden alındı: %s", cached['name'],
+                    extra={"bank_id": cached["id"], "cache": cached["detection"]["cache"]})
+        return cached
+    
+    # Önce dosya adından, bulunamazsa içerik analiziyle tespit et
+    source = "filename"
+    bank_format = identify_bank_from_filename(file_name)
+    if bank_format is None:
+        source = "content"
+        bank_format = identify_bank_format(df)
+    
+    if bank_format is not None:
+        store_detection_cache(df, bank_format, source, content_key, header_index)
+    return bank_format
+
+def get_detection_cache_stats():
+    """
+    Tespit önbelleğinin kayıt sayılarını ve isabet oranını döndür
+    """
+    formats_hash = _current_formats_hash()
+    with _detection_cache_lock:
+        data = _load_detection_cache(formats_hash)
+        hits = _detection_cache["hits"]
+        misses = _detection_cache["misses"]
+        return {
+            "content_entries": len(data["content"]),
+            "schema_entries": len(data["schema"]),
+            "max_entries": DETECTION_CACHE_MAX_ENTRIES,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+def clear_detection_cache():
+    """
+    Tespit önbelleğini ve sayaçlarını sıfırla
+    """
+    with _detection_cache_lock:
+        if os.path.exists(DETECTION_CACHE_FILE):
+            os.remove(DETECTION_CACHE_FILE)
+        _detection_cache["data"] = None
+        _detection_cache["stat"] = None
+        _detection_cache["hits"] = 0
+        _detection_cache["misses"] = 0
@@ -0,0 +1,87 @@
+"""
+Tutar ayrıştırma benchmark'ı: eski replace zincirleri ve parse_amount_series
+
+Kullanım:
+    python benchmarks/bench_amount_parsing.py [--rows 1000000]
+
+Her yöntem için süreyi ve beklenen değere doğru çözümlenen hücre oranını yazdırır.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import parse_amount_series
+
+def make_amount_cells(row_count, seed=0):
+    """
+    Bankalarda görülen biçimlerde metin tutarlar ve beklenen değerleri üret
+    """
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.normal(0, 20000, row_count), 2)
+    magnitudes = np.abs(values)
+
+    whole = (magnitudes // 1).astype(np.int64)
+    cents = np.rint((magnitudes - whole) * 100).astype(np.int64)
+    grouped = pd.Series(whole).map("{:,}".format).str.replace(",", ".", regex=False)
+    body = grouped + "," + pd.Series(cents).astype(str).str.zfill(2)
+
+    negative = values < 0
+    style = rng.integers(0, 5, row_count)
+    cells = np.select(
+        [
+            style == 0,  # -1.234,56
+            style == 1,  # -1.234,56 TL
+            style == 2,  # 1.234,56- (sondaki eksi)
+            style == 3,  # (1.234,56)
+        ],
+        [
+            np.where(negative, "-", "") + body,
+            np.where(negative, "-", "") + body + " TL",
+            body + np.where(negative, "-", ""),
+            np.where(negative, "(" + body + ")", body),
+        ],
+        default=np.where(negative, "-", "+") + body,  # +1.234,56
+    )
+    expected = np.where(negative, -1, 1) * (whole + cents / 100)
+    return pd.Series(cells, dtype=object), expected
+
+def legacy_parser_chain(series):
+    """
+    bank_parsers içindeki eski zincir
+    """
+    cleaned = series.astype(str).str.replace('TL', '').str.replace(' ', '')
+    cleaned = cleaned.str.replace(',', '.')
+    return pd.to_numeric(cleaned, errors='coerce')
+
+def legacy_processor_chain(series):
+    """
+    data_processor içindeki eski zincir
+    """
+    return pd.to_numeric(series.astype(str).str.replace(',', '.').str.replace('[^0-9.-]', '', regex=True), errors='coerce')
+
+def run(row_count):
+    cells, expected = make_amount_cells(row_count)
+    print(f"{row_count:,} hücre")
+    print(f"{'Yöntem':<24} | {'Süre (sn)':>10} | {'Doğru (%)':>9}")
+    print("-" * 50)
+    for name, parser in [
+        ("bank_parsers zinciri", legacy_parser_chain),
+        ("data_processor zinciri", legacy_processor_chain),
+        ("parse_amount_series", parse_amount_series),
+    ]:
+        start = time.perf_counter()
+        parsed = parser(cells).to_numpy(dtype=np.float64)
+        elapsed = time.perf_counter() - start
+        correct = np.isclose(parsed, expected, rtol=0, atol=0.005).mean() * 100
+        print(f"{name:<24} | {elapsed:>10.3f} | {correct:>9.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    run(parser.parse_args().rows)
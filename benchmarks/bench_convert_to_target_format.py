@@ -0,0 +1,62 @@
+"""
+convert_to_target_format için ölçeklenme benchmark'ı
+
+Kullanım:
+    python benchmarks/bench_convert_to_target_format.py [--max-rows 1000000]
+
+Her satır sayısı için dönüşüm süresini ve satır başına düşen süreyi yazdırır.
+Satır başına süre sabit kalıyorsa dönüşüm doğrusal ölçekleniyor demektir.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import convert_to_target_format
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+DESCRIPTIONS = [
+    "POS SATIS MIGROS*1234 ISTANBUL",
+    "EFT - AHMET YILMAZ / KIRA ODEMESI",
+    "FAST GELEN: ŞİRKET A.Ş. FATURA NO:556",
+    "KREDI KARTI ODEMESI",
+    "HAVALE (GİDEN) - TEDARİKÇİ ÖDEMESİ",
+]
+
+def make_processed_df(row_count, seed=0):
+    """
+    Parser çıktısına benzeyen (Tarih, Açıklama, Tutar) sentetik bir DataFrame üret
+    """
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 365, row_count)
+    dates = (pd.Timestamp("2024-01-01") + pd.to_timedelta(days, unit="D")).strftime("%d.%m.%Y")
+    return pd.DataFrame({
+        "Tarih": dates,
+        "Açıklama": rng.choice(DESCRIPTIONS, row_count),
+        "Tutar": np.round(rng.normal(0, 5000, row_count), 2),
+    })
+
+def run(max_rows):
+    print(f"{'Satır':>10} | {'Süre (sn)':>10} | {'µs/satır':>9}")
+    print("-" * 36)
+    for row_count in [size for size in SIZES if size <= max_rows]:
+        df = make_processed_df(row_count)
+        # Olası stdout çıktıları ölçümü bozmasın
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            result = convert_to_target_format(df)
+            elapsed = time.perf_counter() - start
+        assert len(result) == 2 * row_count + 1
+        print(f"{row_count:>10,} | {elapsed:>10.3f} | {elapsed / row_count * 1e6:>9.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-rows", type=int, default=SIZES[-1])
+    run(parser.parse_args().max_rows)
@@ -0,0 +1,116 @@
+"""
+Banka formatı tespiti için doğruluk ve gecikme benchmark'ı
+
+Kullanım:
+    python benchmarks/bench_detection.py [--max-rows 1000000] [--files-per-format 4] [--xlsx-max-rows 10000]
+
+bank_formats.json'daki her aktif format için sentetik ekstreler (synthetic_statements) üretilir,
+uygulamanın okuduğu gibi okunur ve identify_bank_from_filename / identify_bank_format ile tanınır.
+Her satır sayısı ve format için şunlar yazdırılır:
+  - Dosya adı doğruluğu (sadece adı bankayı belli eden dosyalar), içerik ve uygulama akışı
+    (önce dosya adı, sonra içerik) doğruluğu
+  - Dosya başına tespit süresi (okuma hariç)
+  - identify_bank_format'ın en yüksek bellek kullanımı (tracemalloc, formatın ilk dosyası)
+10.000 satırın üzerindeki boyutlarda format başına tek dosya üretilir, XLSX dosyaları
+--xlsx-max-rows satırına kadar üretilir (openpyxl ile yazmak çok yavaş).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bank_config
+from bank_config import identify_bank_format, identify_bank_from_filename
+from synthetic_statements import generate_statement, load_formats, read_statement
+
+ROW_COUNTS = [100, 10_000, 1_000_000]
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bank_configs", "bank_formats.json")
+
+def detect_like_app(statement, df):
+    """
+    Uygulamadaki sıra: önce dosya adı, tanınmazsa içerik analizi
+    """
+    bank_format = identify_bank_from_filename(statement["file_name"])
+    if bank_format is None:
+        bank_format = identify_bank_format(df)
+    return bank_format
+
+def format_ratio(correct, total):
+    return f"{correct}/{total}" if total else "-"
+
+def run(max_rows, files_per_format, xlsx_max_rows, config_file, seed):
+    formats = load_formats(config_file)
+    print(f"{'Satır':>9} | {'Format':>12} | {'Dosya adı':>9} | {'İçerik':>6} | {'Akış':>6} | {'ms/dosya':>9} | {'Bellek (MB)':>11}")
+    print("-" * 82)
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Tespit, deponun yapılandırmasına dokunmadan kopyası üzerinde çalışır
+        bank_config.CONFIG_DIR = work_dir
+        bank_config.CONFIG_FILE = os.path.join(work_dir, "bank_formats.json")
+        shutil.copyfile(config_file, bank_config.CONFIG_FILE)
+
+        for row_count in [count for count in ROW_COUNTS if count <= max_rows]:
+            file_count = files_per_format if row_count <= 10_000 else 1
+            totals = {"name": [0, 0], "content": [0, 0], "flow": [0, 0], "seconds": 0.0, "files": 0}
+            for bank_format in formats:
+                others = [other for other in formats if other is not bank_format]
+                counts = {"name": [0, 0], "content": [0, 0], "flow": [0, 0]}
+                elapsed = 0.0
+                peak_mb = 0.0
+                for index in range(file_count):
+                    extension = "xlsx" if index % 2 and row_count <= xlsx_max_rows else "csv"
+                    statement = generate_statement(bank_format, row_count, work_dir, extension, others, seed=seed)
+                    seed += 1
+                    df = read_statement(statement["path"])
+                    os.remove(statement["path"])
+
+                    start = time.perf_counter()
+                    by_name = identify_bank_from_filename(statement["file_name"])
+                    by_content = identify_bank_format(df)
+                    elapsed += time.perf_counter() - start
+                    by_flow = detect_like_app(statement, df)
+
+                    expected = statement["bank_id"]
+                    if statement["name_hint"]:
+                        counts["name"][0] += by_name is not None and by_name["id"] == expected
+                        counts["name"][1] += 1
+                    counts["content"][0] += by_content is not None and by_content["id"] == expected
+                    counts["content"][1] += 1
+                    counts["flow"][0] += by_flow is not None and by_flow["id"] == expected
+                    counts["flow"][1] += 1
+
+                    # Bellek ölçümü süreyi etkilediği için ayrı bir çalıştırmada yapılır
+                    if index == 0:
+                        tracemalloc.start()
+                        identify_bank_format(df)
+                        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+                        tracemalloc.stop()
+                    del df
+
+                for key in ["name", "content", "flow"]:
+                    totals[key][0] += counts[key][0]
+                    totals[key][1] += counts[key][1]
+                totals["seconds"] += elapsed
+                totals["files"] += file_count
+                print(f"{row_count:>9,} | {bank_format['id'][:12]:>12} | {format_ratio(*counts['name']):>9} | "
+                      f"{format_ratio(*counts['content']):>6} | {format_ratio(*counts['flow']):>6} | "
+                      f"{elapsed / file_count * 1000:>9.1f} | {peak_mb:>11.1f}")
+
+            print(f"{row_count:>9,} | {'TOPLAM':>12} | {format_ratio(*totals['name']):>9} | "
+                  f"{format_ratio(*totals['content']):>6} | {format_ratio(*totals['flow']):>6} | "
+                  f"{totals['seconds'] / totals['files'] * 1000:>9.1f} | {'':>11}")
+            print("-" * 82)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-rows", type=int, default=ROW_COUNTS[-1])
+    parser.add_argument("--files-per-format", type=int, default=4)
+    parser.add_argument("--xlsx-max-rows", type=int, default=10_000)
+    parser.add_argument("--config", default=DEFAULT_CONFIG)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.max_rows, args.files_per_format, args.xlsx_max_rows, args.config, args.seed)
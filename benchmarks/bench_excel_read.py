@@ -0,0 +1,102 @@
+"""
+Excel ekstrelerinin tek seferde ve iki aşamada okunması için süre/bellek benchmark'ı
+
+Kullanım:
+    python benchmarks/bench_excel_read.py [--rows 1000 10000] [--extra-columns 0 40] [--bank garanti]
+
+Sentetik ekstreye (synthetic_statements) kullanılmayan --extra-columns kadar sütun eklenip XLSX
+olarak yazılır. Her boyut için şunlar yazdırılır:
+  - Eski yol: dosyanın tamamı okunur, format tüm DataFrame üzerinde tespit edilir
+  - read_excel_statement: ilk satırlardan tespit, sadece gereken sütunlarla ikinci okuma
+  - Süre, en yüksek bellek kullanımı (tracemalloc) ve okunan DataFrame'in bellekteki boyutu
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bank_config
+from bank_config import detect_bank_format
+from file_reader import read_excel_statement
+from synthetic_statements import load_formats, make_statement
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bank_configs", "bank_formats.json")
+
+def write_wide_statement(path, bank_format, row_count, extra_columns, seed=0):
+    """
+    Sentetik ekstreyi kullanılmayan sütunlarla genişletip XLSX olarak yaz
+    """
+    rng = np.random.default_rng(seed)
+    header_rows, data, _ = make_statement(bank_format, row_count, seed=seed)
+    extra_names = [f"Ek Alan {index}" for index in range(extra_columns)]
+    header_rows = [row + [""] * extra_columns for row in header_rows[:-1]] + [header_rows[-1] + extra_names]
+    for name in extra_names:
+        data[name] = rng.integers(0, 10**6, row_count).astype(str)
+    grid = pd.concat([pd.DataFrame(header_rows, dtype=object), pd.DataFrame(data.to_numpy(dtype=object))], ignore_index=True)
+    grid.to_excel(path, header=False, index=False, engine="openpyxl")
+
+def read_whole(path):
+    df = pd.read_excel(path, engine="openpyxl")
+    return df, detect_bank_format(df)
+
+def read_two_phase(path):
+    return read_excel_statement(path, engine="openpyxl")
+
+def measure(reader, path):
+    """
+    Okumayı iki kez çalıştır: biri süre, biri bellek ölçümü için
+    Returns: (saniye, en yüksek bellek MB, DataFrame MB, sütun sayısı, format id)
+    """
+    # Tespit önbelleği ikinci okumayı kısaltmasın
+    bank_config.clear_detection_cache()
+    start = time.perf_counter()
+    df, bank_format = reader(path)
+    elapsed = time.perf_counter() - start
+
+    bank_config.clear_detection_cache()
+    tracemalloc.start()
+    reader(path)
+    peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    frame_mb = df.memory_usage(deep=True).sum() / 1e6
+    return elapsed, peak_mb, frame_mb, len(df.columns), bank_format["id"] if bank_format else None
+
+def run(row_counts, extra_counts, bank_id, config_file):
+    formats = load_formats(config_file)
+    bank_format = next((f for f in formats if f["id"] == bank_id), formats[0])
+    print(f"Format: {bank_format['id']}")
+    print(f"{'Satır':>8} | {'Ek sütun':>8} | {'Okuma':>12} | {'Süre (sn)':>9} | {'Bellek (MB)':>11} | {'DF (MB)':>8} | {'Sütun':>5} | Format")
+    print("-" * 92)
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Tespit, deponun yapılandırmasına ve önbelleğine dokunmadan kopyalar üzerinde çalışır
+        bank_config.CONFIG_DIR = work_dir
+        bank_config.CONFIG_FILE = os.path.join(work_dir, "bank_formats.json")
+        bank_config.DETECTION_CACHE_FILE = os.path.join(work_dir, "detection_cache.json")
+        shutil.copyfile(config_file, bank_config.CONFIG_FILE)
+
+        for row_count in row_counts:
+            for extra_columns in extra_counts:
+                path = os.path.join(work_dir, f"ekstre_{row_count}_{extra_columns}.xlsx")
+                write_wide_statement(path, bank_format, row_count, extra_columns)
+                for label, reader in [("tek seferde", read_whole), ("iki aşamalı", read_two_phase)]:
+                    elapsed, peak_mb, frame_mb, columns, detected = measure(reader, path)
+                    print(f"{row_count:>8,} | {extra_columns:>8} | {label:>12} | {elapsed:>9.2f} | {peak_mb:>11.1f} | "
+                          f"{frame_mb:>8.1f} | {columns:>5} | {detected}")
+                os.remove(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--extra-columns", type=int, nargs="+", default=[0, 40])
+    parser.add_argument("--bank", default="garanti")
+    parser.add_argument("--config", default=DEFAULT_CONFIG)
+    args = parser.parse_args()
+    run(args.rows, args.extra_columns, args.bank, args.config)
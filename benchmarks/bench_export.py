@@ -0,0 +1,73 @@
+"""
+İndirme dosyalarının (Excel ve CSV) oluşturulması için süre/bellek benchmark'ı
+
+Kullanım:
+    python benchmarks/bench_export.py [--rows 1000 10000 50000] [--skip-memory]
+
+convert_to_target_format çıktısı (satır sayısının iki katı + ayırıcı) için şunlar karşılaştırılır:
+  - Eski yol: format_amount_columns ile tüm tablonun kopyası, ardından DataFrame.to_excel / to_csv
+  - export_writer: parça parça biçimlendirme, write-only çalışma kitabı (excel_export / csv_export)
+Süre ve en yüksek bellek (tracemalloc) ayrı çalıştırmalarda ölçülür; tracemalloc yazmayı çok yavaşlatır.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export_writer import csv_export, excel_export
+from utils import convert_to_target_format, format_amount_columns
+
+def make_output(row_count, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Tarih": (pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, row_count), unit="D")).strftime("%d.%m.%Y"),
+        "Açıklama": [f"POS SATIS MIGROS {i} ISTANBUL" for i in range(row_count)],
+        "Tutar": np.round(rng.normal(0, 2500, row_count), 2),
+    })
+    return convert_to_target_format(df)
+
+def legacy_excel(output_df):
+    buffer = io.BytesIO()
+    format_amount_columns(output_df.drop(columns=["is_separator"])).to_excel(buffer, index=False, engine="openpyxl")
+    return buffer
+
+def legacy_csv(output_df):
+    buffer = io.BytesIO()
+    format_amount_columns(output_df.drop(columns=["is_separator"])).to_csv(buffer, index=False, encoding="utf-8-sig", sep=";")
+    return buffer
+
+def measure(function, output_df, skip_memory):
+    start = time.perf_counter()
+    function(output_df)
+    elapsed = time.perf_counter() - start
+    if skip_memory:
+        return elapsed, float("nan")
+    tracemalloc.start()
+    function(output_df)
+    peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return elapsed, peak_mb
+
+def run(row_counts, skip_memory):
+    print(f"{'Satır':>8} | {'Biçim':>5} | {'Eski (sn)':>9} | {'Yeni (sn)':>9} | {'Eski bellek (MB)':>16} | {'Yeni bellek (MB)':>16}")
+    print("-" * 80)
+    for row_count in row_counts:
+        output_df = make_output(row_count)
+        for label, legacy, new in [("xlsx", legacy_excel, excel_export), ("csv", legacy_csv, csv_export)]:
+            legacy_elapsed, legacy_peak = measure(legacy, output_df, skip_memory)
+            new_elapsed, new_peak = measure(new, output_df, skip_memory)
+            print(f"{len(output_df):>8,} | {label:>5} | {legacy_elapsed:>9.2f} | {new_elapsed:>9.2f} | {legacy_peak:>16.1f} | {new_peak:>16.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--skip-memory", action="store_true")
+    args = parser.parse_args()
+    run(args.rows, args.skip_memory)
@@ -0,0 +1,119 @@
+"""
+Banka parmak izi taraması (identify_bank_format 4. aşama) için ölçeklenme benchmark'ı
+
+Kullanım:
+    python benchmarks/bench_fingerprint_scan.py [--max-rows 100000] [--max-formats 64]
+
+Satır sayısı ve format sayısı arttıkça eski iç içe döngü ile tek tarayıcılı
+(scan_fingerprints) taramanın süresini ve tüm identify_bank_format süresini yazdırır.
+İki taramanın sonuçlarının aynı olduğu da kontrol edilir.
+"""
+import argparse
+import json
+import os
+import string
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bank_config
+from bank_config import BANK_FINGERPRINTS, DEFAULT_BANK_FORMATS, build_fingerprint_scanner, compile_bank_format, scan_fingerprints
+
+ROW_COUNTS = [1_000, 10_000, 100_000]
+FORMAT_COUNTS = [4, 16, 64]
+
+def make_formats(format_count, seed=0):
+    """
+    Varsayılan 4 formata rastgele parmak izli sentetik formatlar ekle
+    """
+    rng = np.random.default_rng(seed)
+    formats = [dict(f) for f in DEFAULT_BANK_FORMATS]
+    letters = np.array(list(string.ascii_uppercase))
+    for index in range(len(formats), format_count):
+        fingerprints = ["".join(rng.choice(letters, rng.integers(3, 7))) for _ in range(8)]
+        formats.append({
+            "id": f"bank_{index}",
+            "name": f"Banka {index}",
+            "header_identifier": ["Tarih", "Açıklama", "Tutar"],
+            "active": True,
+            "fingerprints": fingerprints,
+        })
+    return formats
+
+def make_statement(row_count, formats, seed=0):
+    """
+    Açıklamalarında farklı bankaların parmak izleri geçen sentetik bir ekstre üret
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = [fp for f in formats for fp in f.get("fingerprints", BANK_FINGERPRINTS.get(f["id"], []))]
+    vocabulary += ["POS SATIS", "EFT", "HAVALE", "MIGROS", "FATURA", "KIRA"]
+    words = rng.choice(vocabulary, (row_count, 3))
+    references = rng.integers(0, row_count // 3 + 1, row_count)
+    descriptions = [f"{a} {b} {c} REF{ref}" for (a, b, c), ref in zip(words.tolist(), references.tolist())]
+    return pd.DataFrame({
+        "Tarih": "01.01.2024",
+        "Açıklama": descriptions,
+        "Tutar": np.round(rng.normal(0, 1000, row_count), 2),
+    })
+
+def legacy_scan(compiled_formats, cells):
+    """
+    4. aşamanın eski hali: her banka, her hücre ve her parmak izi için ayrı kontrol
+    """
+    results = {}
+    for entry in compiled_formats:
+        fingerprint_matches = 0
+        matched_fp = []
+        for val_upper in cells:
+            for fp in entry["fingerprints"]:
+                if fp in val_upper:
+                    fingerprint_matches += 1
+                    if fp not in matched_fp:
+                        matched_fp.append(fp)
+        if fingerprint_matches > 0:
+            results[entry["id"]] = (fingerprint_matches, matched_fp)
+    return results
+
+def run(max_rows, max_formats):
+    print(f"{'Satır':>8} | {'Format':>6} | {'Eski tarama (sn)':>16} | {'Tarayıcı (sn)':>13} | {'identify (sn)':>13}")
+    print("-" * 70)
+    with tempfile.TemporaryDirectory() as config_dir:
+        bank_config.CONFIG_DIR = config_dir
+        bank_config.CONFIG_FILE = os.path.join(config_dir, "bank_formats.json")
+        for format_count in [count for count in FORMAT_COUNTS if count <= max_formats]:
+            formats = make_formats(format_count)
+            with open(bank_config.CONFIG_FILE, "w", encoding="utf-8") as f:
+                json.dump(formats, f, ensure_ascii=False)
+            compiled = [compile_bank_format(f) for f in formats]
+            scanner = build_fingerprint_scanner(compiled)
+
+            for row_count in [count for count in ROW_COUNTS if count <= max_rows]:
+                df = make_statement(row_count, formats)
+                cells = df["Açıklama"].astype(str).str.upper().tolist()
+
+                start = time.perf_counter()
+                expected = legacy_scan(compiled, cells)
+                legacy_elapsed = time.perf_counter() - start
+
+                start = time.perf_counter()
+                scanned = scan_fingerprints(scanner, cells)
+                scan_elapsed = time.perf_counter() - start
+                assert scanned == expected
+
+                start = time.perf_counter()
+                bank_config.identify_bank_format(df)
+                identify_elapsed = time.perf_counter() - start
+
+                print(f"{row_count:>8,} | {format_count:>6} | {legacy_elapsed:>16.3f} | {scan_elapsed:>13.3f} | {identify_elapsed:>13.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-rows", type=int, default=ROW_COUNTS[-1])
+    parser.add_argument("--max-formats", type=int, default=FORMAT_COUNTS[-1])
+    args = parser.parse_args()
+    run(args.max_rows, args.max_formats)
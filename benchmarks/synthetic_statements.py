@@ -0,0 +1,205 @@
+"""
+bank_formats.json'daki formatlar için gerçekçi sentetik banka ekstreleri üreten yardımcı modül
+
+Benchmark'lar tarafından içe aktarılır; tek başına çalıştırıldığında örnek dosyalar üretir:
+    python benchmarks/synthetic_statements.py --output /tmp/ekstreler [--rows 100] [--files-per-format 3]
+
+Her dosyada başlık öncesi satırlar (banka adı, dönem, IBAN), başlık satırının konumu, satır sayısı,
+açıklama sözlüğü (bankanın parmak izleri, diğer bankaların adları, genel işlemler), tarih ve tutar
+biçimleri ile dosya adı (banka adı, alternatif isim veya genel bir ad) rastgele seçilir.
+Üretilen her dosya için beklenen banka id'si ve başlık satırı da döndürülür.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_config import compile_bank_format
+from file_reader import read_csv_statement
+from utils import format_turkish_currency_series
+
+# Bankadan bağımsız işlem açıklamaları
+GENERIC_DESCRIPTIONS = [
+    "POS SATIS MIGROS*1234 ISTANBUL",
+    "EFT - AHMET YILMAZ / KIRA ODEMESI",
+    "FAST GELEN: ŞİRKET A.Ş. FATURA NO:556",
+    "HAVALE (GİDEN) - TEDARİKÇİ ÖDEMESİ",
+    "ELEKTRIK FATURASI OTOMATIK ODEME",
+    "SGK PRIM ODEMESI",
+    "MAAS ODEMESI",
+    "ATM PARA CEKME",
+    "INTERNET ALISVERIS TRENDYOL",
+    "VERGI ODEMESI GIB",
+]
+
+# Başlıktan önce gelen satırlar; {name} bankanın adıyla doldurulur
+TITLE_LINES = [
+    "{name}",
+    "{name_upper} HESAP HAREKETLERİ",
+    "HESAP EKSTRESİ",
+    "Müşteri No: 12345678",
+    "IBAN: TR12 0006 2000 0000 0012 3456 78",
+    "Dönem: 01.01.2024 - 31.12.2024",
+]
+
+# Bankayı belli etmeyen dosya adları (sadece içerik analizi tanıyabilir)
+GENERIC_FILE_NAMES = ["hesap_hareketleri", "ekstre", "export", "rapor_2024", "Dokum (3)", "indirilenler"]
+
+DATE_FORMATS = ["%d.%m.%Y", "%d/%m/%Y", "%d.%m.%Y %H:%M"]
+
+def statement_columns(bank_format):
+    """
+    Formatın ekstresinde bulunacak sütunlar: başlık tanımlayıcıları ve eşlenen sütunlar, sırasıyla
+    """
+    columns = list(bank_format.get("columns") or bank_format.get("header_identifier", []))
+    for key in ["date_col", "description_col", "amount_col", "debit_col", "credit_col", "balance_col"]:
+        if bank_format.get(key) and bank_format[key] not in columns:
+            columns.append(bank_format[key])
+    return columns
+
+def make_file_name(bank_format, rng, extension):
+    """
+    Dosya adı üret: banka adı, alternatif isim veya bankayı belli etmeyen genel bir ad
+    Returns: (dosya adı, dosya adı bankayı belli ediyor mu)
+    """
+    compiled = compile_bank_format(bank_format)
+    choice = rng.random()
+    if choice < 0.4 or not (compiled["aliases"] or compiled["name_lower"]):
+        stem = str(rng.choice(GENERIC_FILE_NAMES))
+        return f"{stem}.{extension}", False
+    if choice < 0.7 or not compiled["aliases"]:
+        stem = compiled["name_lower"].replace(" ", str(rng.choice(["_", " ", ""])))
+    else:
+        stem = str(rng.choice(compiled["aliases"]))
+    suffix = str(rng.choice(["_ekstre", " hesap ozeti", "_2024", "", "-dekont"]))
+    return f"{stem}{suffix}.{extension}", True
+
+def make_descriptions(bank_format, other_formats, row_count, rng):
+    """
+    Açıklama sütunu: genel işlemler, bankanın kendi parmak izleri ve ara sıra diğer bankaların adları
+    """
+    own = compile_bank_format(bank_format)["fingerprints"]
+    others = [fp for other in other_formats for fp in compile_bank_format(other)["fingerprints"]]
+    vocabulary = GENERIC_DESCRIPTIONS + own * 2 + others[:len(own) // 2]
+    first = rng.choice(vocabulary, row_count)
+    second = rng.choice(GENERIC_DESCRIPTIONS, row_count)
+    references = rng.integers(100000, 999999, row_count)
+    return [f"{a} {b} REF:{ref}" for a, b, ref in zip(first.tolist(), second.tolist(), references.tolist())]
+
+def make_statement(bank_format, row_count, other_formats=(), seed=0):
+    """
+    Bir format için sentetik ekstre ızgarası üret
+    Returns: (satır listesi - başlık öncesi satırlar ve başlık dahil, veri DataFrame'i, başlık öncesi satır sayısı)
+    """
+    rng = np.random.default_rng(seed)
+    columns = statement_columns(bank_format)
+    name = bank_format.get("name", bank_format["id"])
+
+    # Başlık öncesi satırlar: hiç yok, sadece banka adı veya banka adı ile birkaç bilgi satırı
+    title_count = int(rng.choice([0, 0, 1, 3, 5]))
+    preamble = []
+    for line in TITLE_LINES[:title_count]:
+        row = [""] * len(columns)
+        row[0] = line.format(name=name, name_upper=name.upper())
+        preamble.append(row)
+    if title_count and rng.random() < 0.5:
+        preamble.append([""] * len(columns))
+
+    days = rng.integers(0, 365, row_count)
+    timestamps = pd.Timestamp("2024-01-01") + pd.to_timedelta(days, unit="D") + pd.to_timedelta(rng.integers(0, 86400, row_count), unit="s")
+    dates = timestamps.strftime(str(rng.choice(DATE_FORMATS)))
+    amounts = np.round(rng.normal(0, 2500, row_count), 2)
+    as_text = rng.random() < 0.5
+
+    def amount_values(values):
+        return format_turkish_currency_series(values).to_numpy() if as_text else values
+
+    data = {}
+    for column in columns:
+        if column == bank_format.get("date_col"):
+            data[column] = dates
+        elif column == bank_format.get("description_col"):
+            data[column] = make_descriptions(bank_format, other_formats, row_count, rng)
+        elif column == bank_format.get("amount_col"):
+            data[column] = amount_values(amounts)
+        elif column == bank_format.get("debit_col"):
+            data[column] = amount_values(np.where(amounts < 0, -amounts, 0.0))
+        elif column == bank_format.get("credit_col"):
+            data[column] = amount_values(np.where(amounts > 0, amounts, 0.0))
+        elif column == bank_format.get("balance_col"):
+            data[column] = amount_values(np.round(10000 + np.cumsum(amounts), 2))
+        else:
+            data[column] = rng.integers(1, 10**6, row_count).astype(str)
+
+    return preamble + [columns], pd.DataFrame(data, columns=columns), len(preamble)
+
+def write_statement(path, header_rows, data):
+    """
+    Izgarayı uzantıya göre CSV veya XLSX olarak yaz (pandas başlığı ilk satırdan okur)
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            pd.DataFrame(header_rows).to_csv(f, header=False, index=False)
+            data.to_csv(f, header=False, index=False)
+    else:
+        grid = pd.concat([pd.DataFrame(header_rows, dtype=object), pd.DataFrame(data.to_numpy(dtype=object))], ignore_index=True)
+        grid.to_excel(path, header=False, index=False, engine="openpyxl")
+
+def generate_statement(bank_format, row_count, directory, extension="csv", other_formats=(), seed=0):
+    """
+    Bir sentetik ekstre dosyası üret ve beklenen tespit sonucunu döndür
+    expected_header_row: pandas dosyayı okuduğunda başlığın bulunduğu satır (sütun adlarıysa None)
+    """
+    rng = np.random.default_rng(seed)
+    file_name, name_hint = make_file_name(bank_format, rng, extension)
+    header_rows, data, preamble_rows = make_statement(bank_format, row_count, other_formats, seed=seed)
+    path = os.path.join(directory, f"{seed}_{file_name}")
+    write_statement(path, header_rows, data)
+    return {
+        "bank_id": bank_format["id"],
+        "path": path,
+        "file_name": file_name,
+        "name_hint": name_hint,
+        "rows": row_count,
+        "expected_header_row": preamble_rows - 1 if preamble_rows else None,
+    }
+
+def read_statement(path):
+    """
+    Dosyayı uygulamanın okuduğu gibi oku
+    """
+    if path.endswith(".csv"):
+        return read_csv_statement(path)
+    return pd.read_excel(path, engine="openpyxl")
+
+def load_formats(config_file):
+    """
+    bank_formats.json'daki aktif formatları yükle
+    """
+    with open(config_file, encoding="utf-8") as f:
+        return [bank_format for bank_format in json.load(f) if bank_format.get("active", True)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--files-per-format", type=int, default=3)
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bank_configs", "bank_formats.json"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    formats = load_formats(args.config)
+    seed = args.seed
+    for bank_format in formats:
+        others = [other for other in formats if other is not bank_format]
+        for index in range(args.files_per_format):
+            extension = "xlsx" if index % 2 else "csv"
+            statement = generate_statement(bank_format, args.rows, args.output, extension, others, seed=seed)
+            print(f"{statement['bank_id']:>12} | başlık: {statement['expected_header_row']} | {statement['path']}")
+            seed += 1
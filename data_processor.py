@@ -1,37 +1,37 @@
 import pandas as pd
 import numpy as np
-from utils import clean_description, format_date
+from utils import clean_description_series, format_date_series, parse_amount_series, assign_debit_credit, NORMALIZED_DATE_FORMAT
 
-def process_data(df):
+def guess_columns(df):
     """
-    Process a generic bank statement when the specific format is not recognized
-    This is a fallback processor that tries to identify key columns based on common patterns
+    Tanınmayan ekstrede tarih, açıklama, tutar ve belge numarası sütunlarını sütun adlarından,
+    bulunamazsa içerikten tahmin et
+    Returns: {"date_col", "date_guessed", "description_col", "amount_col", "document_col"}
+    (bulunamayan sütunlar None; date_guessed tarih sütunu adından değil içeriğinden bulunduysa True)
     """
     # Try to identify key columns by name patterns
     date_columns = [col for col in df.columns if any(key in str(col).lower() for key in ['tarih', 'date', 'datum'])]
     description_columns = [col for col in df.columns if any(key in str(col).lower() for key in ['açıklama', 'aciklama', 'description', 'detail', 'detay'])]
     amount_columns = [col for col in df.columns if any(key in str(col).lower() for key in ['tutar', 'amount', 'betrag', 'miktar'])]
     
-    # Create a new dataframe
-    processed_df = pd.DataFrame()
+    columns = {"date_col": None, "date_guessed": False, "description_col": None, "amount_col": None, "document_col": None}
     
-    # Process date column
+    # Date column
     if date_columns:
         # Use the first identified date column
-        processed_df['Tarih'] = df[date_columns[0]].apply(format_date)
+        columns["date_col"] = date_columns[0]
     else:
         # Try to find a column that looks like a date
         for col in df.columns:
             if df[col].dtype == 'object' and pd.to_datetime(df[col], errors='coerce').notna().sum() > 0.5 * len(df):
-                processed_df['Tarih'] = pd.to_datetime(df[col], errors='coerce').apply(lambda x: x.strftime('%d.%m.%Y') if not pd.isna(x) else '')
+                columns["date_col"] = col
+                columns["date_guessed"] = True
                 break
-        else:
-            processed_df['Tarih'] = ""
     
-    # Process description column
+    # Description column
     if description_columns:
         # Use the first identified description column
-        processed_df['Açıklama'] = df[description_columns[0]].apply(clean_description)
+        columns["description_col"] = description_columns[0]
     else:
         # Try to find text-heavy columns
         text_columns = []
@@ -44,45 +44,79 @@ def process_data(df):
         if text_columns:
             # Use the column with the longest average text
             text_columns.sort(key=lambda x: x[1], reverse=True)
-            processed_df['Açıklama'] = df[text_columns[0][0]].apply(clean_description)
-        else:
-            processed_df['Açıklama'] = ""
+            columns["description_col"] = text_columns[0][0]
     
-    # Process amount column
+    # Amount column
     if amount_columns:
         # Use the first identified amount column
-        amount_col = amount_columns[0]
-        processed_df['Tutar'] = pd.to_numeric(df[amount_col].astype(str).str.replace(',', '.').str.replace('[^0-9.-]', '', regex=True), errors='coerce')
+        columns["amount_col"] = amount_columns[0]
     else:
         # Try to find numeric columns that could be amounts
-        numeric_columns = []
         for col in df.columns:
             try:
-                # Convert to string, replace comma with dot, and remove currency symbols or spaces
-                values = df[col].astype(str).str.replace(',', '.').str.replace('[^0-9.-]', '', regex=True)
-                numeric_values = pd.to_numeric(values, errors='coerce')
+                # Türkçe/İngilizce sayı biçimlerini ve para birimlerini çözümle
+                numeric_values = parse_amount_series(df[col])
                 # If most values are valid numbers and have decent variance, it might be an amount column
                 if numeric_values.notna().sum() > 0.5 * len(df) and numeric_values.var() > 0:
-                    numeric_columns.append(col)
+                    # Use the first identified numeric column
+                    columns["amount_col"] = col
+                    break
             except:
                 continue
-        
-        if numeric_columns:
-            # Use the first identified numeric column
-            amount_col = numeric_columns[0]
-            processed_df['Tutar'] = pd.to_numeric(df[amount_col].astype(str).str.replace(',', '.').str.replace('[^0-9.-]', '', regex=True), errors='coerce')
-        else:
-            processed_df['Tutar'] = 0
     
-    # Set a default Dekont No (document number)
-    processed_df['Dekont No'] = ""
+    # Dekont No (document number)
     for col in df.columns:
         if any(key in str(col).lower() for key in ['dekont', 'belge', 'document', 'no', 'numara', 'number']):
-            processed_df['Dekont No'] = df[col].astype(str)
+            columns["document_col"] = col
             break
     
+    return columns
+
+def process_data(df, columns=None):
+    """
+    Process a generic bank statement when the specific format is not recognized
+    This is a fallback processor that tries to identify key columns based on common patterns
+    columns verilirse (guess_columns) sütunlar tekrar tahmin edilmez; parça parça işlenen dosyada
+    her parça ilk parçadan belirlenen sütunlarla işlenir
+    """
+    if columns is None:
+        columns = guess_columns(df)
+    
+    # Create a new dataframe
+    processed_df = pd.DataFrame()
+    
+    # Process date column
+    date_col = columns["date_col"]
+    if date_col is None:
+        processed_df['Tarih'] = ""
+    elif columns["date_guessed"]:
+        processed_df['Tarih'] = pd.to_datetime(df[date_col], errors='coerce').apply(lambda x: x.strftime('%d.%m.%Y') if not pd.isna(x) else '')
+    else:
+        processed_df['Tarih'] = format_date_series(df[date_col])
+        # Tarihler artık GG.AA.YYYY formatında, sonraki aşamalar format tahminini atlayabilir
+        processed_df.attrs['date_format'] = NORMALIZED_DATE_FORMAT
+    
+    # Process description column
+    if columns["description_col"] is not None:
+        processed_df['Açıklama'] = clean_description_series(df[columns["description_col"]])
+        # Açıklamalar temizlendi, dönüşüm aşaması tekrar temizlemez
+        processed_df.attrs['descriptions_clean'] = True
+    else:
+        processed_df['Açıklama'] = ""
+    
+    # Process amount column
+    if columns["amount_col"] is not None:
+        processed_df['Tutar'] = parse_amount_series(df[columns["amount_col"]])
+    else:
+        processed_df['Tutar'] = 0
+    
+    # Set a default Dekont No (document number)
+    if columns["document_col"] is not None:
+        processed_df['Dekont No'] = df[columns["document_col"]].astype(str)
+    else:
+        processed_df['Dekont No'] = ""
+    
     # Calculate Borç and Alacak based on Tutar
-    processed_df['Borç'] = processed_df['Tutar'].apply(lambda x: abs(x) if x < 0 else 0)
-    processed_df['Alacak'] = processed_df['Tutar'].apply(lambda x: x if x > 0 else 0)
+    processed_df = assign_debit_credit(processed_df)
     
     return processed_df
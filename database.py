@@ -5,6 +5,9 @@ from sqlalchemy import create_engine, text, Column, Integer, String, DateTime, F
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime, timedelta
+from logging_config import get_logger
+
+logger = get_logger("database")
 
 # PostgreSQL veritabanı URL'sini çevresel değişkenden al
 DATABASE_URL = os.environ.get("DATABASE_URL")
@@ -14,17 +17,17 @@ db_available = False
 
 # SQLAlchemy engine oluştur (PostgreSQL için)
 try:
-    print(f"PostgreSQL veritabanı bağlantısı kuruluyor...")
+    logger.debug("PostgreSQL veritabanı bağlantısı kuruluyor...")
     # PostgreSQL veritabanı bağlantısı oluştur
     engine = create_engine(DATABASE_URL)
     # Test bağlantısı
     connection = engine.connect()
     connection.close()
-    print("PostgreSQL veritabanı bağlantısı başarıyla kuruldu!")
+    logger.info("PostgreSQL veritabanı bağlantısı başarıyla kuruldu!")
     db_available = True
 except Exception as e:
-    print(f"PostgreSQL veritabanı bağlantısı kurulamadı: {str(e)}")
-    print("Uygulama veritabanı olmadan çalışmaya devam edecek.")
+    logger.error("PostgreSQL veritabanı bağlantısı kurulamadı: %s", e)
+    logger.warning("Uygulama veritabanı olmadan çalışmaya devam edecek.")
     engine = None
 
 Base = declarative_base()
@@ -63,7 +66,7 @@ def save_bank_statement(file_name, bank_type, original_df, processed_df):
     """
     # Veritabanı bağlantısı yoksa işlem yapılmaz
     if not db_available or Session is None:
-        print("Veritabanı bağlantısı bulunmadığı için kayıt yapılamıyor")
+        logger.warning("Veritabanı bağlantısı bulunmadığı için kayıt yapılamıyor")
         return None
         
     try:
@@ -88,11 +91,11 @@ def save_bank_statement(file_name, bank_type, original_df, processed_df):
         statement_id = new_statement.id
         session.close()
         
-        print(f"Banka ekstresi başarıyla kaydedildi. ID: {statement_id}")
+        logger.info("Banka ekstresi başarıyla kaydedildi. ID: %s", statement_id)
         return statement_id
     
     except Exception as e:
-        print(f"Veritabanı kaydetme hatası: {str(e)}")
+        logger.error("Veritabanı kaydetme hatası: %s", e)
         if 'session' in locals() and session:
             session.rollback()
             session.close()
@@ -104,7 +107,7 @@ def save_conversion(bank_statement_id, conversion_format, settings=None):
     """
     # Veritabanı bağlantısı yoksa işlem yapılmaz
     if not db_available or Session is None:
-        print("Veritabanı bağlantısı bulunmadığı için dönüşüm kaydedilemedi")
+        logger.warning("Veritabanı bağlantısı bulunmadığı için dönüşüm kaydedilemedi")
         return None
         
     try:
@@ -129,7 +132,7 @@ def save_conversion(bank_statement_id, conversion_format, settings=None):
         return conversion_id
     
     except Exception as e:
-        print(f"Dönüşüm kaydetme hatası: {str(e)}")
+        logger.error("Dönüşüm kaydetme hatası: %s", e)
         if 'session' in locals() and session:
             session.rollback()
             session.close()
@@ -141,7 +144,7 @@ def get_recent_bank_statements(limit=10):
     """
     # Veritabanı bağlantısı yoksa boş liste döndür
     if not db_available or Session is None:
-        print("Veritabanı bağlantısı bulunmadığı için son kayıtlar alınamadı")
+        logger.warning("Veritabanı bağlantısı bulunmadığı için son kayıtlar alınamadı")
         return []
         
     try:
@@ -161,7 +164,7 @@ def get_recent_bank_statements(limit=10):
         return result
     
     except Exception as e:
-        print(f"Kayıtları alma hatası: {str(e)}")
+        logger.error("Kayıtları alma hatası: %s", e)
         if 'session' in locals() and session:
             session.close()
         return []
@@ -172,7 +175,7 @@ def get_bank_statement(statement_id):
     """
     # Veritabanı bağlantısı yoksa None döndür
     if not db_available or Session is None:
-        print("Veritabanı bağlantısı bulunmadığı için kayıt alınamadı")
+        logger.warning("Veritabanı bağlantısı bulunmadığı için kayıt alınamadı")
         return None
         
     try:
@@ -211,7 +214,7 @@ def get_bank_statement(statement_id):
                     'processed_df': processed_df
                 }
             except Exception as df_error:
-                print(f"DataFrame dönüştürme hatası: {str(df_error)}")
+                logger.error("DataFrame dönüştürme hatası: %s", df_error)
                 # Hataya rağmen bazı verileri dönebilmek için
                 result = {
                     'id': statement.id,
@@ -227,7 +230,7 @@ def get_bank_statement(statement_id):
         return result
     
     except Exception as e:
-        print(f"Kayıt alma hatası: {str(e)}")
+        logger.error("Kayıt alma hatası: %s", e)
         if 'session' in locals() and session:
             session.close()
         return None
@@ -325,14 +328,14 @@ def purge_database():
 # Veritabanı tablolarını oluştur
 def create_tables():
     if not engine:
-        print("Veritabanı engine olmadığı için tablolar oluşturulamadı")
+        logger.warning("Veritabanı engine olmadığı için tablolar oluşturulamadı")
         return False
         
     try:
         Base.metadata.create_all(engine)
         return True
     except Exception as e:
-        print(f"Veritabanı tabloları oluşturulurken hata: {str(e)}")
+        logger.error("Veritabanı tabloları oluşturulurken hata: %s", e)
         return False
 
 # Uygulama başlangıcında tabloları oluşturmayı dene
@@ -340,6 +343,6 @@ if db_available and engine:
     try:
         create_tables()
     except Exception as e:
-        print(f"Veritabanı oluşturma hatası: {str(e)}")
+        logger.error("Veritabanı oluşturma hatası: %s", e)
 else:
-    print("Veritabanı bağlantısı kurulamadı, tablolar oluşturulmayacak")
\ No newline at end of file
+    logger.warning("Veritabanı bağlantısı kurulamadı, tablolar oluşturulmayacak")
\ No newline at end of file
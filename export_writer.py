@@ -0,0 +1,341 @@
+"""
+İşlenmiş ekstrelerin indirme dosyaları (Excel ve CSV)
+
+Çıktı EXPORT_CHUNK_ROWS satırlık parçalar halinde biçimlendirilip yazılır; tutarların biçimlendirilmiş
+kopyası tüm tablo için aynı anda oluşturulmaz. Excel dosyası openpyxl'in write-only modunda satır
+satır yazılır, çalışma kitabı bellekte DOM olarak tutulmaz. Üst ve alt bölümü ayıran satır
+(is_separator) sarı dolgu ile biçimlendirilir.
+
+Dosyalar sadece kullanıcı istediğinde oluşturulur (requested_exports) ve sonuç anahtarı + biçim ile
+bellekte tutulur (build_exports); Streamlit'in her yeniden çalıştırmasında tekrar yazılmaz. Akış modunda
+işlenen büyük dosyaların Excel çıktısı da ilk istendiğinde CSV çıktısından yazılıp akış modu kaydına
+eklenir (requested_stream_exports).
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from logging_config import get_logger
+from result_cache import stream_result_file
+from utils import format_amount_columns, SEPARATOR_DESCRIPTION
+
+logger = get_logger("export_writer")
+
+# Bir seferde biçimlendirilip yazılan satır sayısı
+EXPORT_CHUNK_ROWS = 10_000
+
+# İndirme dosyalarının biçimi
+CSV_SEPARATOR = ';'
+CSV_ENCODING = 'utf-8-sig'
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIME = "text/csv"
+EXCEL_SHEET_NAME = "Sheet1"
+
+# Önizlemedeki ayırıcı satırla aynı renkler (gold / orange)
+SEPARATOR_FILL = PatternFill(fill_type='solid', start_color='FFFFD700', end_color='FFFFD700')
+SEPARATOR_FONT = Font(bold=True, color='FF000000')
+HEADER_FONT = Font(bold=True)
+
+def export_frame(df):
+    """
+    Tabloyu indirme biçimine getir: dışa aktarılmayacak sütunlar (is_separator) çıkarılır,
+    tutarlar Türk Lirası formatına çevrilir
+    """
+    columns_to_remove = [col for col in df.attrs.get('export_columns_to_remove', ['is_separator']) if col in df.columns]
+    return format_amount_columns(df.drop(columns=columns_to_remove))
+
+def frame_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    DataFrame'i satır parçalarına böl (parçalar kopya değil görünümdür, attrs korunur)
+    """
+    if len(df) == 0:
+        yield df
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def csv_file_chunks(path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    İndirme biçiminde yazılmış CSV dosyasını (örn. akış modunun çıktısı) metin hücreleriyle parça parça oku
+    """
+    yield from pd.read_csv(path, sep=CSV_SEPARATOR, encoding=CSV_ENCODING, dtype=str,
+                           keep_default_na=False, chunksize=chunk_rows)
+
+def _separator_mask(chunk):
+    """
+    Ayırıcı satırlar: is_separator işaretli veya (CSV'den okunan çıktıda) ayırıcı açıklamasını taşıyan satırlar
+    """
+    mask = np.zeros(len(chunk), dtype=bool)
+    if 'is_separator' in chunk.columns:
+        mask |= (chunk['is_separator'] == True).to_numpy()
+    if 'Detay Açıklama' in chunk.columns:
+        mask |= (chunk['Detay Açıklama'] == SEPARATOR_DESCRIPTION).to_numpy()
+    return mask
+
+def _excel_value(value):
+    # Boş metin ve NaN hücreleri boş bırakılır
+    if value is None or (isinstance(value, str) and value == "") or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value
+
+def _styled_row(sheet, values, font, fill=None):
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(sheet, value=_excel_value(value))
+        cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        cells.append(cell)
+    return cells
+
+def write_excel(chunks, output):
+    """
+    Çıktı parçalarını (frame_chunks / csv_file_chunks) output'a (dosya yolu veya ikili dosya nesnesi)
+    xlsx olarak yaz. Satırlar write-only çalışma sayfasına eklendikçe diske aktarılır, bellek
+    kullanımı satır sayısından bağımsızdır.
+    Returns: yazılan veri satırı sayısı
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(EXCEL_SHEET_NAME)
+    rows = 0
+    header_written = False
+    for chunk in chunks:
+        separators = _separator_mask(chunk)
+        values = export_frame(chunk)
+        if not header_written:
+            sheet.append(_styled_row(sheet, [str(column) for column in values.columns], HEADER_FONT))
+            header_written = True
+        for row, is_separator in zip(values.astype(object).itertuples(index=False, name=None), separators):
+            if is_separator:
+                sheet.append(_styled_row(sheet, row, SEPARATOR_FONT, SEPARATOR_FILL))
+            else:
+                sheet.append([_excel_value(value) for value in row])
+        rows += len(values)
+    workbook.save(output)
+    return rows
+
+def write_csv(chunks, output):
+    """
+    Çıktı parçalarını output'a (ikili dosya nesnesi) indirme biçimindeki CSV olarak yaz
+    Returns: yazılan veri satırı sayısı
+    """
+    # BOM sadece dosyanın başına bir kez yazılır
+    text_output = io.TextIOWrapper(output, encoding=CSV_ENCODING, newline='')
+    rows = 0
+    try:
+        for index, chunk in enumerate(chunks):
+            values = export_frame(chunk)
+            values.to_csv(text_output, index=False, header=index == 0, sep=CSV_SEPARATOR)
+            rows += len(values)
+        text_output.flush()
+    finally:
+        # Çağıranın dosya nesnesi kapatılmadan bırakılır
+        text_output.detach()
+    return rows
+
+def excel_export(df):
+    """
+    İndirme butonu için xlsx içeriği
+    """
+    buffer = io.BytesIO()
+    write_excel(frame_chunks(df), buffer)
+    buffer.seek(0)
+    return buffer
+
+def csv_export(df):
+    """
+    İndirme butonu için CSV içeriği
+    """
+    buffer = io.BytesIO()
+    write_csv(frame_chunks(df), buffer)
+    buffer.seek(0)
+    return buffer
+
+# İndirme biçimleri: yazıcı ve MIME türü
+EXPORT_FORMATS = {
+    'excel': {"writer": write_excel, "mime": EXCEL_MIME},
+    'csv': {"writer": write_csv, "mime": CSV_MIME},
+}
+
+# Akış modu kaydına eklenen Excel dosyasının adı
+STREAM_EXCEL_FILE = "output.xlsx"
+
+# Bellekte tutulan indirme dosyalarının toplam boyut sınırı; aşılınca en uzun süredir kullanılmayanlar atılır
+EXPORT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+_export_cache_lock = threading.Lock()
+_export_cache = {
+    "entries": OrderedDict(),   # (sonuç anahtarı, biçim) -> bytes
+    "bytes": 0,
+    "large": {},                # biçim -> (anahtar, bytes): sınırdan büyük, en son kullanılan dosya
+    "hits": 0,
+    "misses": 0,
+}
+
+def frame_hash(df):
+    """
+    İşlenmiş tablonun içerik özeti (indirme önbelleği anahtarı): sütunlar, değerler ve dışa aktarma ayarları
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([str(column) for column in df.columns]).encode('utf-8'))
+    digest.update(repr(df.attrs.get('export_columns_to_remove', ['is_separator'])).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def render_export(df, export_format):
+    """
+    Tek bir indirme dosyasını oluştur (önbelleğe bakmadan)
+    """
+    buffer = io.BytesIO()
+    EXPORT_FORMATS[export_format]["writer"](frame_chunks(df), buffer)
+    return buffer.getvalue()
+
+def _cached_export(key):
+    with _export_cache_lock:
+        content = _export_cache["entries"].get(key)
+        if content is None:
+            large = _export_cache["large"].get(key[1])
+            if large is not None and large[0] == key:
+                _export_cache["hits"] += 1
+                return large[1]
+            _export_cache["misses"] += 1
+            return None
+        _export_cache["entries"].move_to_end(key)
+        _export_cache["hits"] += 1
+        return content
+
+def _store_export(key, content):
+    with _export_cache_lock:
+        entries = _export_cache["entries"]
+        if key in entries:
+            _export_cache["bytes"] -= len(entries.pop(key))
+        # Sınırdan büyük dosya diğer kayıtları silmez; biçim başına sadece en son kullanılan tutulur,
+        # indirme butonları her yeniden çalıştırmada dosyayı tekrar okumasın
+        if len(content) > EXPORT_CACHE_MAX_BYTES:
+            _export_cache["large"][key[1]] = (key, content)
+            return
+        entries[key] = content
+        _export_cache["bytes"] += len(content)
+        while _export_cache["bytes"] > EXPORT_CACHE_MAX_BYTES:
+            _, evicted = entries.popitem(last=False)
+            _export_cache["bytes"] -= len(evicted)
+
+def build_exports(df, formats=('excel', 'csv'), result_key=None):
+    """
+    İstenen indirme dosyalarını döndür; sadece önbellekte olmayanlar oluşturulur.
+    result_key verilmezse tablonun içerik özeti (frame_hash) kullanılır; geçmiş kayıtlar gibi
+    değişmeyen sonuçlar için kayıt kimliği verilebilir.
+    Returns: {biçim: bytes}
+    """
+    if result_key is None:
+        result_key = frame_hash(df)
+    exports = {}
+    missing = []
+    for export_format in formats:
+        content = _cached_export((result_key, export_format))
+        if content is None:
+            missing.append(export_format)
+        else:
+            exports[export_format] = content
+
+    # Biçimler sırayla yazılır: openpyxl saf Python olduğundan iş parçacıklarıyla paralel yazım
+    # GIL çekişmesi yüzünden sıralı yazımdan yavaş ölçüldü
+    for export_format in missing:
+        exports[export_format] = render_export(df, export_format)
+        _store_export((result_key, export_format), exports[export_format])
+    if missing:
+        logger.debug("İndirme dosyaları oluşturuldu: %s", missing, extra={"result_key": result_key[:12]})
+    return {export_format: exports[export_format] for export_format in formats}
+
+def _exports_requested(button_key, result_key):
+    """
+    "Hazırla" butonu: bu sonuç için indirme dosyaları istendi mi? İstek oturumda hatırlanır
+    """
+    state_key = f"exports_requested_{button_key}"
+    if st.session_state.get(state_key) != result_key:
+        if not st.button("İndirme Dosyalarını Hazırla", key=f"prepare_exports_{button_key}", use_container_width=True):
+            return False
+        st.session_state[state_key] = result_key
+    return True
+
+def requested_exports(df, button_key, result_key=None):
+    """
+    İndirme dosyalarını sadece kullanıcı "hazırla" dediğinde oluştur. Hazırlanan sonuç oturumda
+    hatırlanır; sonraki yeniden çalıştırmalarda dosyalar build_exports önbelleğinden gelir.
+    Returns: {biçim: bytes} veya dosyalar henüz istenmediyse None
+    """
+    if result_key is None:
+        result_key = frame_hash(df)
+    if not _exports_requested(button_key, result_key):
+        return None
+    with st.spinner("İndirme dosyaları hazırlanıyor..."):
+        return build_exports(df, result_key=result_key)
+
+def _file_export(path, cache_key):
+    content = _cached_export(cache_key)
+    if content is None:
+        with open(path, 'rb') as f:
+            content = f.read()
+        _store_export(cache_key, content)
+    return content
+
+def requested_stream_exports(summary, button_key, result_key):
+    """
+    Akış modunda işlenen dosyanın indirme dosyaları (requested_exports gibi "hazırla" butonuyla).
+    CSV çıktısı olduğu gibi verilir; Excel dosyası ilk istendiğinde CSV çıktısından parça parça
+    write-only çalışma kitabına yazılır ve akış modu kaydına eklenir, sonraki isteklerde tekrar yazılmaz.
+    Returns: {biçim: bytes} veya dosyalar henüz istenmediyse (ya da kayıt önbellekten silindiyse) None
+    """
+    if not _exports_requested(button_key, result_key):
+        return None
+    csv_path = summary["output_path"]
+    with st.spinner("İndirme dosyaları hazırlanıyor..."):
+        excel_path = stream_result_file(result_key, STREAM_EXCEL_FILE,
+                                        lambda path: write_excel(csv_file_chunks(csv_path), path))
+        if excel_path is not None:
+            try:
+                return {
+                    'excel': _file_export(excel_path, (f"stream:{result_key}", 'excel')),
+                    'csv': _file_export(csv_path, (f"stream:{result_key}", 'csv')),
+                }
+            except OSError:
+                pass
+    # Kayıt bu sırada önbellek sınırı yüzünden silinmiş olabilir
+    st.error("İndirme dosyaları hazırlanamadı. Lütfen dosyayı tekrar yükleyin.")
+    return None
+
+def get_export_cache_stats():
+    """
+    İndirme önbelleğinin doluluğunu ve isabet oranını döndür
+    """
+    with _export_cache_lock:
+        hits = _export_cache["hits"]
+        misses = _export_cache["misses"]
+        return {
+            "entries": len(_export_cache["entries"]),
+            "bytes": _export_cache["bytes"],
+            "large_entries": len(_export_cache["large"]),
+            "large_bytes": sum(len(content) for _, content in _export_cache["large"].values()),
+            "max_bytes": EXPORT_CACHE_MAX_BYTES,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+def clear_export_cache():
+    """
+    İndirme önbelleğini ve sayaçlarını sıfırla
+    """
+    with _export_cache_lock:
+        _export_cache["entries"].clear()
+        _export_cache["bytes"] = 0
+        _export_cache["large"].clear()
+        _export_cache["hits"] = 0
+        _export_cache["misses"] = 0
@@ -0,0 +1,439 @@
+"""
+Yüklenen ekstre dosyalarını okuma yardımcıları
+
+CSV dosyalarının kodlaması, ayırıcısı, ondalık işareti ve tırnak karakteri dosyanın ilk
+CSV_SNIFF_BYTES baytından tahmin edilir; dosya bu ayarlarla tek seferde okunur.
+Excel dosyaları iki aşamada okunur: banka formatı ve başlık satırı ilk EXCEL_SNIFF_ROWS satırdan
+belirlenir, dosya başlık satırından itibaren sadece kullanılacak sütunlarla tekrar okunur.
+Okuyucu uzantıya değil dosyanın ilk baytlarına göre seçilir (xls uzantılı HTML/CSV dışa aktarımlar).
+"""
+import codecs
+import csv
+import io
+import os
+import re
+from collections import Counter
+from html.parser import HTMLParser
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
+
+from bank_config import detect_bank_format, find_standard_header_row, match_standard_columns
+from logging_config import get_logger
+
+logger = get_logger("file_reader")
+
+# Ayarların tahmin edildiği dosya başı uzunluğu
+CSV_SNIFF_BYTES = 64 * 1024
+
+# Aday ayırıcılar; eşitlikte listedeki sıra (pandas varsayılanı virgül önce) kazanır
+CSV_DELIMITERS = [',', ';', '\t', '|']
+CSV_QUOTECHARS = ['"', "'"]
+
+# UTF-8 olmayan Türkçe dışa aktarımlar çoğunlukla Windows-1254 kodludur
+FALLBACK_ENCODING = 'cp1254'
+_UTF8_ENCODINGS = ('utf-8', 'utf-8-sig')
+
+_BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# Dosya türünü belirleyen ilk baytlar
+_ZIP_MAGIC = b'PK\x03\x04'
+_OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+_HTML_MARKERS = (b'<!doctype html', b'<html', b'<table', b'<meta')
+FILE_SNIFF_BYTES = 1024
+
+# Excel türlerinin okuma motorları; xlsx openpyxl'in salt okunur satır akışıyla okunur
+EXCEL_ENGINES = {'xlsx': 'openpyxl', 'xls': 'xlrd'}
+
+# Excel'de formatın ve başlık satırının arandığı satır sayısı (standardizasyon ilk 20 satıra bakar)
+EXCEL_SNIFF_ROWS = 30
+
+# Formatın sütun eşlemesi; standardizasyon anahtar kelimeyle bulamadığı rolde bunları kullanır
+_MAPPED_COLUMN_KEYS = ["date_col", "description_col", "amount_col", "debit_col", "credit_col", "balance_col"]
+
+# Ondalık virgüllü (1.234,56 / -50,25) ve ondalık noktalı (1,234.56 / -50.25) sayılar
+_COMMA_DECIMAL = re.compile(r'^[-+]?(?:\d{1,3}(?:\.\d{3})+|\d+),\d+$')
+_DOT_DECIMAL = re.compile(r'^[-+]?(?:\d{1,3}(?:,\d{3})+|\d+)\.\d+$')
+
+def _read_prefix(source, size=CSV_SNIFF_BYTES):
+    """
+    Dosyanın ilk baytlarını oku; dosya nesnesinin konumu değişmez
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read(size)
+    position = source.tell()
+    prefix = source.read(size)
+    source.seek(position)
+    return prefix
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+def detect_encoding(prefix):
+    """
+    Dosya başından kodlamayı tahmin et: BOM, geçerli UTF-8, Windows-1254, son çare latin1
+    """
+    for bom, encoding in _BOM_ENCODINGS:
+        if prefix.startswith(bom):
+            return encoding
+    try:
+        # Dosya başı çok baytlı bir karakterin ortasında kesilmiş olabilir
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        prefix.decode(FALLBACK_ENCODING)
+        return FALLBACK_ENCODING
+    except UnicodeDecodeError:
+        return 'latin1'
+
+def _sample_rows(text, delimiter, quotechar, truncated):
+    """
+    Örnek metni verilen ayarlarla satırlara böl; kesilmiş son satır ve boş satırlar atlanır
+    """
+    rows = list(csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar))
+    if truncated and len(rows) > 1:
+        rows = rows[:-1]
+    return [row for row in rows if any(value.strip() for value in row)]
+
+def _detect_quotechar(text):
+    """
+    Alan başında (satır başı veya ayırıcıdan sonra) en sık görülen tırnak karakteri
+    """
+    delimiters = re.escape(''.join(CSV_DELIMITERS))
+    counts = {quotechar: len(re.findall(f'(?:^|[{delimiters}]){quotechar}', text, re.MULTILINE)) for quotechar in CSV_QUOTECHARS}
+    return max(CSV_QUOTECHARS, key=lambda quotechar: counts[quotechar])
+
+def _detect_delimiter(text, quotechar, truncated):
+    """
+    Satırların en tutarlı (en çok satırda aynı) alan sayısını verdiği ayırıcı
+    Eşitlikte daha çok alan üreten, o da eşitse listede önce gelen ayırıcı seçilir
+    """
+    best_delimiter, best_score = CSV_DELIMITERS[0], (0.0, 0)
+    for delimiter in CSV_DELIMITERS:
+        rows = _sample_rows(text, delimiter, quotechar, truncated)
+        if not rows:
+            continue
+        field_count, matches = Counter(len(row) for row in rows).most_common(1)[0]
+        if field_count < 2:
+            continue
+        score = (matches / len(rows), field_count)
+        if score > best_score:
+            best_delimiter, best_score = delimiter, score
+    return best_delimiter
+
+def _detect_decimal(rows, delimiter):
+    """
+    Sayı görünümlü hücrelerin çoğunda ondalık virgül varsa ',' (ayırıcı virgülse her zaman '.')
+    Binlik ayırıcı verilmez: pandas'ın thousands ayarı 01.01.2024 gibi tarihleri de sayıya çevirir
+    """
+    if delimiter == ',':
+        return '.'
+    comma = dot = 0
+    for row in rows:
+        for value in row:
+            value = value.strip()
+            comma += bool(_COMMA_DECIMAL.match(value))
+            dot += bool(_DOT_DECIMAL.match(value))
+    return ',' if comma > dot else '.'
+
+def sniff_csv_options(source):
+    """
+    CSV dosyasının okuma ayarlarını ilk CSV_SNIFF_BYTES bayttan tahmin et
+    source: dosya yolu veya başa sarılabilir dosya nesnesi (konumu değişmez)
+
+    Returns: pd.read_csv'ye verilecek ayarlar (encoding, sep, quotechar, decimal)
+    """
+    prefix = _read_prefix(source)
+    truncated = len(prefix) == CSV_SNIFF_BYTES
+    encoding = detect_encoding(prefix)
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(prefix, final=not truncated)
+
+    quotechar = _detect_quotechar(text)
+    delimiter = _detect_delimiter(text, quotechar, truncated)
+    decimal = _detect_decimal(_sample_rows(text, delimiter, quotechar, truncated), delimiter)
+
+    options = {"encoding": encoding, "sep": delimiter, "quotechar": quotechar, "decimal": decimal}
+    logger.debug("CSV okuma ayarları tahmin edildi", extra=options)
+    return options
+
+def csv_fallback_options(options):
+    """
+    Dosya başı UTF-8 görünüp devamında geçersiz bayt çıkarsa kullanılacak ayarlar (gerekmiyorsa None)
+    """
+    if options.get("encoding", "utf-8") not in _UTF8_ENCODINGS:
+        return None
+    return {**options, "encoding": FALLBACK_ENCODING, "encoding_errors": "replace"}
+
+def read_csv_statement(source, options=None):
+    """
+    CSV ekstresini tahmin edilen ayarlarla tek seferde oku
+    Sadece dosyanın ilk kısmından sonra UTF-8 olmayan bayt çıkarsa FALLBACK_ENCODING ile tekrar okunur
+    """
+    options = options or sniff_csv_options(source)
+    try:
+        return pd.read_csv(source, **options)
+    except UnicodeDecodeError:
+        fallback = csv_fallback_options(options)
+        if fallback is None:
+            raise
+        logger.info("CSV UTF-8 olarak okunamadı, %s ile tekrar deneniyor", FALLBACK_ENCODING)
+        _rewind(source)
+        return pd.read_csv(source, **fallback)
+
+def _excel_column_positions(header_values, bank_format):
+    """
+    Standardizasyonun kullanacağı sütunların konumları: anahtar kelimeyle eşleşen sütunlar ve
+    formatta tanımlı sütunlar. Tarih, açıklama veya tutar bulunamazsa None (tüm sütunlar okunur)
+    """
+    matched = match_standard_columns(header_values)
+    mapped = {bank_format[key] for key in _MAPPED_COLUMN_KEYS if bank_format.get(key) in header_values}
+
+    def has(key):
+        return matched[key] is not None or bank_format.get(key) in mapped
+
+    if not (has("date_col") and has("description_col") and (has("amount_col") or (has("debit_col") and has("credit_col")))):
+        return None
+    needed = {value for value in matched.values() if value is not None} | mapped
+    return [position for position, value in enumerate(header_values) if not pd.isna(value) and value in needed]
+
+def _header_matches(columns, expected):
+    """
+    İkinci okumanın sütun adları ilk okumadaki başlık hücreleriyle aynı mı (boş hücreler hariç)
+    """
+    return len(columns) == len(expected) and all(pd.isna(value) or str(column) == str(value) for column, value in zip(columns, expected))
+
+def detect_file_kind(source):
+    """
+    Dosya türünü uzantıdan bağımsız olarak ilk baytlardan belirle
+    Returns: 'xlsx' (ZIP), 'xls' (OLE2), 'html' (xls uzantılı HTML tablo) veya 'csv' (düz metin)
+    """
+    prefix = _read_prefix(source, FILE_SNIFF_BYTES)
+    if prefix.startswith(_ZIP_MAGIC):
+        return 'xlsx'
+    if prefix.startswith(_OLE2_MAGIC):
+        return 'xls'
+    head = prefix.removeprefix(codecs.BOM_UTF8).lower()
+    if any(marker in head for marker in _HTML_MARKERS):
+        return 'html'
+    return 'csv'
+
+def _convert_xlsx_cell(value):
+    """
+    Hücre değerini pandas'ın openpyxl okuyucusu gibi dönüştür: boş hücre "", tam sayı değerli
+    sayılar int, hata hücreleri NaN
+    """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
+
+def _parse_rows(data, header=0, nrows=None):
+    """
+    Hücre satırlarını pandas'ın Excel okumasındaki gibi DataFrame'e çevir (başlık ve tip çıkarımı)
+    Kısa satırlar en geniş satıra boş hücrelerle tamamlanır
+    """
+    if not data:
+        return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [""] * (width - len(row)) if len(row) < width else row for row in data]
+    return TextParser(data, header=header, skip_blank_lines=False).read(nrows)
+
+def _read_xlsx(source, header=0, nrows=None, usecols=None):
+    """
+    XLSX'in ilk sayfasını openpyxl'in salt okunur satır akışıyla oku; çalışma kitabının tamamı
+    belleğe alınmaz. usecols verilirse sadece bu konumlardaki hücreler saklanır.
+    Sonuç pd.read_excel(engine='openpyxl') ile aynıdır.
+    """
+    if usecols is not None:
+        # pandas gibi sütunlar dosyadaki sırayla döner
+        usecols = sorted(set(usecols))
+    workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        # Bazı dışa aktarımların sayfa boyutu bilgisi yanlıştır
+        sheet.reset_dimensions()
+        rows_needed = None if nrows is None else header + 1 + nrows
+        data = []
+        header_cells = []
+        last_row_with_data = -1
+        for row_number, values in enumerate(sheet.iter_rows(values_only=True)):
+            if usecols is None:
+                row = [_convert_xlsx_cell(value) for value in values]
+                while row and row[-1] == "":
+                    row.pop()
+                has_data = bool(row)
+            else:
+                row = [_convert_xlsx_cell(values[position]) if position < len(values) else "" for position in usecols]
+                has_data = any(value is not None for value in values)
+                if row_number == header:
+                    header_cells = [_convert_xlsx_cell(value) for value in values]
+            if has_data:
+                last_row_with_data = row_number
+            data.append(row)
+            if rows_needed is not None and len(data) >= rows_needed:
+                break
+    finally:
+        workbook.close()
+    data = data[:last_row_with_data + 1]
+    if usecols is None or len(data) <= header:
+        return _parse_rows(data, header=header, nrows=nrows)
+
+    # Sütun adları pandas'taki gibi başlık satırının tamamından çıkarılır (boş ve tekrarlanan
+    # adlar tüm satırdaki konumlarına göre adlandırılır)
+    width = max(len(header_cells), max(usecols, default=-1) + 1)
+    names = _parse_rows([header_cells + [""] * (width - len(header_cells))]).columns
+    columns = pd.Index([names[position] for position in usecols])
+    if len(data) == header + 1:
+        return pd.DataFrame(columns=columns)
+    df = _parse_rows(data[header + 1:], header=None, nrows=nrows)
+    df.columns = columns
+    return df
+
+def _read_sheet(source, engine, header=0, nrows=None, usecols=None):
+    """
+    Çalışma kitabının ilk sayfasını oku: xlsx satır akışıyla, diğerleri pandas ile
+    """
+    _rewind(source)
+    if engine == 'openpyxl':
+        return _read_xlsx(source, header=header, nrows=nrows, usecols=usecols)
+    return pd.read_excel(source, engine=engine, header=header, nrows=nrows, usecols=usecols)
+
+class _HTMLTableParser(HTMLParser):
+    """
+    HTML içindeki tabloların hücre metinlerini satır satır topla (xls uzantılı HTML dışa aktarımlar)
+    Kapatılmamış td/tr etiketleri ve colspan desteklenir
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self._open_tables = []
+        self._cell = None
+        self._colspan = 1
+
+    def _close_cell(self):
+        if self._cell is not None:
+            row = self._open_tables[-1][-1]
+            row.append(' '.join(''.join(self._cell).split()))
+            row.extend([""] * (self._colspan - 1))
+            self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self._close_cell()
+            self._open_tables.append([])
+        elif tag == 'tr' and self._open_tables:
+            self._close_cell()
+            self._open_tables[-1].append([])
+        elif tag in ('td', 'th') and self._open_tables and self._open_tables[-1]:
+            self._close_cell()
+            self._cell = []
+            try:
+                self._colspan = max(1, int(dict(attrs).get('colspan') or 1))
+            except ValueError:
+                self._colspan = 1
+        elif tag == 'br' and self._cell is not None:
+            self._cell.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th', 'tr'):
+            self._close_cell()
+        elif tag == 'table' and self._open_tables:
+            self._close_cell()
+            self.tables.append(self._open_tables.pop())
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+def read_html_statement(source):
+    """
+    xls uzantılı HTML dışa aktarımdaki en büyük tabloyu oku (ilk satır sütun adlarıdır)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            raw = f.read()
+    else:
+        _rewind(source)
+        raw = source.read()
+    parser = _HTMLTableParser()
+    parser.feed(raw.decode(detect_encoding(raw[:CSV_SNIFF_BYTES]), errors='replace'))
+    parser.close()
+    tables = parser.tables + [table for table in parser._open_tables if table]
+    table = max(tables, key=lambda rows: sum(len(row) for row in rows), default=None)
+    if table is None:
+        raise ValueError("HTML dosyasında tablo bulunamadı")
+    rows = [row for row in table if any(value != "" for value in row)]
+    if not rows:
+        raise ValueError("HTML dosyasında tablo bulunamadı")
+    return _parse_rows(rows)
+
+def read_excel_statement(source, engine=None, file_name=None, content_key=None):
+    """
+    Excel ekstresini iki aşamada oku
+    1. İlk EXCEL_SNIFF_ROWS satır okunur; banka formatı ve başlık satırı bunlardan belirlenir
+    2. Dosya başlık satırından itibaren sadece standardizasyonun kullanacağı sütunlarla tekrar okunur
+    Format tanınmazsa veya başlık ikinci okumada doğrulanamazsa dosyanın tamamı okunur.
+
+    Returns: (DataFrame, banka formatı veya None). Format bulunduysa DataFrame başlığa göre
+    düzenlenmiştir ve formatın processed_df alanında da bulunur
+    """
+    sample = _read_sheet(source, engine, nrows=EXCEL_SNIFF_ROWS)
+    bank_format = detect_bank_format(sample, file_name=file_name, content_key=content_key)
+    if bank_format is None:
+        return _read_sheet(source, engine), None
+
+    # Tespit başlığı bulmadıysa standardizasyonun yapacağı arama burada, örnek satırlarda yapılır
+    if bank_format.get("processed_df") is not None:
+        header_row = bank_format["header_row"]
+    else:
+        header_row = find_standard_header_row(sample)
+    header_values = list(sample.iloc[header_row]) if header_row >= 0 else list(sample.columns)
+    positions = _excel_column_positions(header_values, bank_format)
+
+    # Dosyanın ilk satırı pandas'ın sütun adlarıdır; örnekteki header_row dosyada bir alttadır
+    df = _read_sheet(source, engine, header=header_row + 1, usecols=positions)
+    expected = header_values if positions is None else [header_values[position] for position in positions]
+    if not _header_matches(df.columns, expected):
+        logger.info("Excel başlığı ikinci okumada doğrulanamadı, dosyanın tamamı okunuyor",
+                    extra={"header_row": header_row, "columns": len(df.columns)})
+        df = _read_sheet(source, engine)
+        return df, detect_bank_format(df, file_name=file_name, content_key=content_key)
+
+    logger.debug("Excel iki aşamada okundu: %s satır, %s/%s sütun", len(df), len(df.columns), len(header_values),
+                 extra={"bank_id": bank_format["id"], "header_row": header_row})
+    return df, {**bank_format, "processed_df": df}
+
+def read_statement(source, file_name=None, content_key=None):
+    """
+    Ekstre dosyasını türüne (ilk baytlar) uygun okuyucuyla tek seferde oku ve banka formatını belirle
+    Returns: (DataFrame, banka formatı veya None)
+    """
+    kind = detect_file_kind(source)
+    extension = os.path.splitext(file_name or "")[1].lstrip('.').lower()
+    if extension and extension != kind:
+        logger.info("Dosya uzantısı içerikle uyuşmuyor: .%s dosyası %s olarak okunuyor", extension, kind)
+
+    if kind in EXCEL_ENGINES:
+        return read_excel_statement(source, engine=EXCEL_ENGINES[kind], file_name=file_name, content_key=content_key)
+    if kind == 'html':
+        df = read_html_statement(source)
+    else:
+        df = read_csv_statement(source)
+    return df, detect_bank_format(df, file_name=file_name, content_key=content_key)
@@ -0,0 +1,84 @@
+import logging
+import os
+import sys
+from contextvars import ContextVar
+
+# Uygulamanın tüm logger'ları bu kökün altında toplanır (banka.bank_config, banka.utils, ...)
+ROOT_LOGGER_NAME = "banka"
+
+# Varsayılan seviye WARNING: sıcak yollardaki debug/info mesajları formatlanmadan atlanır
+DEFAULT_LOG_LEVEL = os.environ.get("BANKA_LOG_LEVEL", "WARNING").upper()
+
+# Streamlit her oturumun betiğini kendi bağlamında çalıştırır; debug modu sadece o oturumu etkiler
+_session_debug = ContextVar("banka_session_debug", default=False)
+
+# LogRecord'un kendi alanları; bunların dışındaki extra alanları anahtar=değer olarak yazılır
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class KeyValueFormatter(logging.Formatter):
+    """
+    Mesajın sonuna extra ile verilen alanları anahtar=değer çiftleri olarak ekleyen formatter
+    Örnek: 2024-01-01 12:00:00 INFO banka.bank_config: Banka formatı algılandı bank='Garanti' score=12.5
+    """
+    def format(self, record):
+        line = super().format(record)
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS}
+        if fields:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        return line
+
+class SessionLogger(logging.LoggerAdapter):
+    """
+    Oturum bazında debug modunu destekleyen logger
+    Debug modu açık oturumlarda DEBUG/INFO mesajları logger seviyesinden bağımsız yazılır,
+    diğer oturumlar varsayılan seviyede sessiz kalır.
+    """
+    def isEnabledFor(self, level):
+        if _session_debug.get():
+            return True
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level, msg, *args, **kwargs):
+        if self.isEnabledFor(level):
+            msg, kwargs = self.process(msg, kwargs)
+            # Seviye kontrolü yukarıda yapıldı; logger.log tekrar kontrol edip oturum debug modunu yok sayardı
+            self.logger._log(level, msg, args, **kwargs)
+
+    def process(self, msg, kwargs):
+        return msg, kwargs
+
+def _configure_root_logger():
+    """
+    Kök logger'a tek bir stderr handler'ı ekle (modül tekrar yüklense de bir kez)
+    """
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    if not any(getattr(handler, "_banka_handler", False) for handler in root.handlers):
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(KeyValueFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S"))
+        handler._banka_handler = True
+        root.addHandler(handler)
+        root.setLevel(DEFAULT_LOG_LEVEL)
+        # Streamlit'in kök logger'ına tekrar yazılmasın
+        root.propagate = False
+    return root
+
+def get_logger(name):
+    """
+    Modül için oturum debug modunu tanıyan bir logger döndür
+    Mesajlar %-stili argümanlarla verilmeli (logger.debug("Satır %s", row)); böylece
+    seviye kapalıyken formatlama hiç yapılmaz
+    """
+    _configure_root_logger()
+    return SessionLogger(logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}"), {})
+
+def set_session_debug(enabled):
+    """
+    Çalışan oturum (Streamlit betik çalıştırması) için debug modunu aç/kapat
+    """
+    _session_debug.set(bool(enabled))
+
+def is_session_debug():
+    """
+    Çalışan oturumda debug modunun açık olup olmadığını döndür
+    """
+    return _session_debug.get()
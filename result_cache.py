@@ -0,0 +1,393 @@
+"""
+İşlenmiş ekstre sonuçlarının önbelleği
+
+Streamlit her etkileşimde betiği baştan çalıştırır; aynı dosya için okuma, tespit, ayrıştırma ve
+hedef formata dönüştürme tekrarlanmasın diye sonuçlar dosya içeriği özeti, dosya adı ve banka
+formatları sürümüyle anahtarlanıp bellekte tutulur. Toplam boyut RESULT_CACHE_MAX_BYTES ile
+sınırlıdır; aşılınca en uzun süredir kullanılmayan sonuçlar atılır.
+Önbellekten dönen DataFrame'ler oturumlar arasında paylaşılır, yerinde değiştirilmemelidir.
+
+Sonuçlar ayrıca diskte (RESULT_CACHE_DIR) anahtar adlı klasörlerde Parquet olarak saklanır; uygulama
+yeniden başlasa veya başka bir Streamlit süreci aynı dosyayı alsa da tekrar işlenmez. Klasörler geçici
+bir adla yazılıp tek adımda yeniden adlandırılır, silinecek klasörler de önce taşınır; böylece
+süreçler birbirinin yarım yazdığı veya sildiği kaydı okumaz. Disk boyutu RESULT_CACHE_DISK_MAX_BYTES
+ile sınırlıdır, en uzun süredir kullanılmayan kayıtlar (meta.json değişiklik zamanı) silinir.
+
+Akış modunda işlenen büyük dosyaların çıktıları da aynı düzenle STREAM_CACHE_DIR altında aynı anahtarla
+saklanır (çıktı CSV'si, önizleme, özet ve istenince eklenen Excel dosyası); boyutu STREAM_CACHE_MAX_BYTES
+ile sınırlıdır.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from bank_config import content_hash, formats_version
+from logging_config import get_logger
+
+logger = get_logger("result_cache")
+
+# Bellekte tutulan sonuçların (DataFrame'lerin derin bellek kullanımı) toplam boyut sınırı
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Disk önbelleğinin konumu ve boyut sınırı (ortam değişkenleriyle değiştirilebilir)
+RESULT_CACHE_DIR = os.environ.get("BANKA_RESULT_CACHE_DIR", os.path.join("data", "result_cache"))
+RESULT_CACHE_DISK_MAX_BYTES = int(os.environ.get("BANKA_RESULT_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+# Akış modu çıktılarının konumu ve boyut sınırı
+STREAM_CACHE_DIR = os.environ.get("BANKA_STREAM_CACHE_DIR", os.path.join("data", "stream_cache"))
+STREAM_CACHE_MAX_BYTES = int(os.environ.get("BANKA_STREAM_CACHE_MAX_MB", "2048")) * 1024 * 1024
+STREAM_OUTPUT_FILE = "output.csv"
+
+# Kayıt biçimi değişirse eski kayıtlar okunmaz (ıskalama sayılır)
+DISK_CACHE_VERSION = 1
+PARQUET_COMPRESSION = "zstd"
+
+# Çöken süreçlerden kalan geçici klasörler bu süreden eskiyse temizlenir (saniye)
+STALE_TEMP_SECONDS = 3600
+
+_result_cache_lock = threading.Lock()
+_result_cache = {
+    "entries": OrderedDict(),   # anahtar -> (sonuç, boyut)
+    "bytes": 0,
+    "hits": 0,
+    "misses": 0,
+    "disk_hits": 0,
+}
+
+def result_key(content, file_name):
+    """
+    Yüklenen dosyanın sonuç anahtarı: içerik özeti + dosya adı (banka tespiti dosya adını da
+    kullanır) + banka formatları sürümü
+    """
+    digest = hashlib.sha256()
+    for part in (content_hash(content), file_name, formats_version() or ""):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def result_size(result):
+    """
+    Sonuçtaki DataFrame'lerin bellekteki yaklaşık boyutu (bayt)
+    """
+    return int(sum(value.memory_usage(deep=True).sum() for value in result.values() if isinstance(value, pd.DataFrame)))
+
+def _entry_dir(key):
+    return os.path.join(RESULT_CACHE_DIR, key)
+
+def _frame_dtypes(df):
+    return {str(column): str(dtype) for column, dtype in df.dtypes.items()}
+
+def _restore_dtypes(df, dtypes):
+    """
+    Parquet'in farklı çıkardığı tipleri (örn. bool değerli object sütun) kaydedilen tiplere geri çevir;
+    object sütunlarda None olarak dönen boş hücreler pandas okuyucularındaki gibi NaN yapılır
+    """
+    for column in df.columns:
+        dtype = dtypes.get(str(column))
+        if dtype is not None and str(df[column].dtype) != dtype:
+            df[column] = df[column].astype(dtype)
+        if df[column].dtype == object:
+            missing = df[column].isna()
+            if missing.any():
+                df.loc[missing, column] = np.nan
+    return df
+
+def _load_from_disk(key):
+    """
+    Diskteki sonucu oku (yoksa, başka sürümdense veya okunamazsa None)
+    """
+    entry_dir = _entry_dir(key)
+    meta_path = os.path.join(entry_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != DISK_CACHE_VERSION:
+            return None
+        result = {"bank_type": meta["bank_type"], "messages": [tuple(message) for message in meta["messages"]]}
+        for name, dtypes in meta["frames"].items():
+            frame = pd.read_parquet(os.path.join(entry_dir, f"{name}.parquet"))
+            result[name] = _restore_dtypes(frame, dtypes)
+    except Exception as e:
+        # Başka bir süreç kaydı o sırada silmiş olabilir; ıskalama gibi davranılır
+        logger.debug("Disk önbelleği okunamadı: %s", e, extra={"key": key[:12]})
+        return None
+    try:
+        # Son kullanım zamanı (diskteki LRU sırası)
+        os.utime(meta_path)
+    except OSError:
+        pass
+    return result
+
+def _remove_entry(path):
+    """
+    Kaydı önce geçici bir ada taşıyıp sil; okuyan süreçler yarım silinmiş klasör görmez
+    """
+    trash_path = os.path.join(os.path.dirname(path), f".trash.{uuid.uuid4().hex}")
+    try:
+        os.rename(path, trash_path)
+    except OSError:
+        # Başka bir süreç zaten taşıdı
+        return
+    shutil.rmtree(trash_path, ignore_errors=True)
+
+def _disk_entries(cache_dir=None):
+    """
+    Disk önbelleğindeki (varsayılan RESULT_CACHE_DIR) kayıtlar: [(son kullanım zamanı, boyut, klasör)]
+    """
+    cache_dir = cache_dir or RESULT_CACHE_DIR
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    now = time.time()
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try:
+            if name.startswith('.'):
+                if now - os.stat(path).st_mtime > STALE_TEMP_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+                continue
+            last_used = os.stat(os.path.join(path, "meta.json")).st_mtime
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+        except OSError:
+            continue
+        entries.append((last_used, size, path))
+    return entries
+
+def _evict_disk(cache_dir=None, max_bytes=None, keep=None):
+    """
+    Disk önbelleği sınırı aşıyorsa en uzun süredir kullanılmayan kayıtları sil
+    keep: silinmeyecek kayıt klasörü (örn. o an kullanılacak olan yeni kayıt)
+    """
+    max_bytes = RESULT_CACHE_DISK_MAX_BYTES if max_bytes is None else max_bytes
+    entries = sorted(_disk_entries(cache_dir))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        _remove_entry(path)
+        total -= size
+
+def _store_on_disk(key, result):
+    """
+    Sonucu diske yaz: DataFrame'ler Parquet, diğer alanlar meta.json. Tablo Parquet'e
+    yazılamıyorsa (örn. karışık tipli ham sütunlar) sonuç sadece bellekte tutulur.
+    """
+    entry_dir = _entry_dir(key)
+    if os.path.exists(entry_dir):
+        return
+    temp_dir = None
+    try:
+        os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(dir=RESULT_CACHE_DIR, prefix=".tmp.")
+        frames = {}
+        for name, value in result.items():
+            if isinstance(value, pd.DataFrame):
+                value.to_parquet(os.path.join(temp_dir, f"{name}.parquet"), compression=PARQUET_COMPRESSION)
+                frames[name] = _frame_dtypes(value)
+        meta = {
+            "version": DISK_CACHE_VERSION,
+            "bank_type": result["bank_type"],
+            "messages": [list(message) for message in result["messages"]],
+            "frames": frames,
+        }
+        with open(os.path.join(temp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.rename(temp_dir, entry_dir)
+        temp_dir = None
+    except Exception as e:
+        # Aynı kaydı başka bir süreç önce yazdıysa yeniden adlandırma da burada başarısız olur
+        logger.debug("Sonuç diske yazılmadı: %s", e, extra={"key": key[:12]})
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    _evict_disk()
+
+def _remember(key, result):
+    """
+    Sonucu bellek önbelleğine ekle; sınır aşılırsa en uzun süredir kullanılmayan sonuçları at
+    """
+    size = result_size(result)
+    with _result_cache_lock:
+        entries = _result_cache["entries"]
+        if key in entries:
+            _result_cache["bytes"] -= entries.pop(key)[1]
+        # Sınırdan büyük tek sonuç önbelleğe alınmaz, diğer kayıtları da silmez
+        if size > RESULT_CACHE_MAX_BYTES:
+            logger.debug("Sonuç önbelleğe alınmadı (boyut sınırı aşılıyor)", extra={"bytes": size})
+            return
+        entries[key] = (result, size)
+        _result_cache["bytes"] += size
+        while _result_cache["bytes"] > RESULT_CACHE_MAX_BYTES:
+            _, (_, evicted_size) = entries.popitem(last=False)
+            _result_cache["bytes"] -= evicted_size
+
+def get_cached_result(key):
+    """
+    Önbellekteki sonucu döndür: önce bellek, sonra disk (diskten okunan bellek önbelleğine alınır).
+    Yoksa None
+    """
+    with _result_cache_lock:
+        entry = _result_cache["entries"].get(key)
+        if entry is not None:
+            _result_cache["entries"].move_to_end(key)
+            _result_cache["hits"] += 1
+            return entry[0]
+
+    result = _load_from_disk(key)
+    with _result_cache_lock:
+        if result is None:
+            _result_cache["misses"] += 1
+            return None
+        _result_cache["hits"] += 1
+        _result_cache["disk_hits"] += 1
+    _remember(key, result)
+    return result
+
+def store_result(key, result):
+    """
+    Sonucu bellek ve disk önbelleğine ekle
+    """
+    _remember(key, result)
+    _store_on_disk(key, result)
+
+def _stream_entry_dir(key):
+    return os.path.join(STREAM_CACHE_DIR, key)
+
+def _load_stream_entry(key):
+    """
+    Diskteki akış modu sonucunu oku: özet (önizleme ve çıktı dosyasının yolu dahil) veya None
+    """
+    entry_dir = _stream_entry_dir(key)
+    meta_path = os.path.join(entry_dir, "meta.json")
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != DISK_CACHE_VERSION:
+            return None
+        summary = meta["summary"]
+        summary["preview"] = None
+        if meta["preview_dtypes"] is not None:
+            preview = pd.read_parquet(os.path.join(entry_dir, "preview.parquet"))
+            summary["preview"] = _restore_dtypes(preview, meta["preview_dtypes"])
+        summary["output_path"] = os.path.join(entry_dir, STREAM_OUTPUT_FILE)
+        os.utime(meta_path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.debug("Akış modu sonucu okunamadı: %s", e, extra={"key": key[:12]})
+        return None
+    return summary
+
+def get_cached_stream_result(key):
+    """
+    Aynı dosya daha önce akış modunda işlendiyse özetini döndür (output_path: çıktı CSV'sinin yolu), yoksa None.
+    Streamlit'in yeniden çalıştırmalarında (örn. indirme butonuna basılınca) dosya tekrar işlenmez
+    """
+    return _load_stream_entry(key)
+
+def store_stream_result(key, convert):
+    """
+    Akış modu sonucunu STREAM_CACHE_DIR'deki kayda yaz. convert(çıktı CSV'sinin yolu) dosyayı işleyip
+    stream_convert_csv özetini döndürür (veri yoksa None); çıktı geçici klasöre yazılır, özet ve önizleme
+    eklendikten sonra kayıt tek adımda yerine taşınır. Aynı anahtarı başka bir oturum önce yazdıysa o kayıt kullanılır.
+    Returns: özet (output_path: çıktı CSV'sinin yolu) veya veri yoksa None
+    """
+    os.makedirs(STREAM_CACHE_DIR, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=STREAM_CACHE_DIR, prefix=".tmp.")
+    try:
+        summary = convert(os.path.join(temp_dir, STREAM_OUTPUT_FILE))
+        if summary is None:
+            return None
+        preview = summary["preview"]
+        if preview is not None:
+            preview.to_parquet(os.path.join(temp_dir, "preview.parquet"), compression=PARQUET_COMPRESSION)
+        meta = {
+            "version": DISK_CACHE_VERSION,
+            "summary": {name: value for name, value in summary.items() if name != "preview"},
+            "preview_dtypes": _frame_dtypes(preview) if preview is not None else None,
+        }
+        with open(os.path.join(temp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+            # Tespit ayrıntılarındaki JSON'a çevrilemeyen değerler metin olarak saklanır
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        try:
+            os.rename(temp_dir, _stream_entry_dir(key))
+            temp_dir = None
+        except OSError:
+            logger.debug("Akış modu sonucu zaten kayıtlı", extra={"key": key[:12]})
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    _evict_disk(STREAM_CACHE_DIR, STREAM_CACHE_MAX_BYTES, keep=_stream_entry_dir(key))
+    return _load_stream_entry(key)
+
+def stream_result_file(key, file_name, write):
+    """
+    Akış modu kaydına sonradan eklenen dosyanın (örn. Excel çıktısı) yolu. Dosya yoksa write(geçici yol)
+    ile kaydın içine yazılıp tek adımda yerine taşınır; aynı dosya bir kez oluşturulur.
+    Returns: dosyanın yolu veya kayıt bu sırada önbellekten silindiyse None
+    """
+    entry_dir = _stream_entry_dir(key)
+    path = os.path.join(entry_dir, file_name)
+    if os.path.exists(path):
+        return path
+    temp_path = os.path.join(entry_dir, f".{file_name}.{uuid.uuid4().hex}")
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.debug("Akış modu kaydına dosya eklenemedi: %s", e, extra={"key": key[:12], "file": file_name})
+        return None
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    _evict_disk(STREAM_CACHE_DIR, STREAM_CACHE_MAX_BYTES, keep=entry_dir)
+    return path
+
+def get_result_cache_stats():
+    """
+    Sonuç önbelleğinin (bellek, disk ve akış modu çıktıları) doluluğunu ve isabet oranını döndür
+    """
+    disk_entries = _disk_entries()
+    stream_entries = _disk_entries(STREAM_CACHE_DIR)
+    with _result_cache_lock:
+        hits = _result_cache["hits"]
+        misses = _result_cache["misses"]
+        return {
+            "entries": len(_result_cache["entries"]),
+            "bytes": _result_cache["bytes"],
+            "max_bytes": RESULT_CACHE_MAX_BYTES,
+            "disk_entries": len(disk_entries),
+            "disk_bytes": sum(size for _, size, _ in disk_entries),
+            "disk_max_bytes": RESULT_CACHE_DISK_MAX_BYTES,
+            "stream_entries": len(stream_entries),
+            "stream_bytes": sum(size for _, size, _ in stream_entries),
+            "stream_max_bytes": STREAM_CACHE_MAX_BYTES,
+            "hits": hits,
+            "misses": misses,
+            "disk_hits": _result_cache["disk_hits"],
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+def clear_result_cache():
+    """
+    Sonuç önbelleğini (bellek, disk ve akış modu çıktıları) ve sayaçlarını sıfırla
+    """
+    with _result_cache_lock:
+        _result_cache["entries"].clear()
+        _result_cache["bytes"] = 0
+        _result_cache["hits"] = 0
+        _result_cache["misses"] = 0
+        _result_cache["disk_hits"] = 0
+    for _, _, path in _disk_entries() + _disk_entries(STREAM_CACHE_DIR):
+        _remove_entry(path)
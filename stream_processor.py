@@ -0,0 +1,171 @@
+"""
+Çok büyük CSV ekstreleri için parça parça (chunk) işleme hattı
+
+Dosya STREAM_CHUNK_ROWS satırlık parçalar halinde okunur; banka formatı ilk parçadan tespit edilir,
+standardizasyon ve hedef formata dönüşüm her parça için ayrı yapılır. Üst bölüm çıktı dosyasına
+hemen yazılır, alt bölüm geçici bir dosyada biriktirilip ayırıcı satırdan sonra ikinci bir akış
+geçişiyle eklenir. Bellekte aynı anda sadece bir parça bulunur.
+"""
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from bank_config import detect_bank_format, find_standard_header_row, standardize_dataframe
+from data_processor import guess_columns, process_data
+from file_reader import sniff_csv_options, csv_fallback_options
+from utils import (
+    convert_to_target_sections, target_separator_frame,
+    header_view, materialize_header_view, build_section_totals
+)
+from export_writer import export_frame, CSV_SEPARATOR, CSV_ENCODING
+from logging_config import get_logger
+
+logger = get_logger("stream_processor")
+
+# Bir parçadaki satır sayısı; bellek kullanımını bu değer belirler
+STREAM_CHUNK_ROWS = 50_000
+
+# Bu boyutun üzerindeki CSV dosyaları uygulamada parça parça işlenir
+STREAMING_THRESHOLD_BYTES = 20 * 1024 * 1024
+
+# Ekranda gösterilmek üzere saklanan üst bölüm satırı sayısı
+STREAM_PREVIEW_ROWS = 1000
+
+# Çıktı CSV'si uygulamanın indirme dosyasıyla aynı biçimdedir
+OUTPUT_SEPARATOR = CSV_SEPARATOR
+OUTPUT_ENCODING = CSV_ENCODING
+
+def _write_section(section_df, handle, header=False):
+    export_frame(section_df).to_csv(handle, index=False, header=header, sep=OUTPUT_SEPARATOR)
+
+def _align_chunk_dtypes(chunk, reference_dtypes):
+    """
+    Parçanın sütun tiplerini ilk parçanınkilerle hizala
+    pandas tipi her parça için ayrı tahmin eder; ilk parçada metin olan bir sütun (örn. başlık öncesi
+    satırlar yüzünden) sonraki parçada sayı gelirse standardizasyon farklı sütunlar seçebilir.
+    Bu sütunlar, dosyanın tamamı okunduğunda olacağı gibi metne çevrilir (boş hücreler NaN kalır)
+    """
+    for position, dtype in enumerate(reference_dtypes):
+        values = chunk.iloc[:, position]
+        if dtype == object and values.dtype != object:
+            chunk.isetitem(position, values.astype(str).where(values.notna(), np.nan).astype(object))
+    return chunk
+
+def _stream_chunks(source, read_options, file_name, content_key, chunk_rows, output, spool):
+    """
+    Tek bir okuma denemesi: parçaları işleyip üst bölümü output'a, alt bölümü spool'a yaz
+    """
+    reader = pd.read_csv(source, chunksize=chunk_rows, **read_options)
+    first_chunk = next(reader, None)
+    if first_chunk is None or len(first_chunk.columns) == 0:
+        return None
+
+    # Format sadece ilk parçadan tespit edilir
+    bank_format = detect_bank_format(first_chunk, file_name=file_name, content_key=content_key)
+
+    # Başlık satırı ilk parçada çözülür; sonraki parçaların sütunları aynı başlıkla adlandırılır
+    header_values = None
+    if bank_format is not None:
+        if bank_format.get("processed_df") is not None:
+            first_df = bank_format["processed_df"]
+            header_values = first_df.columns
+        else:
+            header_row = find_standard_header_row(first_chunk)
+            if header_row >= 0:
+                first_df = materialize_header_view(header_view(first_chunk, header_row))
+                header_values = first_df.columns
+            else:
+                first_df = first_chunk
+        # İlk parçanın DataFrame'i özetle birlikte taşınmasın
+        bank_format = {key: value for key, value in bank_format.items() if key != "processed_df"}
+        generic_columns = None
+    else:
+        # Tanınmayan formatta sütunlar da sadece ilk parçadan tahmin edilir; her parça ayrı tahmin
+        # edilirse aynı başlık altında farklı sütunlar karışabilir
+        first_df = first_chunk
+        generic_columns = guess_columns(first_chunk)
+        logger.info("Format tanınmadı, genel sütun eşlemesi kullanılıyor", extra={"columns": generic_columns})
+
+    summary = {
+        "bank_format": bank_format,
+        "bank_type": bank_format["id"] if bank_format else "unknown",
+        "rows": 0,
+        "chunks": 0,
+        "totals": {'Borç': 0.0, 'Alacak': 0.0},
+        "preview": [],
+    }
+    preview_rows = 0
+
+    def process_chunk(chunk_df):
+        nonlocal preview_rows
+        if bank_format is not None:
+            processed = standardize_dataframe(chunk_df, bank_format, header_resolved=True)
+        else:
+            processed = process_data(chunk_df, generic_columns)
+        upper_df, lower_df, totals = convert_to_target_sections(processed)
+
+        _write_section(upper_df, output, header=summary["chunks"] == 0)
+        _write_section(lower_df, spool)
+
+        summary["rows"] += len(processed)
+        summary["chunks"] += 1
+        summary["totals"]['Borç'] += totals['Borç']
+        summary["totals"]['Alacak'] += totals['Alacak']
+        if preview_rows < STREAM_PREVIEW_ROWS:
+            summary["preview"].append(upper_df.head(STREAM_PREVIEW_ROWS - preview_rows))
+            preview_rows += len(summary["preview"][-1])
+        logger.debug("Parça işlendi: %s satır", len(processed), extra={"chunk": summary["chunks"], "rows": summary["rows"]})
+
+    reference_dtypes = list(first_df.dtypes)
+    process_chunk(first_df)
+    for chunk in reader:
+        if header_values is not None:
+            chunk.columns = header_values
+        process_chunk(_align_chunk_dtypes(chunk, reference_dtypes))
+    return summary
+
+def stream_convert_csv(source, output, file_name=None, content_key=None, chunk_rows=STREAM_CHUNK_ROWS, read_options=None):
+    """
+    CSV ekstresini parça parça okuyup hedef formatı output'a (metin dosyası) CSV olarak yaz
+    source: dosya yolu veya başa sarılabilir dosya nesnesi (yüklenen dosya)
+    output: yazılabilir, başa sarılabilir metin dosyası (OUTPUT_ENCODING ile açılmalı)
+    read_options: pd.read_csv ayarları; verilmezse dosya başından tahmin edilir (sniff_csv_options).
+    UTF-8 sanılan dosyanın devamında geçersiz bayt çıkarsa tüm akış Windows-1254 ile baştan tekrarlanır.
+
+    Returns: özet sözlüğü (bank_type, bank_format, rows, chunks, section_totals, preview) veya dosya boşsa None
+    """
+    read_options = dict(read_options) if read_options is not None else sniff_csv_options(source)
+    fallback = csv_fallback_options(read_options)
+    attempts = [read_options] if fallback is None else [read_options, fallback]
+
+    for attempt, options in enumerate(attempts):
+        if attempt:
+            logger.info("CSV UTF-8 olarak okunamadı, %s ile tekrar deneniyor", options["encoding"])
+            if hasattr(source, "seek"):
+                source.seek(0)
+            output.seek(0)
+            output.truncate()
+        # Alt bölüm diskte biriktirilir; bellekte tutulmaz
+        with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as spool:
+            try:
+                summary = _stream_chunks(source, options, file_name, content_key, chunk_rows, output, spool)
+            except UnicodeDecodeError:
+                if attempt + 1 < len(attempts):
+                    continue
+                raise
+            if summary is None:
+                return None
+
+            # Ayırıcı satır ve alt bölüm (ikinci akış geçişi: biriktirilen dosya parça parça kopyalanır)
+            _write_section(target_separator_frame(), output)
+            spool.seek(0)
+            shutil.copyfileobj(spool, output)
+
+        summary["section_totals"] = build_section_totals(summary["totals"])
+        preview = summary.pop("preview")
+        summary["preview"] = pd.concat(preview, ignore_index=True) if preview else None
+        logger.info("Akış modunda işlendi: %s satır, %s parça", summary["rows"], summary["chunks"],
+                    extra={"bank_type": summary["bank_type"]})
+        return summary
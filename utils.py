@@ -1,6 +1,18 @@
 import re
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from logging_config import get_logger
+
+logger = get_logger("utils")
+
+# Türkçe karakterleri koruyarak harf ve rakam dışındaki her karakter dizisini yakalar.
+# Boşluk da bu diziye dahil edildiği için tek geçişte hem özel karakterler kaldırılır
+# hem de birden fazla boşluk tek boşluğa indirilir
+_DESCRIPTION_NOISE = re.compile('[^a-zA-Z0-9çÇğĞıİöÖşŞüÜ]+')
 
 def clean_description(description):
     """
@@ -9,22 +21,22 @@ def clean_description(description):
     if pd.isna(description):
         return ""
     
-    # Convert to string if it's not already
-    description = str(description)
-    
-    # Türkçe karakterleri koruyarak tüm özel karakterleri ve noktalama işaretlerini kaldır
-    turkish_chars = 'çÇğĞıİöÖşŞüÜ'
-    # Sadece harfleri, rakamları ve Türkçe karakterleri tut, diğerlerini boşluğa çevir
-    pattern = f'[^a-zA-Z0-9{turkish_chars} ]'
-    description = re.sub(pattern, ' ', description)
-    
-    # Gereksiz boşlukları temizle (birden fazla boşluğu tek boşluğa dönüştür)
-    description = re.sub(r'\s+', ' ', description)
-    
+    # Sadece harfleri, rakamları ve Türkçe karakterleri tut, diğerlerini (ve boşluk dizilerini) tek boşluğa çevir
     # Başlangıç ve sondaki boşlukları kaldır
-    description = description.strip()
-    
-    return description
+    return _DESCRIPTION_NOISE.sub(' ', str(description)).strip()
+
+# Denenecek tarih formatları (öncelik sırasıyla)
+DATE_FORMATS = [
+    '%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%Y/%m/%d',
+    '%d.%m.%Y', '%m/%d/%Y', '%d/%m/%y', '%Y%m%d',
+    '%d %b %Y', '%d %B %Y', '%b %d %Y', '%B %d %Y'
+]
+
+# Normalize edilmiş tarihlerin formatı (format_date çıktısı)
+NORMALIZED_DATE_FORMAT = '%d.%m.%Y'
+
+# Baskın tarih formatını tahmin etmek için incelenecek hücre sayısı
+DATE_SAMPLE_SIZE = 200
 
 def format_date(date_str, for_grouping=False):
     """
@@ -56,17 +68,11 @@ def format_date(date_str, for_grouping=False):
             # ":" işaretinden önceki kısmı al (muhtemelen tarih kısmı)
             date_str = date_str.split(':')[0]
         
-        print(f"Temizlenmiş tarih: {date_str}")
+        logger.debug("Temizlenmiş tarih: %s", date_str)
         
         # Try different date formats
-        date_formats = [
-            '%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%Y/%m/%d',
-            '%d.%m.%Y', '%m/%d/%Y', '%d/%m/%y', '%Y%m%d',
-            '%d %b %Y', '%d %B %Y', '%b %d %Y', '%B %d %Y'
-        ]
-        
         date_obj = None
-        for fmt in date_formats:
+        for fmt in DATE_FORMATS:
             try:
                 date_obj = datetime.strptime(date_str, fmt)
                 break
@@ -109,6 +115,191 @@ def format_date(date_str, for_grouping=False):
     # Yeni tarih oluştur (sadece gün değişti)
     return f"{grouped_day:02d}.{date_obj.month:02d}.{date_obj.year}"
 
+# Tarih ve açıklama önbelleklerinin en fazla tutacağı farklı değer sayısı
+NORMALIZATION_CACHE_SIZE = 100_000
+
+# Ekstrelerde aynı tarih ve açıklama metinleri yüzlerce kez tekrarlanır.
+# typed=True: 1 ile 1.0 farklı sonuç ürettiği için ayrı anahtar olarak tutulur
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE, typed=True)
+def cached_format_date(date_str, for_grouping=False):
+    """
+    format_date'in sınırlı boyutlu (LRU) önbellekli sürümü
+    """
+    return format_date(date_str, for_grouping)
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE, typed=True)
+def cached_clean_description(description):
+    """
+    clean_description'ın sınırlı boyutlu (LRU) önbellekli sürümü
+    """
+    return clean_description(description)
+
+def clean_description_series(series):
+    """
+    clean_description'ın sütun düzeyindeki karşılığı
+    Her farklı açıklama bir kez (önbellek üzerinden) temizlenir ve sonuç tüm satırlara geri eşlenir
+    """
+    result = pd.Series('', index=series.index, dtype=object)
+    present = series.notna().to_numpy()
+    if present.any():
+        codes, uniques = pd.factorize(series[present].astype(str))
+        cleaned = np.array([cached_clean_description(value) for value in uniques], dtype=object)
+        result[present] = cleaned[codes]
+    return result
+
+def get_normalization_cache_stats():
+    """
+    Tarih ve açıklama önbelleklerinin isabet/ıskalama sayılarını döndür
+    """
+    stats = {}
+    for name, cached_function in [("format_date", cached_format_date), ("clean_description", cached_clean_description)]:
+        info = cached_function.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_ratio": info.hits / lookups if lookups else 0.0,
+            "size": info.currsize,
+            "max_size": info.maxsize
+        }
+    return stats
+
+def clear_normalization_caches():
+    """
+    Tarih ve açıklama önbelleklerini ve sayaçlarını sıfırla
+    """
+    cached_format_date.cache_clear()
+    cached_clean_description.cache_clear()
+
+def _strip_time_part(strings):
+    """
+    format_date'teki saat temizliğinin sütun düzeyindeki karşılığı
+    Örnek: 15/06/2025-14:36:26 -> 15/06/2025
+    """
+    strings = strings.str.strip()
+    cleaned = strings.copy()
+    
+    # Tarih-saat ayırıcıları: tire (-), boşluk ( ), noktalı virgül (;) - ilk bulunan kullanılır
+    remaining = pd.Series(True, index=strings.index)
+    for separator in ['-', ' ', ';']:
+        has_separator = remaining & strings.str.contains(separator, regex=False)
+        if has_separator.any():
+            cleaned[has_separator] = strings[has_separator].str.partition(separator)[0].str.strip()
+        remaining &= ~has_separator
+    
+    # Saat bilgisi ':' içeriyorsa ":" işaretinden önceki kısmı al
+    has_colon = cleaned.str.contains(':', regex=False)
+    if has_colon.any():
+        cleaned[has_colon] = cleaned[has_colon].str.partition(':')[0]
+    
+    return cleaned
+
+def infer_date_format(strings, sample_size=DATE_SAMPLE_SIZE):
+    """
+    Temizlenmiş tarih metinlerinden bir örnek alarak baskın formatı tahmin et
+    Her örnek hücre için format_date'in kullanacağı ilk format bulunur, en sık görülen döndürülür
+    """
+    sample = pd.Series(strings.dropna().head(sample_size).unique(), dtype=object)
+    if len(sample) == 0:
+        return None
+    
+    first_match = pd.Series(None, index=sample.index, dtype=object)
+    for fmt in DATE_FORMATS:
+        unmatched = first_match.isna()
+        if not unmatched.any():
+            break
+        parsed = pd.to_datetime(sample[unmatched], format=fmt, errors='coerce')
+        first_match[parsed.index[parsed.notna()]] = fmt
+    
+    if first_match.isna().all():
+        return None
+    return first_match.value_counts().idxmax()
+
+def _parse_date_series(series, date_format=None):
+    """
+    Bir tarih sütununu tek bir sabit formatla toplu olarak ayrıştır
+    Dönüş: (ayrıştırılmış tarihler, yavaş yola düşecek hücrelerin maskesi) - ikisi de sıra tabanlı
+    """
+    # Tekrarlı indekslerde etiketle atama yapmamak için sıra tabanlı indeks kullan
+    series = series.reset_index(drop=True)
+    missing = series.isna()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, pd.Series(False, index=series.index)
+    
+    parsed = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    present = series[~missing]
+    
+    # Zaten tarih nesnesi olan hücreler metne çevrilmeden dönüştürülür
+    is_datetime = present.map(lambda value: isinstance(value, datetime)).astype(bool)
+    if is_datetime.any():
+        parsed[is_datetime.index[is_datetime]] = pd.to_datetime(present[is_datetime], errors='coerce')
+    
+    strings = _strip_time_part(present[~is_datetime].astype(str))
+    if len(strings) > 0:
+        inferred = date_format is None
+        if inferred:
+            date_format = infer_date_format(strings)
+        
+        if date_format is not None:
+            try:
+                values = pd.to_datetime(strings, format=date_format, errors='coerce')
+            except ValueError:
+                # Geçersiz bir format bildirilmişse tüm hücreler yavaş yola düşer
+                values = pd.Series(pd.NaT, index=strings.index, dtype='datetime64[ns]')
+                inferred = False
+            
+            # Tahmin edilen format, format_date'te kendisinden önce denenen formatlara
+            # uyan hücrelerde o formatlara öncelik vermeli (örn. 05/03/2024 gg/aa olarak okunur)
+            if inferred and date_format in DATE_FORMATS:
+                claimed = values.isna()
+                for fmt in DATE_FORMATS[:DATE_FORMATS.index(date_format)]:
+                    candidates = ~claimed
+                    for literal in set(re.sub(r'%.', '', fmt)):
+                        candidates &= strings.str.contains(literal, regex=False)
+                    if not candidates.any():
+                        continue
+                    earlier = pd.to_datetime(strings[candidates], format=fmt, errors='coerce').dropna()
+                    values[earlier.index] = earlier
+                    claimed[earlier.index] = True
+            
+            parsed[values.index] = values
+    
+    fallback = ~missing & parsed.isna()
+    return parsed, fallback
+
+def _render_dates(series, parsed, fallback, for_grouping=False):
+    """
+    Ayrıştırılmış tarihleri DD.MM.YYYY (veya gruplandırılmış) metne çevir
+    Ayrıştırılamayan hücreler için önbellekli format_date kullanılır
+    """
+    result = pd.Series('', index=parsed.index, dtype=object)
+    valid = parsed.notna()
+    if valid.any():
+        dates = parsed[valid]
+        day = dates.dt.day.to_numpy()
+        if for_grouping:
+            # Gruplandırma: 1-10 -> 10, 11-20 -> 20, 21-31 -> 31
+            day = np.where(day <= 10, 10, np.where(day <= 20, 20, 31))
+        result[valid] = (
+            pd.Series(day, index=dates.index).astype(str).str.zfill(2) + '.'
+            + dates.dt.month.astype(str).str.zfill(2) + '.'
+            + dates.dt.year.astype(str)
+        )
+    if fallback.any():
+        original = series.to_numpy()[fallback.to_numpy()]
+        result[fallback] = [cached_format_date(value, for_grouping) for value in original]
+    result.index = series.index
+    return result
+
+def format_date_series(series, for_grouping=False, date_format=None):
+    """
+    format_date'in sütun düzeyindeki karşılığı
+    Baskın format bir örnekten bir kez tahmin edilir (date_format verilmişse tahmin atlanır),
+    tüm sütun bu formatla ayrıştırılır ve sadece başarısız hücreler format_date'e düşer
+    """
+    parsed, fallback = _parse_date_series(series, date_format)
+    return _render_dates(series, parsed, fallback, for_grouping)
+
 def format_turkish_currency(amount):
     """
     Sayısal değeri Türk Lirası formatında biçimlendirir (1.000,00 TL)
@@ -124,6 +315,360 @@ def format_turkish_currency(amount):
     
     return formatted
 
+# Toplu para birimi biçimlendirme için hazır parçalar: kuruş (",05"), ilk binlik grup ("12")
+# ve sonraki binlik gruplar (".045")
+_CURRENCY_FRACTIONS = np.array([f",{i:02d}" for i in range(100)], dtype=object)
+_CURRENCY_LEADING_GROUPS = np.array([str(i) for i in range(1000)], dtype=object)
+_CURRENCY_GROUPS = np.array([f".{i:03d}" for i in range(1000)], dtype=object)
+
+# Bu değerin üzerindeki tutarlar kayan nokta hassasiyeti nedeniyle tek tek biçimlendirilir
+_CURRENCY_VECTOR_LIMIT = 1e13
+
+def _join_currency_parts(cents, negative):
+    """
+    Mutlak kuruş değerlerinden (int64) 1.234,56 biçimindeki metinleri oluştur
+    """
+    whole = cents // 100
+    formatted = _CURRENCY_FRACTIONS[cents % 100]
+    
+    # Binlik grupları sağdan sola ayır
+    groups = [whole % 1000]
+    rest = whole // 1000
+    while (rest > 0).any():
+        groups.append(rest % 1000)
+        rest = rest // 1000
+    
+    integer_part = None
+    for position in range(len(groups) - 1, -1, -1):
+        group = groups[position]
+        exists = (whole >= 1000 ** position) | (position == 0)
+        is_leading = exists & (whole < 1000 ** (position + 1))
+        piece = np.where(is_leading, _CURRENCY_LEADING_GROUPS[group], np.where(exists, _CURRENCY_GROUPS[group], ''))
+        integer_part = piece if integer_part is None else integer_part + piece
+    
+    formatted = integer_part + formatted
+    return np.where(negative, '-' + formatted, formatted)
+
+def format_turkish_currency_series(amounts, minor_units=False):
+    """
+    format_turkish_currency'nin sütun düzeyindeki karşılığı, çıktısı bayt bayt aynıdır
+    amounts: float/int tutar sütunu; minor_units=True ise tamsayı kuruş (sabit noktalı) değerleri
+    """
+    if not isinstance(amounts, pd.Series):
+        amounts = pd.Series(amounts)
+    result = np.full(len(amounts), '', dtype=object)
+    
+    # Decimal gibi nesne tipindeki değerler kendi yuvarlama kurallarıyla tek tek biçimlendirilir
+    if not pd.api.types.is_numeric_dtype(amounts) or pd.api.types.is_bool_dtype(amounts):
+        result[:] = [format_turkish_currency(value / 100 if minor_units else value) for value in amounts.tolist()]
+        return pd.Series(result, index=amounts.index, dtype=object)
+    
+    values = amounts.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = ~np.isnan(values) & (values != 0)
+    values = values[present]
+    
+    if minor_units:
+        cents = np.abs(amounts.to_numpy()[present]).astype(np.int64)
+        slow = np.zeros(len(values), dtype=bool)
+    else:
+        scaled = np.abs(values) * 100
+        # Yarım kuruşa çok yakın değerlerde kayan nokta çarpımının yuvarlaması yanıltabilir;
+        # bu değerler ve çok büyük tutarlar str.format ile tek tek biçimlendirilir
+        with np.errstate(invalid='ignore'):
+            distance_to_half = np.abs(scaled - np.floor(scaled) - 0.5)
+        slow = ~(np.abs(values) < _CURRENCY_VECTOR_LIMIT) | (distance_to_half <= np.maximum(1e-6, scaled * 1e-15))
+        cents = np.where(slow, 0, np.rint(scaled)).astype(np.int64)
+    
+    formatted = _join_currency_parts(cents, values < 0)
+    if slow.any():
+        formatted[slow] = [format_turkish_currency(value) for value in values[slow].tolist()]
+    
+    result[present] = formatted
+    return pd.Series(result, index=amounts.index, dtype=object)
+
+# Çıktıda sayısal tutulan ve sadece gösterim/dışa aktarımda biçimlendirilen sütunlar
+AMOUNT_COLUMNS = ['Borç', 'Alacak']
+
+def format_amount_columns(df, columns=None):
+    """
+    Sayısal tutar sütunlarını gösterim ve dışa aktarım için Türk Lirası formatındaki metinlere çevir
+    Sütunlar verilmezse DataFrame'in biçimlendirme bilgisi (attrs['amount_columns']) kullanılır.
+    Zaten metin olan sütunlara (örn. eski kayıtlar) dokunulmaz
+    """
+    if columns is None:
+        columns = df.attrs.get('amount_columns', AMOUNT_COLUMNS)
+    # Tamamen boş sütunlar (örn. veritabanından None olarak dönen) da boş metne çevrilir
+    numeric_columns = [
+        col for col in columns
+        if col in df.columns and (pd.api.types.is_numeric_dtype(df[col]) or df[col].isna().all())
+    ]
+    if not numeric_columns:
+        return df
+    
+    formatted_df = df.copy()
+    for col in numeric_columns:
+        formatted_df[col] = format_turkish_currency_series(df[col])
+    return formatted_df
+
+# Metin tutarlar için tek geçişlik desen: parantez, baştaki/sondaki işaret, para birimi ve sayı gövdesi
+# Örnekler: "1.234,56 TL", "-1.234,56", "1.234,56-", "(1.234,56)", "+500,00", "₺ 1,234.56"
+# Desen pyarrow'un RE2 motorunda çalışır (RE2'de \s sadece ASCII boşluktur); bölünmez boşluklar
+# boşluk sınıfına ayrıca eklenir
+_SPACE = '[\\s\u00a0\u2007\u202f]*'
+_CURRENCY_TOKEN = r'(?:[Tt][Ll]|[Tt][Rr][Yy]|₺)?'
+_AMOUNT_PATTERN = (
+    r'^' + _SPACE + r'(?P<open>\()?' + _SPACE + r'(?P<sign>[-+])?' + _SPACE + _CURRENCY_TOKEN + _SPACE
+    + r'(?P<inner_sign>[-+])?' + _SPACE
+    + r"(?P<number>\d{1,3}(?:[.,' ]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?)"
+    + _SPACE + _CURRENCY_TOKEN + _SPACE + r'(?P<trailing>-)?' + _SPACE + r'(?P<close>\))?' + _SPACE
+    + _CURRENCY_TOKEN + _SPACE + r'$'
+)
+# Desene uymayan üslü gösterimler (1.5E+03) doğrudan sayıya çevrilir
+_EXPONENT_PATTERN = r'^\s*[-+]?(?:\d+\.?\d*|\.\d+)[eE][-+]?\d+\s*$'
+_ARROW_STRING = pd.ArrowDtype(pa.string())
+_ARROW_FLOAT = pd.ArrowDtype(pa.float64())
+
+def _parse_amount_texts(text):
+    """
+    Metin tutarları (ArrowDtype string Series) float'a çevir, çözümlenemeyenler NaN olur.
+    Binlik ve ondalık ayırıcılar şöyle çözümlenir:
+    - İki ayırıcı birlikte varsa sağdaki ondalık ayırıcıdır (1.234,56 / 1,234.56)
+    - Tek bir virgül ondalık ayırıcıdır (12,5), birden fazla virgül binlik ayırıcıdır
+    - Tek bir noktadan sonra tam 3 rakam varsa binlik ayırıcıdır (1.234), yoksa ondalıktır (12.50, 0.125)
+    """
+    # RE2 eşleşmeyen isteğe bağlı grupları boş metin, hiç eşleşmeyen satırları null döndürür
+    parts = text.str.extract(_AMOUNT_PATTERN)
+    number = parts['number']
+    
+    has_comma = number.str.contains(',', regex=False)
+    has_dot = number.str.contains('.', regex=False)
+    decimal_comma = number.str.contains(r',\d*$') & (has_dot | ~number.str.contains(',.*,'))
+    decimal_dot = number.str.contains(r'\.\d*$') & (
+        has_comma | (~number.str.contains(r'\..*\.') & (~number.str.contains(r'\.\d{3}$') | number.str.startswith('0')))
+    )
+    decimal_comma = decimal_comma.fillna(False)
+    decimal_dot = decimal_dot.fillna(False)
+    
+    # Binlik ayırıcılar silinir, ondalık ayırıcı noktaya çevrilir (sabit metin değiştirmeleri desenden hızlıdır)
+    digits = number.str.replace(' ', '', regex=False).str.replace("'", '', regex=False)
+    without_commas = digits.str.replace(',', '', regex=False)
+    comma_decimal = digits.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    normalized = comma_decimal.where(decimal_comma, without_commas.where(decimal_dot, without_commas.str.replace('.', '', regex=False)))
+    values = normalized.astype(_ARROW_FLOAT).to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    negative = (
+        ((parts['open'] == '(') & (parts['close'] == ')'))
+        | (parts['sign'] == '-') | (parts['inner_sign'] == '-') | (parts['trailing'] == '-')
+    ).fillna(False).to_numpy(dtype=bool)
+    values = np.where(negative, -values, values)
+    
+    exponent = (number.isna() & text.str.contains(_EXPONENT_PATTERN)).fillna(False).to_numpy(dtype=bool)
+    if exponent.any():
+        values[exponent] = text[exponent].str.strip().astype(_ARROW_FLOAT).to_numpy(dtype=np.float64, na_value=np.nan)
+    return values
+
+def parse_amount_series(series):
+    """
+    Banka ekstrelerindeki tutar sütununu float64'e çevir
+    Binlik ayırıcılar, ondalık virgül, para birimi (TL, TRY, ₺), baştaki '+'/'-', sondaki '-',
+    parantezli negatif değerler ve üslü gösterim desteklenir. Çözümlenemeyen hücreler NaN olur.
+    Metin hücreler pyarrow string dizisine alınıp tek desenle, satır döngüsü olmadan çözümlenir.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype(np.float64)
+    
+    values = series.to_numpy(dtype=object)
+    try:
+        # Sütun sadece metin ve boş hücrelerden oluşuyorsa doğrudan dönüştürülür
+        text = pd.Series(pa.array(values, type=pa.string(), from_pandas=True), dtype=_ARROW_STRING)
+        return pd.Series(_parse_amount_texts(text), index=series.index)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    
+    # Karışık sütun: metin hücreler desenle, sayı hücreler olduğu gibi çözümlenir
+    is_text = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+    parsed = np.full(len(values), np.nan)
+    if is_text.any():
+        parsed[is_text] = _parse_amount_texts(pd.Series(values[is_text], dtype=_ARROW_STRING))
+    for position in np.flatnonzero(~is_text):
+        value = values[position]
+        if isinstance(value, (int, float, Decimal, np.number)) and not isinstance(value, (bool, np.bool_)):
+            parsed[position] = value
+    return pd.Series(parsed, index=series.index)
+
+def split_debit_credit(amounts, empty_value=0.0):
+    """
+    İşaretli tutarları Borç (negatifler, mutlak değer) ve Alacak (pozitifler) dizilerine ayır
+    Sıfır ve boş tutarlar iki dizide de empty_value olur.
+    Returns: (borc, alacak, totals) - totals {'Borç': toplam, 'Alacak': toplam} sözlüğüdür
+    """
+    values = pd.to_numeric(pd.Series(amounts)).to_numpy(dtype=np.float64, na_value=np.nan)
+    # NaN karşılaştırmaları False döndüğü için boş tutarlar iki maskeye de girmez
+    negative = values < 0
+    positive = values > 0
+    debit = np.where(negative, -values, empty_value)
+    credit = np.where(positive, values, empty_value)
+    totals = {
+        'Borç': float(debit[negative].sum()),
+        'Alacak': float(credit[positive].sum()),
+    }
+    return debit, credit, totals
+
+def assign_debit_credit(processed_df):
+    """
+    Parser çıktısının Tutar sütunundan Borç ve Alacak sütunlarını oluştur
+    """
+    debit, credit, _ = split_debit_credit(processed_df['Tutar'])
+    processed_df['Borç'] = debit
+    processed_df['Alacak'] = credit
+    return processed_df
+
+def header_view(df, header_row, headers_as_str=False):
+    """
+    header_row satırını sütun adı yapan ve altındaki satırlara kopyalamadan bakan görünüm
+    Aynı başlık satırını bulan tüm formatlar tek görünümü paylaşır; indeks orijinal satır
+    numaralarında kalır. Kalıcı bir DataFrame gerekiyorsa materialize_header_view kullanılır.
+    """
+    headers = df.iloc[header_row]
+    if headers_as_str:
+        headers = headers.astype(str)
+    view = df.iloc[header_row+1:]
+    view.columns = headers
+    return view
+
+def materialize_header_view(view):
+    """
+    Başlık görünümünü 0'dan başlayan indeksli bağımsız bir DataFrame'e çevir (tek kopya)
+    """
+    return view.reset_index(drop=True)
+
+# Hedef muhasebe formatının sütunları (is_separator sadece ayırıcı satırı işaretler)
+TARGET_COLUMNS = [
+    'Fiş No', 'Fiş Tarihi', 'Fiş Açıklama', 'Hesap Kodu', 'Evrak No', 'Evrak Tarihi',
+    'Detay Açıklama', 'Borç', 'Alacak', 'Miktar', 'Belge Türü', 'Para Birimi', 'Kur', 'Döviz Tutar',
+    'is_separator'
+]
+
+# Üst ve alt bölümü ayıran sarı satırın açıklaması
+SEPARATOR_DESCRIPTION = '*** SARI AYIRICI ÇIZGI ***'
+
+# Ayırıcı satırın hücreleri (sadece açıklama dolu, tutarlar boş)
+SEPARATOR_ROW = {column: '' for column in TARGET_COLUMNS}
+SEPARATOR_ROW.update({'Detay Açıklama': SEPARATOR_DESCRIPTION, 'Borç': np.nan, 'Alacak': np.nan, 'is_separator': True})
+
+def _stack_sections(upper, separator_value, lower, dtype=object):
+    """
+    Üst bölüm, ayırıcı hücre ve alt bölüm değerlerini tek bir dizide birleştir
+    """
+    column = np.empty(len(upper) + 1 + len(lower), dtype=dtype)
+    column[:len(upper)] = upper
+    column[len(upper)] = separator_value
+    column[len(upper) + 1:] = lower
+    return column
+
+def _target_parts(df):
+    """
+    İki bölümde de ortak olan değerleri (tarihler, açıklamalar, Borç/Alacak parçaları) bir kez hesapla
+    """
+    row_count = len(df)
+    empty = np.full(row_count, '', dtype=object)
+    
+    # Tarih ve açıklama iki bölümde de aynıdır, bu yüzden bir kez hesaplanır
+    if 'Tarih' in df.columns:
+        original_dates = df['Tarih']
+        parsed, fallback = _parse_date_series(original_dates, df.attrs.get('date_format'))
+        # Gruplandırılmış tarih (1-10, 11-20, 21-31) ve orijinal tarih (değişmeyecek)
+        grouped_dates = _render_dates(original_dates, parsed, fallback, for_grouping=True).to_numpy()
+        document_dates = _render_dates(original_dates, parsed, fallback).to_numpy()
+    else:
+        grouped_dates = document_dates = empty
+    
+    # Açıklamayı temizle - özel karakterler ve noktalama işaretlerini kaldır
+    # Parser açıklamaları zaten temizlediyse tekrar temizlenmez
+    if 'Açıklama' in df.columns and df.attrs.get('descriptions_clean'):
+        descriptions = df['Açıklama'].to_numpy(dtype=object)
+    elif 'Açıklama' in df.columns:
+        descriptions = clean_description_series(df['Açıklama']).to_numpy()
+    else:
+        descriptions = empty
+    
+    # Tutar bir kez negatif (Borç) ve pozitif (Alacak) parçalara ayrılır; işaret sadece hangi sütuna yazılacağını belirler
+    # Sıfır ve boş tutarlar iki sütunda da boş (NaN) kalır
+    if 'Tutar' in df.columns:
+        negative_part, positive_part, totals = split_debit_credit(df['Tutar'], empty_value=np.nan)
+    else:
+        negative_part = positive_part = np.full(row_count, np.nan)
+        totals = {'Borç': 0.0, 'Alacak': 0.0}
+    
+    return {
+        'empty': empty,
+        'grouped_dates': grouped_dates,
+        'document_dates': document_dates,
+        'descriptions': descriptions,
+        'negative': negative_part,
+        'positive': positive_part,
+        'totals': totals,
+    }
+
+def _section_columns(parts, section):
+    """
+    Bir bölümün ('upper' veya 'lower') sütun dizileri
+    Üst bölümde pozitifler Borç'a, alt bölümde negatifler Borç'a yazılır (tersine çevrilmiş)
+    """
+    empty = parts['empty']
+    upper = section == 'upper'
+    return {
+        'Fiş No': empty,  # Boş bırak, ancak sütun kalsın
+        'Fiş Tarihi': parts['grouped_dates'],
+        'Fiş Açıklama': empty,  # Boş bırakılacak
+        'Hesap Kodu': empty,  # This would be assigned by the accounting system
+        'Evrak No': empty,  # Boş bırak, ancak sütun kalsın
+        'Evrak Tarihi': parts['document_dates'],
+        'Detay Açıklama': parts['descriptions'],
+        'Borç': parts['positive'] if upper else parts['negative'],
+        'Alacak': parts['negative'] if upper else parts['positive'],
+        'Miktar': empty,
+        'Belge Türü': empty,
+        'Para Birimi': empty,
+        'Kur': empty,
+        'Döviz Tutar': empty,
+        'is_separator': np.full(len(empty), False, dtype=object),
+    }
+
+def build_section_totals(totals):
+    """
+    Ayırma sırasında hesaplanan toplamlardan bölüm toplamları; üst bölümde pozitifler Borç'ta, alt bölümde Alacak'ta
+    """
+    return {
+        'upper': {'Borç': totals['Alacak'], 'Alacak': totals['Borç']},
+        'lower': {'Borç': totals['Borç'], 'Alacak': totals['Alacak']},
+    }
+
+def _set_target_attrs(output_df):
+    # İndirirken çıkarılacak sütunları belirt (CSV için)
+    output_df.attrs['export_columns_to_remove'] = ['is_separator']
+    # Gösterim ve dışa aktarımda Türk Lirası formatına çevrilecek sayısal sütunlar
+    output_df.attrs['amount_columns'] = list(AMOUNT_COLUMNS)
+    return output_df
+
+def convert_to_target_sections(df):
+    """
+    convert_to_target_format'ın bölümlere ayrılmış hali (parça parça işleme için)
+    Returns: (üst bölüm, alt bölüm, {'Borç': toplam, 'Alacak': toplam}) - bölümlerde ayırıcı satır yoktur
+    """
+    parts = _target_parts(df)
+    upper_df = _set_target_attrs(pd.DataFrame(_section_columns(parts, 'upper'), columns=TARGET_COLUMNS))
+    lower_df = _set_target_attrs(pd.DataFrame(_section_columns(parts, 'lower'), columns=TARGET_COLUMNS))
+    return upper_df, lower_df, parts['totals']
+
+def target_separator_frame():
+    """
+    Üst ve alt bölüm arasındaki tek satırlık sarı ayırıcı
+    """
+    separator_df = pd.DataFrame([SEPARATOR_ROW], columns=TARGET_COLUMNS)
+    separator_df['is_separator'] = separator_df['is_separator'].astype(object)
+    return _set_target_attrs(separator_df)
+
 def convert_to_target_format(df):
     """
     Convert the processed dataframe to the target format:
@@ -132,124 +677,23 @@ def convert_to_target_format(df):
     Artık çıktı, bir sarı ayırıcı çizgi ile üst ve alt bölüme ayrılır.
     - Üst bölümde: Pozitif değerler Borç'a, negatif değerler Alacak'a yazılır (kırmızı rakamlar Alacak'ta)
     - Alt bölümde: Pozitif değerler Alacak'a, negatif değerler Borç'a yazılır (kırmızı rakamlar Borç'ta)
-    """
-    # Create the output dataframe with all required columns
-    output_df = pd.DataFrame(columns=[
-        'Fiş No', 'Fiş Tarihi', 'Fiş Açıklama', 'Hesap Kodu', 'Evrak No', 'Evrak Tarihi',
-        'Detay Açıklama', 'Borç', 'Alacak', 'Miktar', 'Belge Türü', 'Para Birimi', 'Kur', 'Döviz Tutar',
-        'is_separator'  # Bu sütun gösterilmeyecek, sadece sarı ayırıcı satırı belirlemek için
-    ])
-    
-    # ÜST BÖLÜM - İlk geçiş
-    # Fill the output dataframe with data from the processed dataframe (Upper section)
-    for index, row in df.iterrows():
-        # Tutar varsa ve sayısal bir değerse işle
-        borc_formatted = ""
-        alacak_formatted = ""
-        
-        if 'Tutar' in row and pd.notna(row['Tutar']):
-            tutar = row['Tutar']
-            if tutar < 0:
-                # Negatif değerler Alacak'a yazılır, mutlak değer alınır
-                alacak_formatted = format_turkish_currency(abs(tutar))
-            else:
-                # Pozitif değerler Borç'a yazılır
-                borc_formatted = format_turkish_currency(tutar)
-        
-        # Orijinal tarih ve gruplandırılmış tarih
-        original_date = row.get('Tarih', '')
-        grouped_date = format_date(original_date, for_grouping=True)
-        
-        # Açıklamayı temizle - özel karakterler ve noktalama işaretlerini kaldır
-        aciklama = row.get('Açıklama', '')
-        temiz_aciklama = clean_description(aciklama)
-        
-        new_row = {
-            'Fiş No': '',  # Boş bırak, ancak sütun kalsın
-            'Fiş Tarihi': grouped_date,  # Gruplandırılmış tarih (1-10, 11-20, 21-31)
-            'Fiş Açıklama': '',  # Boş bırakılacak
-            'Hesap Kodu': '',  # This would be assigned by the accounting system
-            'Evrak No': '',  # Boş bırak, ancak sütun kalsın
-            'Evrak Tarihi': format_date(original_date),  # Orijinal tarih (değişmeyecek)
-            'Detay Açıklama': temiz_aciklama,  # Temizlenmiş açıklama
-            'Borç': borc_formatted,  # Türk Lirası formatında borç (negatif değer)
-            'Alacak': alacak_formatted,  # Türk Lirası formatında alacak (pozitif değer)
-            'Miktar': '',  # Boş bırakılacak
-            'Belge Türü': '',  # Boş bırakılacak
-            'Para Birimi': '',  # Boş bırakılacak
-            'Kur': '',  # Boş bırakılacak
-            'Döviz Tutar': '',  # Boş bırakılacak
-            'is_separator': False  # Normal satır
-        }
-        
-        output_df = pd.concat([output_df, pd.DataFrame([new_row])], ignore_index=True)
-    
-    # SARI AYIRICI SATIR - Tüm değerleri boş bir sarı satır eklenecek
-    separator_row = {
-        'Fiş No': '',  # Boş bırakıyoruz
-        'Fiş Tarihi': '', # Boş bırakıyoruz
-        'Fiş Açıklama': '',  # Boş bırakıyoruz
-        'Hesap Kodu': '', 
-        'Evrak No': '',  # Boş bırakıyoruz
-        'Evrak Tarihi': '',  # Boş bırakıyoruz
-        'Detay Açıklama': '*** SARI AYIRICI ÇIZGI ***',  # Sarı çizgi için tek açıklama
-        'Borç': '',
-        'Alacak': '',
-        'Miktar': '',
-        'Belge Türü': '',
-        'Para Birimi': '',
-        'Kur': '',
-        'Döviz Tutar': '',
-        'is_separator': True  # Bu bir ayırıcı satır
-    }
     
-    output_df = pd.concat([output_df, pd.DataFrame([separator_row])], ignore_index=True)
+    Borç ve Alacak sayısal (float64) tutulur, boş hücreler NaN'dır. Türk Lirası biçimlendirmesi
+    sadece gösterim ve dışa aktarımda format_amount_columns ile uygulanır.
     
-    # ALT BÖLÜM - İkinci geçiş
-    # İşlemlerin zıttı olarak ikinci bir set ekle (tersine çevrilmiş borç/alacak)
-    for index, row in df.iterrows():
-        # Tutar varsa ve sayısal bir değerse işle
-        borc_formatted = ""
-        alacak_formatted = ""
-        
-        if 'Tutar' in row and pd.notna(row['Tutar']):
-            tutar = row['Tutar']
-            if tutar < 0:
-                # Negatif değerler ALT BÖLÜMDE Borç'a yazılır
-                borc_formatted = format_turkish_currency(abs(tutar))
-            else:
-                # Pozitif değerler ALT BÖLÜMDE Alacak'a yazılır
-                alacak_formatted = format_turkish_currency(tutar)
-        
-        # Orijinal tarih ve gruplandırılmış tarih
-        original_date = row.get('Tarih', '')
-        grouped_date = format_date(original_date, for_grouping=True)
-        
-        # Açıklamayı temizle - özel karakterler ve noktalama işaretlerini kaldır
-        aciklama = row.get('Açıklama', '')
-        temiz_aciklama = clean_description(aciklama)
-        
-        new_row = {
-            'Fiş No': '',  # Boş bırak, ancak sütun kalsın  
-            'Fiş Tarihi': grouped_date,
-            'Fiş Açıklama': '',
-            'Hesap Kodu': '',
-            'Evrak No': '',  # Boş bırak, ancak sütun kalsın
-            'Evrak Tarihi': format_date(original_date),
-            'Detay Açıklama': temiz_aciklama,
-            'Borç': borc_formatted,  # ÖNEMLİ: Burada tersine çevirdik
-            'Alacak': alacak_formatted,  # ÖNEMLİ: Burada tersine çevirdik
-            'Miktar': '',
-            'Belge Türü': '',
-            'Para Birimi': '',
-            'Kur': '',
-            'Döviz Tutar': '',
-            'is_separator': False
-        }
-        
-        output_df = pd.concat([output_df, pd.DataFrame([new_row])], ignore_index=True)
+    Satır satır birleştirmek yerine her sütun iki bölüm için bir kerede oluşturulur,
+    böylece dönüşüm süresi satır sayısıyla doğrusal artar.
+    """
+    parts = _target_parts(df)
+    upper = _section_columns(parts, 'upper')
+    lower = _section_columns(parts, 'lower')
+    columns = {
+        column: _stack_sections(upper[column], SEPARATOR_ROW[column], lower[column],
+                                dtype=np.float64 if column in AMOUNT_COLUMNS else object)
+        for column in TARGET_COLUMNS
+    }
     
-    # İndirirken çıkarılacak sütunları belirt (CSV için)
-    output_df.attrs['export_columns_to_remove'] = ['is_separator']
+    output_df = _set_target_attrs(pd.DataFrame(columns, columns=TARGET_COLUMNS))
+    output_df.attrs['section_totals'] = build_section_totals(parts['totals'])
         
     return output_df